@@ -12,9 +12,13 @@ This package provides core functionality for:
 __version__ = "1.0.0"
 __author__ = "WanderTrip Team"
 
-# Import key functions to make them available at package level
-from .itinerary_service import generate_itinerary, build_prompt
-from .main import create_app
+# Public API, resolved on first access so that importing the package stays
+# cheap: Flask, requests and the Gemini SDK load only when actually used
+_LAZY_EXPORTS = {
+    'generate_itinerary': '.itinerary_service',
+    'build_prompt': '.itinerary_service',
+    'create_app': '.main',
+}
 
 # Define public API
 __all__ = [
@@ -23,4 +27,14 @@ __all__ = [
     'create_app',
     '__version__',
     '__author__'
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    """Import public API members lazily (PEP 562)"""
+    if name in _LAZY_EXPORTS:
+        from importlib import import_module
+        value = getattr(import_module(_LAZY_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
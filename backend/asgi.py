@@ -0,0 +1,348 @@
+"""
+WanderTrip ASGI Application
+Production API server exposing the Flask app's contract as async endpoints
+"""
+
+import asyncio
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
+
+from .itinerary_service import (
+    create_itinerary_async, drop_day, extend_itinerary_async, regenerate_day_async, reorder_days,
+    shift_itinerary
+)
+from .llm import LLMError, LLMOverloadedError, retry_after_seconds
+from .observability import (
+    render_metrics, CONTENT_TYPE, GENERATIONS_IN_FLIGHT, HTTP_REQUEST_SECONDS,
+    configure_logging, get_logger, log_payload, new_request_id, request_context,
+    bind_request_context, traced_request, parse_traceparent
+)
+from .storage import (
+    open_store, VersionConflictError, DEFAULT_ITINERARY_ID,
+    parse_if_match, format_etag
+)
+
+
+logger = get_logger(__name__)
+
+# Threads for blocking work (OpenTripMap lookups, file writes); Gemini
+# calls are awaited and do not occupy a thread while in flight
+DEFAULT_OFFLOAD_THREADS = 256
+
+
+def create_asgi_app(data_dir=None, offload_threads=None):
+    """
+    Application factory for the async API server
+
+    Args:
+        data_dir (str): Itinerary data directory (default: backend/data)
+        offload_threads (int): Size of the pool for blocking calls
+            (default: OFFLOAD_THREADS env var, then 256)
+
+    Returns:
+        FastAPI: ASGI application
+    """
+    configure_logging()
+    app = FastAPI(title="WanderTrip API", version="1.0.0")
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["ETag", "X-Request-ID", "Server-Timing", "traceparent"]
+    )
+
+    store = open_store(data_dir or os.getenv("ITINERARY_DATA_DIR")
+                       or os.path.join(os.path.dirname(__file__), "data"))
+    history = store.history
+    executor = ThreadPoolExecutor(
+        max_workers=offload_threads or int(os.getenv("OFFLOAD_THREADS", DEFAULT_OFFLOAD_THREADS)),
+        thread_name_prefix="wandertrip-offload"
+    )
+
+    async def offload(func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(executor, lambda: context.run(func, *args, **kwargs))
+
+    def with_etag(body, version, status_code=200):
+        return JSONResponse(body, status_code=status_code, headers={"ETag": format_etag(version)})
+
+    @app.middleware("http")
+    async def record_request_latency(request: Request, call_next):
+        started = time.perf_counter()
+        request_id = request.headers.get("X-Request-ID") or new_request_id()
+        trace_id = parse_traceparent(request.headers.get("traceparent"))
+        with traced_request(f"{request.method} {request.url.path}", trace_id) as trace, \
+                request_context(request_id=request_id, trace_id=trace.trace_id):
+            response = await call_next(request)
+            response.headers["Server-Timing"] = trace.server_timing()
+        response.headers["X-Request-ID"] = request_id
+        response.headers["Timing-Allow-Origin"] = "*"
+        response.headers["traceparent"] = trace.traceparent()
+        route = request.scope.get("route")
+        endpoint = route.path if route is not None else "unmatched"
+        HTTP_REQUEST_SECONDS.labels(endpoint, request.method, str(response.status_code)).observe(
+            time.perf_counter() - started
+        )
+        return response
+
+    @app.on_event("shutdown")
+    def shutdown_executor():
+        executor.shutdown(wait=False)
+
+    @app.get("/")
+    async def index():
+        return {
+            "message": "WanderTrip API is running!",
+            "version": "1.0.0",
+            "endpoints": [
+                "/api/itinerary",
+                "/api/generate",
+                "/api/save",
+                "/api/itinerary/history",
+                "/api/itinerary/{id}/days/{n}/regenerate",
+                "/api/itinerary/{id}/shift",
+                "/api/itinerary/{id}/days/reorder",
+                "/api/itinerary/{id}/days/extend"
+            ]
+        }
+
+    @app.get("/metrics")
+    async def metrics():
+        """Expose this worker's metrics in Prometheus text format"""
+        return Response(render_metrics(), media_type=CONTENT_TYPE)
+
+    @app.get("/api/itinerary")
+    async def get_itinerary():
+        """Serve the current itinerary data"""
+        try:
+            data = await offload(store.get)
+        except FileNotFoundError:
+            return JSONResponse({"error": "No itinerary data found"}, status_code=404)
+        except Exception as e:
+            return JSONResponse({"error": str(e)}, status_code=500)
+        return with_etag(data, data["version"])
+
+    @app.post("/api/generate")
+    async def generate_new_itinerary(request: Request):
+        """Generate a new itinerary based on user inputs, replacing the version named by If-Match"""
+        expected_version, error = await required_version(request)
+        if error:
+            return error
+        # Check before spending a generation on a stale copy
+        current_version = await offload(store.get_version)
+        if expected_version != "*" and expected_version != current_version:
+            return version_conflict(current_version)
+        try:
+            data = await request.json()
+            destination = data.get("destination", "Pasadena")
+            adults = data.get("guests", {}).get("adults", 2)
+            start_date = data.get("startDate")
+            end_date = data.get("endDate")
+            bind_request_context(destination=destination)
+            log_payload(logger, "Generate request", data)
+
+            with GENERATIONS_IN_FLIGHT.track_inprogress():
+                itinerary_json = await create_itinerary_async(
+                    destination, start_date, end_date, adults, executor=executor
+                )
+            itinerary_json["userInputs"] = {
+                "destination": destination,
+                "adults": adults,
+                "startDate": start_date,
+                "endDate": end_date
+            }
+
+            try:
+                itinerary_json["version"] = await offload(store.save, itinerary_json,
+                                                          expected_version=expected_version)
+            except VersionConflictError as e:
+                # Saved by someone else while generating; their plan is kept
+                return version_conflict(e.current_version)
+            return with_etag(itinerary_json, itinerary_json["version"])
+        except LLMOverloadedError as e:
+            # Shed fast instead of queueing behind an overloaded model; the saved plan is kept
+            return overloaded(e)
+        except Exception as e:
+            logger.exception("Generate failed")
+            return JSONResponse({"error": str(e)}, status_code=500)
+
+    @app.post("/api/itinerary/{itinerary_id}/days/{day_number}/regenerate")
+    async def regenerate_itinerary_day(itinerary_id: str, day_number: int, request: Request,
+                                       period: str = None):
+        """Regenerate one day of an itinerary, or one ?period= of it, guarded by If-Match"""
+        period = period or (await json_body(request)).get("period")
+        with GENERATIONS_IN_FLIGHT.track_inprogress():
+            return await update_itinerary(request, itinerary_id, lambda current: regenerate_day_async(
+                current, day_number, period, executor=executor
+            ))
+
+    @app.post("/api/itinerary/{itinerary_id}/shift")
+    async def shift_itinerary_dates(itinerary_id: str, request: Request):
+        """Move an itinerary to the JSON body's startDate, guarded by If-Match"""
+        start_date = (await json_body(request)).get("startDate")
+        return await update_itinerary(request, itinerary_id, lambda current: shift_itinerary(current, start_date))
+
+    @app.post("/api/itinerary/{itinerary_id}/days/reorder")
+    async def reorder_itinerary_days(itinerary_id: str, request: Request):
+        """Rearrange days by the JSON body's order of dayNumbers, dropping the rest"""
+        order = (await json_body(request)).get("order")
+        return await update_itinerary(request, itinerary_id, lambda current: reorder_days(current, order))
+
+    @app.delete("/api/itinerary/{itinerary_id}/days/{day_number}")
+    async def delete_itinerary_day(itinerary_id: str, day_number: int, request: Request):
+        """Remove one day, shortening the trip, guarded by If-Match"""
+        return await update_itinerary(request, itinerary_id, lambda current: drop_day(current, day_number))
+
+    @app.post("/api/itinerary/{itinerary_id}/days/extend")
+    async def extend_itinerary_days(itinerary_id: str, request: Request):
+        """Add the JSON body's count of days (default 1) to the end of an itinerary"""
+        count = (await json_body(request)).get("count", 1)
+        with GENERATIONS_IN_FLIGHT.track_inprogress():
+            return await update_itinerary(request, itinerary_id, lambda current: extend_itinerary_async(
+                current, count, executor=executor
+            ))
+
+    async def json_body(request):
+        """The request's JSON object, or {} when there is none"""
+        try:
+            data = await request.json()
+        except Exception:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    async def update_itinerary(request, itinerary_id, transform):
+        """
+        Replace a stored itinerary with transform(itinerary), guarded by If-Match
+
+        Args:
+            request (Request): Request carrying If-Match
+            itinerary_id (str): Itinerary identifier
+            transform (callable): Stored itinerary -> updated copy, or a
+                coroutine producing it
+
+        Returns:
+            Response: The updated itinerary with its ETag, or an error
+        """
+        try:
+            current = await offload(store.get, itinerary_id)
+        except FileNotFoundError:
+            return JSONResponse({"error": f"Itinerary {itinerary_id} not found"}, status_code=404)
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        expected_version, error = await required_version(request, itinerary_id)
+        if error:
+            return error
+        # Check before spending a generation on a stale copy
+        if expected_version != "*" and expected_version != current["version"]:
+            return version_conflict(current["version"])
+
+        try:
+            itinerary_json = transform(current)
+            if asyncio.iscoroutine(itinerary_json):
+                itinerary_json = await itinerary_json
+        except KeyError as e:
+            return JSONResponse({"error": e.args[0]}, status_code=404)
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        except LLMOverloadedError as e:
+            return overloaded(e)
+        except LLMError as e:
+            logger.warning("Generation failed: %s", e)
+            return JSONResponse({"error": f"Could not generate the day: {e}"}, status_code=502)
+        except Exception as e:
+            logger.exception("Itinerary update failed")
+            return JSONResponse({"error": str(e)}, status_code=500)
+
+        itinerary_json.pop("version", None)
+        try:
+            version = await offload(store.save, itinerary_json,
+                                    expected_version=expected_version, itinerary_id=itinerary_id)
+        except VersionConflictError as e:
+            return version_conflict(e.current_version)
+        itinerary_json["version"] = version
+        return with_etag(itinerary_json, version)
+
+    @app.post("/api/save")
+    async def save_itinerary(request: Request):
+        """Save modified itinerary data, guarded by If-Match"""
+        try:
+            data = await request.json()
+            return await conditional_save(request, data, "Itinerary saved successfully")
+        except Exception as e:
+            logger.exception("Save failed")
+            return JSONResponse({"error": str(e)}, status_code=500)
+
+    @app.get("/api/itinerary/history")
+    async def list_itinerary_history():
+        """List the saved versions of the current itinerary"""
+        return {"versions": await offload(history.list_versions, DEFAULT_ITINERARY_ID)}
+
+    @app.get("/api/itinerary/history/{version}")
+    async def get_itinerary_version(version: int):
+        """Serve a past version of the current itinerary"""
+        try:
+            data = await offload(history.get_version, DEFAULT_ITINERARY_ID, version)
+        except KeyError as e:
+            return JSONResponse({"error": str(e)}, status_code=404)
+        return with_etag(data, version)
+
+    @app.post("/api/itinerary/history/{version}/restore")
+    async def restore_itinerary_version(version: int, request: Request):
+        """Make a past version the current itinerary, guarded by If-Match"""
+        try:
+            data = await offload(history.get_version, DEFAULT_ITINERARY_ID, version)
+        except KeyError as e:
+            return JSONResponse({"error": str(e)}, status_code=404)
+        data.pop("version", None)
+        return await conditional_save(request, data, f"Itinerary restored from version {version}")
+
+    def overloaded(error):
+        return JSONResponse({"error": "Itinerary generation is busy, please retry shortly"},
+                            status_code=503, headers={"Retry-After": str(retry_after_seconds(error))})
+
+    async def required_version(request, itinerary_id=DEFAULT_ITINERARY_ID):
+        """
+        Version named by the request's If-Match header
+
+        Returns:
+            tuple: (expected version, None), or (None, error response)
+        """
+        if_match = request.headers.get("If-Match")
+        if not if_match:
+            return None, JSONResponse({
+                "error": "If-Match header with the itinerary version is required",
+                "currentVersion": await offload(store.get_version, itinerary_id)
+            }, status_code=428)
+        try:
+            return parse_if_match(if_match), None
+        except ValueError:
+            return None, JSONResponse({"error": f"Invalid If-Match header: {if_match}"}, status_code=400)
+
+    def version_conflict(current_version):
+        return with_etag({
+            "error": "Itinerary was modified by another save",
+            "currentVersion": current_version
+        }, current_version, status_code=409)
+
+    async def conditional_save(request, data, message):
+        """Save data over the version named by the request's If-Match header"""
+        expected_version, error = await required_version(request)
+        if error:
+            return error
+
+        try:
+            version = await offload(store.save, data, expected_version=expected_version)
+        except VersionConflictError as e:
+            return version_conflict(e.current_version)
+
+        return with_etag({"success": True, "message": message, "version": version}, version)
+
+    return app
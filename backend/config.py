@@ -0,0 +1,165 @@
+"""
+WanderTrip configuration
+Settings loaded from the environment (and .env) once, on first use
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+DEFAULT_OPENTRIPMAP_BASE_URL = "https://api.opentripmap.com/0.1/en/places"
+DEFAULT_LLM_MODEL = "gemini-2.5-flash"
+# Tried before LLM_MODEL on Gemini unless LLM_MODEL_TIERS says otherwise
+DEFAULT_FAST_MODEL = "gemini-2.5-flash-lite"
+DEFAULT_PROMPT_TOKEN_BUDGET = 1500
+# Smallest context cache Gemini 2.5 Flash accepts
+DEFAULT_PREFIX_CACHE_MIN_TOKENS = 1024
+DEFAULT_TEMPLATE_LENGTHS = (2, 3, 4, 5, 7)
+DEFAULT_TEMPLATE_MAX_AGE = 7 * 24 * 3600
+
+
+def _optional(name, convert):
+    value = os.getenv(name)
+    return convert(value) if value not in (None, "") else None
+
+
+def _csv(name, convert, default):
+    """Comma-separated env var as a tuple, or default when unset"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return tuple(convert(item.strip()) for item in value.split(",") if item.strip())
+
+
+def _llm_model(provider):
+    """LLM_MODEL; the Gemini default only applies to Gemini, other providers are named for themselves"""
+    return os.getenv("LLM_MODEL") or (DEFAULT_LLM_MODEL if provider == "gemini" else provider)
+
+
+def _model_tiers(provider, model):
+    """
+    LLM_MODEL_TIERS as a tuple, cheapest first
+
+    Defaults to the fast model, then LLM_MODEL, on Gemini; other providers
+    have no model to choose, so they get LLM_MODEL as their only tier.
+    """
+    value = os.getenv("LLM_MODEL_TIERS")
+    if value is None:
+        if provider != "gemini":
+            return (model,)
+        return tuple(dict.fromkeys((DEFAULT_FAST_MODEL, model)))
+    return tuple(name.strip() for name in value.split(",") if name.strip()) or (model,)
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Process-wide configuration"""
+    gemini_api_key: Optional[str]
+    opentripmap_api_key: Optional[str]
+    # Overridable so load tests and local runs can point at stand-in servers
+    opentripmap_base_url: str = DEFAULT_OPENTRIPMAP_BASE_URL
+    gemini_api_endpoint: Optional[str] = None
+    # LLM backend ('gemini' or 'local'), model and generation parameters
+    llm_provider: str = "gemini"
+    llm_model: str = DEFAULT_LLM_MODEL
+    llm_temperature: Optional[float] = None
+    llm_max_output_tokens: Optional[int] = None
+    # Models tried in turn until an itinerary passes the quality checks
+    llm_model_tiers: Tuple[str, ...] = ()
+    # Ask the model for JSON matching the itinerary schema (response_schema)
+    llm_structured_output: bool = True
+    # 'compact' has the model emit short positional JSON that the server expands; 'full' the frontend format
+    llm_output_format: str = "compact"
+    # Estimated input tokens a prompt may use before it is compacted; 0 disables the limit
+    llm_prompt_token_budget: int = DEFAULT_PROMPT_TOKEN_BUDGET
+    # Cache the static prompt prefix with the provider (context caching) for this many seconds
+    llm_prefix_cache: bool = True
+    llm_prefix_cache_ttl: float = 3600.0
+    llm_prefix_cache_min_tokens: int = DEFAULT_PREFIX_CACHE_MIN_TOKENS
+    # Overload protection around the provider: adaptive concurrency limit and circuit breaker
+    llm_limiter: bool = True
+    llm_concurrency_initial: int = 8
+    llm_concurrency_max: int = 64
+    llm_queue_size: int = 64
+    llm_queue_timeout: float = 10.0
+    llm_breaker_failures: int = 5
+    llm_breaker_reset: float = 30.0
+    # Hedged calls: a second request once a call outlasts the latency quantile
+    llm_hedge: bool = False
+    llm_hedge_quantile: float = 0.9
+    llm_hedge_budget: float = 0.1
+    llm_hedge_model: Optional[str] = None
+    # Provider to answer from when the main one fails (e.g. 'local'); None returns an error itinerary
+    llm_fallback_provider: Optional[str] = None
+    # Precomputed itineraries for popular cities, served instead of a generation when one matches
+    itinerary_templates: bool = True
+    template_dir: Optional[str] = None
+    template_cities: Tuple[str, ...] = ()
+    template_lengths: Tuple[int, ...] = DEFAULT_TEMPLATE_LENGTHS
+    # Older templates are not served; the refresher (every interval seconds, 0 = off) rebuilds them first
+    template_max_age: float = DEFAULT_TEMPLATE_MAX_AGE
+    template_refresh_interval: float = 0.0
+
+
+_settings = None
+_settings_lock = threading.Lock()
+
+
+def get_settings() -> Settings:
+    """
+    Get the process configuration, reading .env on the first call only
+
+    Returns:
+        Settings: Configuration shared by all modules
+    """
+    global _settings
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                from dotenv import load_dotenv
+                load_dotenv()
+                provider = os.getenv("LLM_PROVIDER", "gemini")
+                model = _llm_model(provider)
+                _settings = Settings(
+                    gemini_api_key=os.getenv("GEMINI_API_KEY"),
+                    opentripmap_api_key=os.getenv("OPENTRIPMAP_API_KEY"),
+                    opentripmap_base_url=os.getenv(
+                        "OPENTRIPMAP_BASE_URL", DEFAULT_OPENTRIPMAP_BASE_URL
+                    ).rstrip("/"),
+                    gemini_api_endpoint=os.getenv("GEMINI_API_ENDPOINT") or None,
+                    llm_provider=provider,
+                    llm_model=model,
+                    llm_model_tiers=_model_tiers(provider, model),
+                    llm_temperature=_optional("LLM_TEMPERATURE", float),
+                    llm_max_output_tokens=_optional("LLM_MAX_OUTPUT_TOKENS", int),
+                    llm_structured_output=os.getenv("LLM_STRUCTURED_OUTPUT", "1").lower() not in ("0", "false", "no"),
+                    llm_output_format=os.getenv("LLM_OUTPUT_FORMAT", "compact").lower(),
+                    llm_prompt_token_budget=int(
+                        os.getenv("LLM_PROMPT_TOKEN_BUDGET", DEFAULT_PROMPT_TOKEN_BUDGET)
+                    ),
+                    llm_prefix_cache=os.getenv("LLM_PREFIX_CACHE", "1").lower() not in ("0", "false", "no"),
+                    llm_prefix_cache_ttl=float(os.getenv("LLM_PREFIX_CACHE_TTL", "3600")),
+                    llm_prefix_cache_min_tokens=int(
+                        os.getenv("LLM_PREFIX_CACHE_MIN_TOKENS", DEFAULT_PREFIX_CACHE_MIN_TOKENS)
+                    ),
+                    llm_limiter=os.getenv("LLM_LIMITER", "1").lower() not in ("0", "false", "no"),
+                    llm_concurrency_initial=int(os.getenv("LLM_CONCURRENCY_INITIAL", "8")),
+                    llm_concurrency_max=int(os.getenv("LLM_CONCURRENCY_MAX", "64")),
+                    llm_queue_size=int(os.getenv("LLM_QUEUE_SIZE", "64")),
+                    llm_queue_timeout=float(os.getenv("LLM_QUEUE_TIMEOUT", "10")),
+                    llm_breaker_failures=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+                    llm_breaker_reset=float(os.getenv("LLM_BREAKER_RESET", "30")),
+                    llm_hedge=os.getenv("LLM_HEDGE", "0").lower() not in ("0", "false", "no"),
+                    llm_hedge_quantile=float(os.getenv("LLM_HEDGE_QUANTILE", "0.9")),
+                    llm_hedge_budget=float(os.getenv("LLM_HEDGE_BUDGET", "0.1")),
+                    llm_hedge_model=os.getenv("LLM_HEDGE_MODEL") or None,
+                    llm_fallback_provider=os.getenv("LLM_FALLBACK_PROVIDER") or None,
+                    itinerary_templates=os.getenv("ITINERARY_TEMPLATES", "1").lower() not in ("0", "false", "no"),
+                    template_dir=os.getenv("TEMPLATE_DIR") or None,
+                    template_cities=_csv("TEMPLATE_CITIES", str.lower, ()),
+                    template_lengths=_csv("TEMPLATE_LENGTHS", int, DEFAULT_TEMPLATE_LENGTHS),
+                    template_max_age=float(os.getenv("TEMPLATE_MAX_AGE", DEFAULT_TEMPLATE_MAX_AGE)),
+                    template_refresh_interval=float(os.getenv("TEMPLATE_REFRESH_INTERVAL", "0"))
+                )
+    return _settings
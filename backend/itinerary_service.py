@@ -3,41 +3,190 @@ WanderTrip Itinerary Service
 Core business logic for AI-powered travel itinerary generation
 """
 
-import os
-import google.generativeai as genai
-from dotenv import load_dotenv
 import json
+import re
+import time
+from dataclasses import replace
 from datetime import datetime, timedelta
-import sys
+from functools import lru_cache
 
-# Add the backend directory to the Python path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from .config import get_settings
+from .llm import (
+    GenerationRequest, TripSpec, JSONRepairError, LLMError, LLMOverloadedError, estimate_tokens, get_provider,
+    get_fallback_provider, get_hedger, parse_json_lenient
+)
+from .llm.compact import COMPACT_FORMAT, compact_response_schema, expand_itinerary, is_compact
+from .models import itinerary_response_schema, validate_itinerary_dict
+from .models.itinerary_models import PERIOD_NAMES
+from .observability import (
+    FALLBACKS, GENERATION_SECONDS, LLM_ESCALATIONS, LLM_OUTPUT_PARSES, LLM_TIER_RESULTS, LLM_TOKENS,
+    PROMPT_TOKENS, PROMPT_TRIMS, time_stage, timed_stage
+)
+from .observability.log import bind_request_context, get_logger, log_payload
+from .utils.geocoding import geocode_city
+from .utils.poi_service import get_pois
 
-from utils.geocoding import geocode_city
-from utils.poi_service import get_pois
+logger = get_logger(__name__)
 
-# Load environment variables
-load_dotenv()
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
-print("🔧 [ITINERARY_SERVICE] Module loaded")
-print(f"🔧 [ITINERARY_SERVICE] GEMINI_API_KEY loaded: {'Yes' if GEMINI_API_KEY else 'No'}")
+# Example output shown to the model in the 'full' format; the prefix it sits
+# in is shared by every trip, so trip values are placeholders
+_FULL_EXAMPLE = {
+    "destination": "<destination>",
+    "startDate": "<startDate>",
+    "days": [{
+        "dayNumber": 1,
+        "date": "<date>",
+        "periods": {
+            "morning": [{"time": "10:00", "activity": "Visit Museum",
+                         "description": "Explore local history and culture", "id": "day1_morning_1"}],
+            "afternoon": [{"time": "14:00", "activity": "Lunch and get ready for the next destination",
+                           "description": "Enjoy local cuisine", "id": "day1_afternoon_0"}],
+            "evening": [{"time": "19:00", "activity": "Stroll along the famous avenue",
+                         "description": "Enjoy the evening atmosphere", "id": "day1_evening_0"}]
+        }
+    }],
+    "additionalActivities": [{
+        "id": "extra_activity_0",
+        "activity": "Shopping at Local Market",
+        "description": "Browse local crafts and souvenirs",
+        "duration": "1-2 hours",
+        "type": "additional"
+    }]
+}
+_COMPACT_EXAMPLE = (
+    '{"d":[[[["10:00","Visit Museum","Explore local history and culture"]],'
+    '[["14:00","Lunch at a bistro","Enjoy local cuisine"]],'
+    '[["19:00","Stroll along the famous avenue","Enjoy the evening atmosphere"]]]],'
+    '"x":[["Shopping at Local Market","Browse local crafts and souvenirs","1-2 hours"]]}'
+)
+# Reserved for the "(plus N more nearby)" note when POIs are trimmed
+_POI_SUMMARY_TOKENS = 8
+# Suggested POIs an itinerary must mention to pass check_itinerary()
+MIN_POIS_USED = 3
+# Days one extension may add; each is a generation of its own
+MAX_EXTEND_DAYS = 7
+# Activity IDs the server assigns, which follow their day's number
+_ACTIVITY_ID = re.compile(r"day\d+_(?:morning|afternoon|evening)_(\d+)$")
 
-if not GEMINI_API_KEY:
-    print("❌ [ITINERARY_SERVICE] CRITICAL: GEMINI_API_KEY environment variable is not set!")
-    print("❌ [ITINERARY_SERVICE] Please check your .env file")
 
-# Configure Gemini API
-try:
-    genai.configure(api_key=GEMINI_API_KEY)
-    print("🔧 [ITINERARY_SERVICE] Gemini API configured successfully")
-except Exception as e:
-    print(f"❌ [ITINERARY_SERVICE] Failed to configure Gemini API: {e}")
+@lru_cache(maxsize=None)
+def _prompt_prefix(compact, indent_example):
+    """
+    Instructions and output example shared by every trip
+    
+    Nothing trip-specific goes here, so providers can cache the prefix
+    once and send only the suffix on later calls.
+    
+    Returns:
+        tuple: (prefix text, estimated tokens)
+    """
+    if compact:
+        prefix = f"""
+    IMPORTANT: Return only compact JSON of this shape:
+    {_COMPACT_EXAMPLE}
+    "d" has one entry per day of the trip. Each day is [morning, afternoon, evening]; each of those is a list of [time, activity, description].
+    "x" lists 10-15 additional activities users can drag into their schedule, each [activity, description, duration].
+    
+    Generate realistic activities with specific times and engaging descriptions. Do not have a breakfast and get ready activity.
+    """
+    else:
+        if indent_example:
+            example = json.dumps(_FULL_EXAMPLE, indent=4).replace("\n", "\n    ")
+        else:
+            example = json.dumps(_FULL_EXAMPLE, separators=(",", ":"))
+        prefix = f"""
+    IMPORTANT: Return your response as a valid JSON object with the following structure:
+    
+    {example}
+    
+    Generate realistic activities with specific times, engaging descriptions, and include 10-15 additional activities that users can drag and drop into their schedule. Make sure the JSON is valid and properly formatted. Do not have a breakfast and get ready activity.
+    """
+    return prefix, estimate_tokens(prefix)
 
 
-def build_prompt(destination, startDate, endDate, guestCount, pois):
+def _prompt_suffix(trip, poi_list, compact):
+    """Trip details; trip holds days, destination, month, guests and start date"""
+    days, destination, month, guestCount, formatted_start_date = trip
+    
+    # Set reasonable defaults for pace and transportation
+    pace = 'moderate'  # Default since not collected from form
+    has_car = True     # Default assumption
+    
+    suffix = f"""
+    Create a {days}-day travel itinerary for {destination} in {month}.
+    Traveler count: {guestCount} {'person' if guestCount == 1 else 'people'}.
+    Traveler pace: {pace}.
+    Transportation: {"car" if has_car else "no car, public transit/walking"}.
+    Suggested POIs include: {poi_list}.
     """
-    Build a comprehensive prompt for AI itinerary generation
+    if not compact:
+        suffix += f"""Use "{destination}" as destination and "{formatted_start_date}" as startDate; day 1 is {formatted_start_date} and each day's date follows the previous one.
+    """
+    return suffix
+
+
+def _names_within(names, room):
+    """
+    Longest prefix of POI names whose estimated tokens fit in room
+    
+    Stops at the first name that does not fit, so a long list is only
+    tokenized as far as the budget reaches.
+    
+    Returns:
+        tuple: (names kept, their estimated tokens including separators)
+    """
+    used = 0
+    for index, name in enumerate(names):
+        # Each name also costs the ", " separator
+        cost = estimate_tokens(name) + 2
+        if room is not None and used + cost > room:
+            return names[:index], used
+        used += cost
+    return names, used
+
+
+def _fit_prompt(trip, names, compact, budget):
+    """
+    Shrink a prompt to the token budget
+    
+    First the 'full' example is minified, then POI names are dropped from
+    the end of the list (get_pois returns the most relevant first) and
+    replaced by a count.
+    
+    Returns:
+        tuple: (prefix, suffix, estimated tokens)
+    """
+    prefix, prefix_tokens = _prompt_prefix(compact, False)
+    base = prefix_tokens + estimate_tokens(_prompt_suffix(trip, "", compact))
+    if not compact:
+        PROMPT_TRIMS.labels("schema").inc()
+        kept, names_tokens = _names_within(names, budget - base)
+        if len(kept) == len(names):
+            return prefix, _prompt_suffix(trip, ", ".join(names), compact), base + names_tokens
+    
+    PROMPT_TRIMS.labels("pois").inc()
+    kept, names_tokens = _names_within(names, budget - base - _POI_SUMMARY_TOKENS)
+    poi_list = ", ".join(kept)
+    if len(kept) < len(names):
+        poi_list += f" (plus {len(names) - len(kept)} more nearby)"
+    suffix = _prompt_suffix(trip, poi_list, compact)
+    tokens = prefix_tokens + estimate_tokens(suffix)
+    if tokens > budget:
+        PROMPT_TRIMS.labels("over_budget").inc()
+        logger.warning("Prompt is %d tokens even without POIs (budget %d)", tokens, budget)
+    return prefix, suffix, tokens
+
+
+@timed_stage("prompt_build")
+def build_prompt_parts(destination, startDate, endDate, guestCount, pois, output_format=None):
+    """
+    Build the itinerary prompt as a shared prefix and a per-trip suffix
+    
+    The prefix (instructions and output example) is identical for every
+    trip with the same output format, so providers can cache it. Prompts
+    estimated above LLM_PROMPT_TOKEN_BUDGET input tokens are compacted:
+    the example JSON is minified and POIs are trimmed.
     
     Args:
         destination (str): Travel destination city
@@ -45,12 +194,13 @@ def build_prompt(destination, startDate, endDate, guestCount, pois):
         endDate (str): Trip end date in YYYY-MM-DD format  
         guestCount (int): Number of guests/travelers
         pois (list): List of points of interest from OpenTripMap
+        output_format (str): 'compact' or 'full' (default: LLM_OUTPUT_FORMAT)
     
     Returns:
-        str: Formatted prompt for AI model
+        tuple: (prefix, suffix) strings
     """
+    settings = get_settings()
     # Calculate number of days from dates
-    from datetime import datetime
     try:
         start_dt = datetime.strptime(startDate, '%Y-%m-%d')
         end_dt = datetime.strptime(endDate, '%Y-%m-%d')
@@ -63,156 +213,457 @@ def build_prompt(destination, startDate, endDate, guestCount, pois):
         month = 'November'
         formatted_start_date = 'Feb 7, 2025'
     
-    print(f"🎯 [BUILD_PROMPT] Called with: {destination}, {startDate} to {endDate} ({days} days), {guestCount} guests, month: {month}")
-    print(f"🎯 [BUILD_PROMPT] POIs count: {len(pois) if pois else 0}")
+    trip = (days, destination, month, guestCount, formatted_start_date)
+    names = [poi["name"] for poi in pois if poi["name"]]
+    compact = (output_format or settings.llm_output_format) == COMPACT_FORMAT
     
-    poi_list = ", ".join([poi["name"] for poi in pois if poi["name"]])
-    print(f"🎯 [BUILD_PROMPT] POI list: {poi_list[:100]}...")
+    budget = settings.llm_prompt_token_budget
+    # Size the prompt from its fixed parts plus the POI names, without
+    # tokenizing names past the budget
+    prefix, prefix_tokens = _prompt_prefix(compact, True)
+    base = prefix_tokens + estimate_tokens(_prompt_suffix(trip, "", compact))
+    kept, names_tokens = _names_within(names, budget - base if budget else None)
+    if len(kept) < len(names) or (budget and base > budget):
+        prefix, suffix, tokens = _fit_prompt(trip, names, compact, budget)
+        prefix_tokens = _prompt_prefix(compact, False)[1]
+    else:
+        suffix = _prompt_suffix(trip, ", ".join(names), compact)
+        tokens = base + names_tokens
     
-    # Set reasonable defaults for pace and transportation
-    pace = 'moderate'  # Default since not collected from form
-    has_car = True     # Default assumption
+    PROMPT_TOKENS.observe(tokens)
+    # The prefix is the part a prompt cache can bill at the reduced rate
+    bind_request_context(prompt_tokens=tokens, prompt_prefix_tokens=prefix_tokens)
+    logger.debug("Prompt built: %d days, %d guests, %d POIs, %d chars, ~%d tokens",
+                 days, guestCount, len(pois) if pois else 0, len(prefix) + len(suffix), tokens)
+    return prefix, suffix
+
+
+def build_prompt(destination, startDate, endDate, guestCount, pois, output_format=None):
+    """
+    Build a comprehensive prompt for AI itinerary generation
     
-    prompt = f"""
-    Create a {days}-day travel itinerary for {destination} in {month}.
-    Traveler count: {guestCount} {'person' if guestCount == 1 else 'people'}.
-    Traveler pace: {pace}.
-    Transportation: {"car" if has_car else "no car, public transit/walking"}.
-    Suggested POIs include: {poi_list}.
+    Args:
+        destination (str): Travel destination city
+        startDate (str): Trip start date in YYYY-MM-DD format
+        endDate (str): Trip end date in YYYY-MM-DD format  
+        guestCount (int): Number of guests/travelers
+        pois (list): List of points of interest from OpenTripMap
+        output_format (str): 'compact' or 'full' (default: LLM_OUTPUT_FORMAT)
     
-    IMPORTANT: Return your response as a valid JSON object with the following structure:
+    Returns:
+        str: Formatted prompt for AI model (prefix followed by suffix)
+    """
+    return "".join(build_prompt_parts(destination, startDate, endDate, guestCount, pois, output_format))
+
+
+def _error_itinerary(message):
+    """Fallback structure returned when generation fails"""
+    return {
+        "destination": "Unknown",
+        "startDate": datetime.now().strftime("%b %d, %Y"),
+        "days": [],
+        "additionalActivities": [],
+        "error": message
+    }
+
+
+def _parse_itinerary_response(response_text, trip=None):
+    """
+    Extract the itinerary JSON from the model's response text
     
-    {{
-        "destination": "{destination}",
-        "startDate": "{formatted_start_date}",
-        "days": [
-            {{
-                "dayNumber": 1,
-                "date": "{formatted_start_date}",
-                "periods": {{
-                    "morning": [
-                        {{
-                            "time": "10:00",
-                            "activity": "Visit Museum",
-                            "description": "Explore local history and culture",
-                            "id": "day1_morning_1"
-                        }}
-                    ],
-                    "afternoon": [
-                        {{
-                            "time": "14:00",
-                            "activity": "Lunch and get ready for the next destination",
-                            "description": "Enjoy local cuisine",
-                            "id": "day1_afternoon_0"
-                        }}
-                    ],
-                    "evening": [
-                        {{
-                            "time": "19:00",
-                            "activity": "Stroll along the famous avenue",
-                            "description": "Enjoy the evening atmosphere",
-                            "id": "day1_evening_0"
-                        }}
-                    ]
-                }}
-            }}
-        ],
-        "additionalActivities": [
-            {{
-                "id": "extra_activity_0",
-                "activity": "Shopping at Local Market",
-                "description": "Browse local crafts and souvenirs",
-                "duration": "1-2 hours",
-                "type": "additional"
-            }}
-        ]
-    }}
+    Fenced, prose-wrapped, trailing-comma and truncated output is repaired
+    rather than discarded; only text with no recoverable JSON object falls
+    back to the error itinerary. Compact output is expanded to the
+    frontend format.
     
-    Generate realistic activities with specific times, engaging descriptions, and include 10-15 additional activities that users can drag and drop into their schedule. Make sure the JSON is valid and properly formatted. Do not have a breakfast and get ready activity.
+    Args:
+        response_text (str): Raw text returned by the model
+        trip (TripSpec): Trip the prompt was built from, which supplies the
+            destination and dates compact output leaves out
+    
+    Returns:
+        dict: Structured itinerary data or error fallback
     """
+    try:
+        result, repaired = parse_json_lenient(response_text)
+        if not isinstance(result, dict):
+            raise JSONRepairError(f"expected an object, got {type(result).__name__}")
+    except JSONRepairError as e:
+        logger.error("JSON parsing error in AI response (%d chars): %s", len(response_text), e)
+        # Failures are rare, so log each one, truncated, at DEBUG
+        log_payload(logger, "Unparseable AI response", response_text, sample_rate=1.0)
+        LLM_OUTPUT_PARSES.labels("failed").inc()
+        # Return a fallback structure if JSON parsing fails
+        FALLBACKS.labels("json_parse").inc()
+        return _error_itinerary("Failed to parse JSON response from AI")
+    
+    if is_compact(result):
+        # Partial rows are dropped during expansion
+        result = _expand_compact(result, trip)
+    elif repaired:
+        _drop_partial_entries(result)
+        logger.warning("Repaired malformed AI response (%d chars)", len(response_text))
+    LLM_OUTPUT_PARSES.labels("repaired" if repaired else "clean").inc()
     
-    print(f"🎯 [BUILD_PROMPT] Prompt created (length: {len(prompt)} chars)")
-    return prompt
+    problems = validate_itinerary_dict(result)
+    if problems:
+        logger.warning("AI itinerary has %d schema problems, first: %s", len(problems), problems[0])
+    logger.info("Itinerary parsed: %d days, %d response chars",
+                len(result.get('days') or []), len(response_text))
+    return result
 
 
-def generate_itinerary(prompt) -> dict:
+def _drop_partial_entries(result):
+    """Remove the half-written day and activities a truncated response ends with"""
+    def complete(activity):
+        return isinstance(activity, dict) and isinstance(activity.get("activity"), str)
+    
+    days = [day for day in result.get("days") or []
+            if isinstance(day, dict) and isinstance(day.get("periods"), dict)]
+    for day in days:
+        for period, activities in day["periods"].items():
+            day["periods"][period] = [a for a in activities or [] if complete(a)]
+    result["days"] = days
+    result["additionalActivities"] = [a for a in result.get("additionalActivities") or [] if complete(a)]
+
+
+def _expand_compact(result, trip):
+    """Frontend itinerary from compact output, with the trip's destination and start date"""
+    destination = trip.destination if trip else "Unknown"
+    try:
+        start = datetime.strptime(trip.start_date, '%Y-%m-%d')
+    except (AttributeError, TypeError, ValueError):
+        start = datetime.now()
+    return expand_itinerary(result, destination, start)
+
+
+def _generation_request(prompt, trip, prefix=None):
+    """Request for one itinerary, schema-constrained unless LLM_STRUCTURED_OUTPUT is off"""
+    settings = get_settings()
+    schema = None
+    if settings.llm_structured_output:
+        compact = settings.llm_output_format == COMPACT_FORMAT
+        schema = compact_response_schema() if compact else itinerary_response_schema()
+    return GenerationRequest(prompt=prompt, trip=trip, prefix=prefix, response_schema=schema,
+                             output_format=settings.llm_output_format)
+
+
+def _expected_days(trip):
+    """Days build_prompt asked for, or None when the trip's dates do not parse"""
+    try:
+        start = datetime.strptime(trip.start_date, '%Y-%m-%d')
+        end = datetime.strptime(trip.end_date, '%Y-%m-%d')
+    except (AttributeError, TypeError, ValueError):
+        return None
+    return max(1, (end - start).days)
+
+
+def check_itinerary(itinerary, trip=None):
     """
-    Generate travel itinerary using Google's Gemini AI
+    Quality problems of a parsed itinerary, which make generation escalate
+    
+    Beyond the frontend schema, the itinerary must have the trip's number
+    of days, an activity in every period, and mention at least
+    MIN_POIS_USED of the suggested POIs (all of them, when fewer were found).
     
     Args:
-        prompt (str): Formatted prompt for AI model
+        itinerary (dict): Parsed itinerary
+        trip (TripSpec): Trip the prompt was built from; without it only
+            the schema and periods are checked
     
     Returns:
-        dict: Structured itinerary data or error fallback
+        list: (check, message) pairs, empty if the itinerary is acceptable
     """
-    print(f"🤖 [GENERATE_ITINERARY] Starting AI generation...")
-    print(f"🤖 [GENERATE_ITINERARY] Prompt length: {len(prompt)} chars")
+    if itinerary.get("error"):
+        return [("parse", itinerary["error"])]
+    problems = [("schema", message) for message in validate_itinerary_dict(itinerary)]
+    if problems:
+        # The other checks rely on the structure
+        return problems
     
-    try:
-        print(f"🤖 [GENERATE_ITINERARY] Creating Gemini model...")
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        
-        print(f"🤖 [GENERATE_ITINERARY] Sending request to AI...")
-        response = model.generate_content(f"You are a travel itinerary planner. {prompt}")
-        
-        print(f"🤖 [GENERATE_ITINERARY] AI response received")
-        print(f"🤖 [GENERATE_ITINERARY] Raw response length: {len(response.text)} chars")
-        print(f"🤖 [GENERATE_ITINERARY] Response preview: {response.text[:200]}...")
+    days = itinerary["days"]
+    expected = _expected_days(trip)
+    if expected is not None and len(days) != expected:
+        problems.append(("days", f"{len(days)} days instead of {expected}"))
+    for day in days:
+        empty = [period for period in PERIOD_NAMES if not day["periods"].get(period)]
+        if empty:
+            problems.append(("empty_period", f"day {day['dayNumber']} has no {empty[0]} activities"))
+            break
+    
+    names = {poi["name"].lower() for poi in (trip.pois if trip else []) if poi.get("name")}
+    if names:
+        text = " ".join(
+            f"{activity['activity']} {activity.get('description', '')}"
+            for day in days for activities in day["periods"].values() for activity in activities
+        ).lower()
+        used = sum(1 for name in names if name in text)
+        required = min(len(names), MIN_POIS_USED)
+        if used < required:
+            problems.append(("pois", f"{used} of {len(names)} suggested POIs used, expected {required}"))
+    return problems
+
+
+class _TieredGeneration:
+    """
+    One itinerary generation over the LLM_MODEL_TIERS models
+    
+    Each tier gets the same prompt; an answer failing the check, or a
+    failed call, moves on to the next (stronger) tier. The last tier's
+    answer is returned even with problems, and when a later tier cannot be
+    reached an earlier answer is returned instead of an error. The tier
+    that answered, the escalations and the elapsed time are recorded.
+    
+    Args:
+        provider (LLMProvider): Provider serving every tier
+        request (GenerationRequest): Request sent to each tier's model
+        trip (TripSpec): Trip the prompt was built from
+        check (callable): (itinerary, trip) -> problems, as check_itinerary()
+    """
+    
+    def __init__(self, provider, request, trip, check=check_itinerary):
+        self.provider = provider
+        self.trip = trip
+        self.check = check
+        self.tiers = get_settings().llm_model_tiers or (provider.config.model,)
+        self.model = self.tiers[0]
+        self.escalations = 0
+        # Itinerary to return: the accepted one, else the latest parsed,
+        # and the tier it came from
+        self.result = None
+        self.result_model = None
+        self.hedger = get_hedger()
+        self._request = request
+        # Last response checked, with its itinerary and problems
+        self._checked = None
+        self._final = False
+        self._done = False
+        self._started = time.perf_counter()
+    
+    def requests(self):
+        """Request for each tier in turn, until one is accepted or generation gives up"""
+        for index, model in enumerate(self.tiers):
+            if self._done:
+                return
+            self.model = model
+            self._final = index == len(self.tiers) - 1
+            logger.debug("Sending %d char prompt to %s/%s", len(self._request.prompt), self.provider.name, model)
+            yield replace(self._request, config=replace(self.provider.config, model=model))
+    
+    def call(self, request):
+        """One tier's call, hedged when LLM_HEDGE is on"""
+        with time_stage("llm_call"):
+            if self.hedger is None:
+                return self.provider.generate(request)
+            return self.hedger.generate(self.provider, request, self.passes)
+    
+    async def call_async(self, request):
+        with time_stage("llm_call"):
+            if self.hedger is None:
+                return await self.provider.generate_async(request)
+            return await self.hedger.generate_async(self.provider, request, self.passes)
+    
+    def passes(self, response):
+        """Whether a response passes check_itinerary(); remembered for accept()"""
+        with time_stage("json_parse"):
+            itinerary = _parse_itinerary_response(response.text, self.trip)
+        self._checked = (response, itinerary, self.check(itinerary, self.trip))
+        return not self._checked[2]
+    
+    def accept(self, response):
+        """
+        Parse and check one tier's response
         
-        # Clean the response text to extract JSON
-        response_text = response.text.strip()
-        print(f"🤖 [GENERATE_ITINERARY] Cleaning response text...")
+        Returns:
+            bool: True when generation is finished
+        """
+        _record_usage(response)
+        if self._checked is None or self._checked[0] is not response:
+            self.passes(response)
+        _, itinerary, problems = self._checked
+        if self.result is None or not itinerary.get("error"):
+            self.result, self.result_model = itinerary, self.model
+        if not problems:
+            self._finish("accepted")
+        elif self._final:
+            logger.warning("%s itinerary kept with %d quality problems, first: %s",
+                           self.model, len(problems), problems[0][1])
+            self._finish("exhausted")
+        else:
+            self._escalate(*problems[0])
+        return self._done
+    
+    def recover(self, request, error):
+        """
+        Handle a tier's failed call
         
-        # Remove markdown formatting if present
-        if response_text.startswith('```json'):
-            response_text = response_text[7:]
-            print(f"🤖 [GENERATE_ITINERARY] Removed ```json prefix")
-        if response_text.startswith('```'):
-            response_text = response_text[3:]
-            print(f"🤖 [GENERATE_ITINERARY] Removed ``` prefix")
-        if response_text.endswith('```'):
-            response_text = response_text[:-3]
-            print(f"🤖 [GENERATE_ITINERARY] Removed ``` suffix")
+        Errors move on to the next tier. Sheds do not, since every tier
+        goes through the same limiter. Otherwise an earlier tier's answer
+        is kept, or LLM_FALLBACK_PROVIDER answers.
         
-        print(f"🤖 [GENERATE_ITINERARY] Parsing JSON...")
-        result = json.loads(response_text.strip())
-        print(f"🤖 [GENERATE_ITINERARY] ✅ JSON parsed successfully!")
-        print(f"🤖 [GENERATE_ITINERARY] Destination: {result.get('destination', 'Unknown')}")
-        print(f"🤖 [GENERATE_ITINERARY] Days count: {len(result.get('days', []))}")
+        Returns:
+            LLMResponse: Fallback answer to accept, or None
         
-        return result
+        Raises:
+            LLMOverloadedError: If the call was shed and nothing can answer
+        """
+        overloaded = isinstance(error, LLMOverloadedError)
+        if not overloaded and not self._final:
+            self._escalate("error", f"{type(error).__name__}: {error}")
+            return None
+        if self.result is not None:
+            logger.warning("Keeping the %s itinerary after %s from %s",
+                           self.result_model, type(error).__name__, self.model)
+            LLM_TIER_RESULTS.labels(self.model, "error").inc()
+            self._finish("kept")
+            return None
         
-    except json.JSONDecodeError as e:
-        print(f"❌ [GENERATE_ITINERARY] JSON parsing error: {e}")
-        print(f"❌ [GENERATE_ITINERARY] Raw response text:")
-        print(f"❌ [GENERATE_ITINERARY] {response.text}")
-        print(f"❌ [GENERATE_ITINERARY] Cleaned response text:")
-        print(f"❌ [GENERATE_ITINERARY] {response_text}")
-        # Return a fallback structure if JSON parsing fails
-        return {
-            "destination": "Unknown",
-            "startDate": datetime.now().strftime("%b %d, %Y"),
-            "days": [],
-            "additionalActivities": [],
-            "error": "Failed to parse JSON response from AI"
-        }
-    except Exception as e:
-        print(f"❌ [GENERATE_ITINERARY] Error generating itinerary: {e}")
-        print(f"❌ [GENERATE_ITINERARY] Error type: {type(e).__name__}")
-        print(f"❌ [GENERATE_ITINERARY] Error details: {str(e)}")
-        return {
-            "destination": "Unknown",
-            "startDate": datetime.now().strftime("%b %d, %Y"),
-            "days": [],
-            "additionalActivities": [],
-            "error": f"Error generating itinerary: {str(e)}"
-        }
+        if overloaded:
+            # Shed before reaching the provider: answer degraded, or let the API return 503
+            logger.warning("Generation shed: %s", error)
+            FALLBACKS.labels("llm_shed").inc()
+        else:
+            logger.error("Error generating itinerary: %s: %s", type(error).__name__, error)
+            FALLBACKS.labels("llm_error").inc()
+        response = _degraded_response(request, error)
+        if response is None:
+            if overloaded:
+                raise error
+            self.result, self.result_model = _error_itinerary(f"Error generating itinerary: {str(error)}"), self.model
+            self._finish("error")
+            return None
+        # The fallback's answer is final whatever the checks say
+        self._final = True
+        return response
+    
+    def _escalate(self, reason, message):
+        logger.info("Escalating from %s: %s", self.model, message)
+        LLM_TIER_RESULTS.labels(self.model, "escalated").inc()
+        LLM_ESCALATIONS.labels(self.model, reason).inc()
+        self.escalations += 1
+    
+    def _finish(self, result):
+        """Record the outcome; the tier counted is the one whose itinerary is returned"""
+        elapsed = time.perf_counter() - self._started
+        self._done = True
+        LLM_TIER_RESULTS.labels(self.result_model, result).inc()
+        GENERATION_SECONDS.labels(self.result_model).observe(elapsed)
+        bind_request_context(llm_model=self.result_model, llm_escalations=self.escalations)
+        logger.info("Generation %s: %s itinerary after %d escalations in %.2fs",
+                    result, self.result_model, self.escalations, elapsed)
+
+
+def generate_itinerary(prompt, trip=None, prefix=None) -> dict:
+    """
+    Generate travel itinerary with the configured LLM provider
+    
+    Models in LLM_MODEL_TIERS are tried cheapest first, escalating while
+    the itinerary fails check_itinerary(). With LLM_HEDGE on, a tier's
+    call that outlasts its usual latency is raced against a second one.
+    
+    Args:
+        prompt (str): Formatted prompt for AI model, or its suffix when
+            prefix is given
+        trip (TripSpec): Trip the prompt was built from; lets the local
+            provider answer without a model
+        prefix (str): Static prompt start from build_prompt_parts, which
+            providers may serve from their prompt cache
+    
+    Returns:
+        dict: Structured itinerary data or error fallback
+    
+    Raises:
+        LLMOverloadedError: If the call was shed by the concurrency limiter
+            or circuit breaker and no fallback provider is configured
+    """
+    request = _generation_request(prompt, trip, prefix)
+    return _run(_TieredGeneration(get_provider(), request, trip))
+
+
+async def generate_itinerary_async(prompt, trip=None, prefix=None) -> dict:
+    """
+    Generate travel itinerary without blocking the event loop
+    
+    Args:
+        prompt (str): Formatted prompt for AI model, or its suffix when
+            prefix is given
+        trip (TripSpec): Trip the prompt was built from
+        prefix (str): Static prompt start from build_prompt_parts
+    
+    Returns:
+        dict: Structured itinerary data or error fallback
+    
+    Raises:
+        LLMOverloadedError: If the call was shed by the concurrency limiter
+            or circuit breaker and no fallback provider is configured
+    """
+    request = _generation_request(prompt, trip, prefix)
+    return await _run_async(_TieredGeneration(get_provider(), request, trip))
+
+
+def _run(generation):
+    """Drive a _TieredGeneration to its result"""
+    for request in generation.requests():
+        try:
+            response = generation.call(request)
+        except Exception as e:
+            response = generation.recover(request, e)
+        if response is not None and generation.accept(response):
+            break
+    return generation.result
+
+
+async def _run_async(generation):
+    for request in generation.requests():
+        try:
+            response = await generation.call_async(request)
+        except Exception as e:
+            response = generation.recover(request, e)
+        if response is not None and generation.accept(response):
+            break
+    return generation.result
+
+
+def _record_usage(response):
+    """Token usage of one generation from the response's usage metadata"""
+    usage = response.usage or {}
+    input_tokens = usage.get("inputTokens")
+    output_tokens = usage.get("outputTokens")
+    cached_tokens = usage.get("cachedTokens", 0)
+    if input_tokens is not None:
+        LLM_TOKENS.labels(response.provider, "input").observe(input_tokens)
+    if output_tokens is not None:
+        LLM_TOKENS.labels(response.provider, "output").observe(output_tokens)
+    if cached_tokens:
+        LLM_TOKENS.labels(response.provider, "cached").observe(cached_tokens)
+    bind_request_context(input_tokens=input_tokens, output_tokens=output_tokens, cached_tokens=cached_tokens)
+    logger.info("LLM usage: %s/%s, %s input (%s cached) and %s output tokens",
+                response.provider, response.model, input_tokens, cached_tokens, output_tokens)
+
+
+def _degraded_response(request, error):
+    """Answer from LLM_FALLBACK_PROVIDER after the main provider failed, if configured"""
+    fallback = get_fallback_provider()
+    if fallback is None or fallback is get_provider():
+        return None
+    logger.warning("Answering from the %s provider after %s", fallback.name, type(error).__name__)
+    FALLBACKS.labels("llm_degraded").inc()
+    return fallback.generate(request)
+
+
+def _template_for(destination, startDate, endDate, guestCount):
+    """Precomputed itinerary for the trip, if a fresh template matches (see itinerary_templates)"""
+    from .itinerary_templates import find_template  # keeps storage off the import path
+    return find_template(destination, startDate, endDate, guestCount)
 
 
 def create_itinerary(destination, startDate, endDate, guestCount):
     """
     High-level function to create a complete itinerary
     
+    Trips matching a fresh precomputed template are served from it
+    without a generation (see itinerary_templates.find_template).
+    
     Args:
         destination (str): Travel destination
         startDate (str): Trip start date in YYYY-MM-DD format
@@ -222,25 +673,505 @@ def create_itinerary(destination, startDate, endDate, guestCount):
     Returns:
         dict: Complete itinerary data
     """
-    print(f"🏁 [CREATE_ITINERARY] Starting creation for {destination}")
-    print(f"🏁 [CREATE_ITINERARY] Parameters: {startDate} to {endDate}, {guestCount} guests")
+    logger.info("Creating itinerary: %s to %s, %s guests", startDate, endDate, guestCount)
+    template = _template_for(destination, startDate, endDate, guestCount)
+    if template is not None:
+        return template
     
     # Get location data
-    print(f"🏁 [CREATE_ITINERARY] Getting coordinates...")
     lat, lon = geocode_city(destination)
-    print(f"🏁 [CREATE_ITINERARY] Coordinates: {lat}, {lon}")
     
     # Get points of interest
-    print(f"🏁 [CREATE_ITINERARY] Getting POIs...")
     pois = get_pois(lat, lon)
-    print(f"🏁 [CREATE_ITINERARY] Found {len(pois) if pois else 0} POIs")
     
     # Build prompt and generate itinerary
-    print(f"🏁 [CREATE_ITINERARY] Building prompt...")
-    prompt = build_prompt(destination, startDate, endDate, guestCount, pois)
+    prefix, prompt = build_prompt_parts(destination, startDate, endDate, guestCount, pois)
+    trip = TripSpec(destination, startDate, endDate, guestCount, pois or [])
+    itinerary_data = generate_itinerary(prompt, trip, prefix)
     
-    print(f"🏁 [CREATE_ITINERARY] Generating itinerary...")
-    itinerary_data = generate_itinerary(prompt)
+    logger.info("Itinerary creation complete")
+    return itinerary_data
+
+
+async def create_itinerary_async(destination, startDate, endDate, guestCount, executor=None):
+    """
+    Async counterpart of create_itinerary for the ASGI server
+    
+    OpenTripMap lookups use blocking HTTP, so they run on the given thread
+    pool; the Gemini call is awaited natively. Many generations can then be
+    in flight in a single process.
+    
+    Args:
+        destination (str): Travel destination
+        startDate (str): Trip start date in YYYY-MM-DD format
+        endDate (str): Trip end date in YYYY-MM-DD format
+        guestCount (int): Number of guests/travelers
+        executor (Executor): Pool for blocking lookups (default: loop's default)
+    
+    Returns:
+        dict: Complete itinerary data
+    """
+    logger.info("Creating itinerary: %s to %s, %s guests", startDate, endDate, guestCount)
+    template = _template_for(destination, startDate, endDate, guestCount)
+    if template is not None:
+        return template
+    offload = _offloader(executor)
+    lat, lon = await offload(geocode_city, destination)
+    pois = await offload(get_pois, lat, lon)
+    
+    prefix, prompt = build_prompt_parts(destination, startDate, endDate, guestCount, pois)
+    trip = TripSpec(destination, startDate, endDate, guestCount, pois or [])
+    itinerary_data = await generate_itinerary_async(prompt, trip, prefix)
+    
+    logger.info("Itinerary creation complete")
+    return itinerary_data
+
+
+def _offloader(executor):
+    """Runs blocking lookups on executor, carrying the request's context (log fields, trace)"""
+    import asyncio  # only the ASGI server needs it; keep it off the import path
+    import contextvars
+    loop = asyncio.get_running_loop()
+    
+    def offload(func, *args):
+        return loop.run_in_executor(executor, contextvars.copy_context().run, func, *args)
+    return offload
+
+
+def _activity_names(periods, only=PERIOD_NAMES):
+    return [activity["activity"] for period in only for activity in periods.get(period) or []
+            if isinstance(activity, dict) and activity.get("activity")]
+
+
+def _day_date(itinerary, index):
+    """Date of a day from its label, else counted from the trip's start"""
+    for label, offset in ((itinerary["days"][index].get("date"), 0), (itinerary.get("startDate"), index)):
+        try:
+            return datetime.strptime(label, '%b %d, %Y') + timedelta(days=offset)
+        except (TypeError, ValueError):
+            continue
+    return datetime.now() + timedelta(days=index)
+
+
+def _regeneration_target(itinerary, day_number, period):
+    """
+    Index of the day to regenerate and the periods to replace
+    
+    Raises:
+        KeyError: If the itinerary has no such day
+        ValueError: If period is not morning, afternoon or evening
+    """
+    if period is not None and period not in PERIOD_NAMES:
+        raise ValueError(f"Unknown period: {period}")
+    for index, day in enumerate(itinerary.get("days") or []):
+        if day.get("dayNumber") == day_number and isinstance(day.get("periods"), dict):
+            return index, (period,) if period else PERIOD_NAMES
+    raise KeyError(f"Itinerary has no day {day_number}")
+
+
+@timed_stage("prompt_build")
+def build_day_prompt(itinerary, index, periods, pois):
+    """
+    Build the prompt regenerating one day, or some periods of it
+    
+    Only the surrounding context is sent: the neighbouring days, the rest
+    of the day when a single period is replaced, what is planned
+    elsewhere so it is not repeated, and the POIs not used yet.
+    
+    Args:
+        itinerary (dict): Saved itinerary
+        index (int): Index of the day in itinerary['days']
+        periods (tuple): Periods to regenerate
+        pois (list): POIs around the destination
+    
+    Returns:
+        tuple: (prompt, TripSpec of the one day with the unused POIs,
+            names of the POIs planned outside the regenerated periods)
+    """
+    days = itinerary["days"]
+    day = days[index]
+    inputs = itinerary.get("userInputs") or {}
+    destination = _destination(itinerary)
+    guestCount = inputs.get("adults", 2)
+    date = _day_date(itinerary, index)
+    
+    kept = [period for period in PERIOD_NAMES if period not in periods]
+    neighbours = {i for i in (index - 1, index + 1) if 0 <= i < len(days)}
+    context = [f"Day {days[i].get('dayNumber', i + 1)}: {', '.join(_activity_names(days[i]['periods'])) or 'free'}."
+               for i in sorted(neighbours)]
+    if kept:
+        context.append("Rest of this day: " + "; ".join(
+            f"{period}: {', '.join(_activity_names(day['periods'], (period,))) or 'free'}" for period in kept
+        ) + ".")
+    elsewhere = [name for i, other in enumerate(days) if i != index and i not in neighbours
+                 for name in _activity_names(other.get("periods") or {})]
+    planned = (elsewhere + [name for i in neighbours for name in _activity_names(days[i]['periods'])]
+               + _activity_names(day["periods"], kept))
+    
+    planned_text = " ".join(planned).lower()
+    unused = [poi for poi in pois if poi.get("name") and poi["name"].lower() not in planned_text]
+    planned_pois = [poi["name"] for poi in pois if poi.get("name") and poi["name"].lower() in planned_text]
+    target = f"the {periods[0]}" if kept else "the whole day"
+    # An appended day has nothing to replace yet
+    verb = "Replace" if _activity_names(day["periods"]) else "Plan"
+    
+    prompt = f"""
+    {verb} {target} of day {day.get('dayNumber', index + 1)} of a {len(days)}-day trip to {destination}, on {date.strftime('%A, %b %d, %Y')}.
+    Traveler count: {guestCount} {'person' if guestCount == 1 else 'people'}.
+    {' '.join(context)}
+    Also planned on other days: {', '.join(elsewhere) or 'nothing yet'}.
+    Do not repeat anything already planned. Suggested POIs not used yet: {', '.join(poi['name'] for poi in unused) or 'none'}.
+    
+    Return only compact JSON: {{"d":[[morning,afternoon,evening]]}} with one day, where each period is a list of [time, activity, description].
+    """
+    if kept:
+        prompt += f"""Fill only {target}; leave the other periods as empty lists.
+    """
+    trip = TripSpec(destination, date.strftime('%Y-%m-%d'), (date + timedelta(days=1)).strftime('%Y-%m-%d'),
+                    guestCount, unused)
+    tokens = estimate_tokens(prompt)
+    PROMPT_TOKENS.observe(tokens)
+    bind_request_context(prompt_tokens=tokens, prompt_prefix_tokens=0)
+    logger.debug("Day prompt built: day %d, %s, %d chars, ~%d tokens, %d unused POIs",
+                 index + 1, "+".join(periods), len(prompt), tokens, len(unused))
+    return prompt, trip, planned_pois
+
+
+def _check_regenerated(periods, planned_pois):
+    """
+    Check for a regenerated day: the replaced periods are filled and revisit no planned POI
+    
+    Only POI names count as repeats; meals and other generic entries
+    ("Lunch at a local restaurant") may recur on any day.
+    """
+    planned_pois = [name.lower() for name in planned_pois]
+    
+    def check(itinerary, trip):
+        if itinerary.get("error"):
+            return [("parse", itinerary["error"])]
+        problems = [("schema", message) for message in validate_itinerary_dict(itinerary)]
+        if problems:
+            return problems
+        if not itinerary["days"]:
+            return [("days", "no day returned")]
+        day = itinerary["days"][0]
+        empty = [period for period in periods if not day["periods"].get(period)]
+        if empty:
+            problems.append(("empty_period", f"no {empty[0]} activities"))
+        names = " ".join(_activity_names(day["periods"], periods)).lower()
+        repeats = [name for name in planned_pois if name in names]
+        if repeats:
+            problems.append(("repeats", f"{repeats[0]} is already planned"))
+        return problems
+    return check
+
+
+def _day_generation(itinerary, index, periods, pois):
+    prompt, trip, planned_pois = build_day_prompt(itinerary, index, periods, pois)
+    schema = compact_response_schema(extras=False) if get_settings().llm_structured_output else None
+    # Always compact: the server assigns IDs and dates when splicing anyway
+    request = GenerationRequest(prompt=prompt, trip=trip, response_schema=schema, output_format=COMPACT_FORMAT)
+    return _TieredGeneration(get_provider(), request, trip, _check_regenerated(periods, planned_pois))
+
+
+def _splice_day(itinerary, index, periods, generated):
+    """
+    Itinerary with the generated periods in place of the day's
+    
+    A generated activity with the same name as one it replaces keeps that
+    activity's ID; the others get IDs by position in the day{n}_{period}_{i}
+    scheme, skipping IDs used elsewhere. Other days keep theirs. A period
+    the model left empty keeps its activities.
+    
+    Raises:
+        LLMError: If the model produced none of the periods
+    """
+    generated_days = [] if generated.get("error") else generated.get("days") or []
+    new_periods = generated_days[0]["periods"] if generated_days else {}
+    if not any(new_periods.get(period) for period in periods):
+        raise LLMError(generated.get("error") or "The model returned no activities for the day")
+    
+    days = list(itinerary["days"])
+    day = dict(days[index], periods=dict(days[index]["periods"]))
+    day_number = day.get("dayNumber", index + 1)
+    replaced = [period for period in periods if new_periods.get(period)]
+    taken = {activity.get("id") for i, other in enumerate(days) for period, activities in other["periods"].items()
+             if i != index or period not in replaced for activity in activities or [] if isinstance(activity, dict)}
+    taken.update(activity.get("id") for activity in itinerary.get("additionalActivities") or [])
+    
+    for period in replaced:
+        day["periods"][period] = _with_ids(day_number, period, day["periods"][period],
+                                           new_periods[period], taken)
+    days[index] = day
+    logger.info("Regenerated %s of day %d", "+".join(replaced), day_number)
+    return dict(itinerary, days=days)
+
+
+def _with_ids(day_number, period, previous, activities, taken):
+    """Activities with IDs, keeping those of previous activities they match by name"""
+    previous_ids = {}
+    for activity in previous or []:
+        if isinstance(activity, dict) and activity.get("id") and activity.get("activity"):
+            previous_ids.setdefault(activity["activity"].strip().lower(), activity["id"])
+    
+    # Kept IDs are claimed first so no positional ID can take one of them
+    ids = []
+    for activity in activities:
+        kept = previous_ids.pop(str(activity.get("activity", "")).strip().lower(), None)
+        if kept in taken:
+            kept = None
+        if kept:
+            taken.add(kept)
+        ids.append(kept)
+    return [dict(activity, id=activity_id or _free_id(day_number, period, position, taken))
+            for position, (activity, activity_id) in enumerate(zip(activities, ids))]
+
+
+def _free_id(day_number, period, position, taken):
+    """First day{n}_{period}_{i} ID from position on that is not taken; marks it taken"""
+    activity_id = f"day{day_number}_{period}_{position}"
+    while activity_id in taken:
+        position += 1
+        activity_id = f"day{day_number}_{period}_{position}"
+    taken.add(activity_id)
+    return activity_id
+
+
+def _destination(itinerary):
+    return (itinerary.get("userInputs") or {}).get("destination") or itinerary.get("destination", "Unknown")
+
+
+def regenerate_day(itinerary, day_number, period=None):
+    """
+    Regenerate one day of a saved itinerary, or one period of that day
+    
+    Geocoding and POIs come from their caches when the trip was generated
+    recently. The prompt carries only the day's surroundings (see
+    build_day_prompt), so it costs a fraction of a full generation.
+    
+    Args:
+        itinerary (dict): Saved itinerary
+        day_number (int): dayNumber of the day to replace
+        period (str): 'morning', 'afternoon' or 'evening' (default: whole day)
+    
+    Returns:
+        dict: Copy of the itinerary with the day spliced in
+    
+    Raises:
+        KeyError: If the itinerary has no such day
+        ValueError: If period is unknown
+        LLMError: If no model produced a usable day
+        LLMOverloadedError: If the call was shed and no fallback is configured
+    """
+    index, periods = _regeneration_target(itinerary, day_number, period)
+    bind_request_context(destination=_destination(itinerary))
+    lat, lon = geocode_city(_destination(itinerary))
+    pois = get_pois(lat, lon) or []
+    generated = _run(_day_generation(itinerary, index, periods, pois))
+    return _splice_day(itinerary, index, periods, generated)
+
+
+async def regenerate_day_async(itinerary, day_number, period=None, executor=None):
+    """
+    Async counterpart of regenerate_day for the ASGI server
+    
+    Args:
+        itinerary (dict): Saved itinerary
+        day_number (int): dayNumber of the day to replace
+        period (str): 'morning', 'afternoon' or 'evening' (default: whole day)
+        executor (Executor): Pool for blocking lookups (default: loop's default)
+    
+    Returns:
+        dict: Copy of the itinerary with the day spliced in
+    """
+    index, periods = _regeneration_target(itinerary, day_number, period)
+    bind_request_context(destination=_destination(itinerary))
+    offload = _offloader(executor)
+    lat, lon = await offload(geocode_city, _destination(itinerary))
+    pois = await offload(get_pois, lat, lon) or []
+    generated = await _run_async(_day_generation(itinerary, index, periods, pois))
+    return _splice_day(itinerary, index, periods, generated)
+
+
+def _renumbered(itinerary, days, start):
+    """
+    Itinerary made of days, numbered from 1 and dated from start
+    
+    Server-assigned activity IDs (day{n}_{period}_{i}) follow their day's
+    new number and the period they sit in, moving to the next free index
+    on a clash; other IDs are kept. userInputs follows the new dates.
+    """
+    def assigned(activity):
+        return isinstance(activity, dict) and _ACTIVITY_ID.match(str(activity.get("id", "")))
+    
+    taken = {activity.get("id") for day in days for activities in (day.get("periods") or {}).values()
+             for activity in activities or [] if isinstance(activity, dict) and not assigned(activity)}
+    taken.update(activity.get("id") for activity in itinerary.get("additionalActivities") or [])
+    
+    renumbered = []
+    for index, day in enumerate(days):
+        day_number = index + 1
+        periods = {}
+        for period, activities in (day.get("periods") or {}).items():
+            periods[period] = []
+            for activity in activities or []:
+                match = assigned(activity)
+                if match:
+                    activity = dict(activity, id=_free_id(day_number, period, int(match.group(1)), taken))
+                periods[period].append(activity)
+        renumbered.append(dict(day, dayNumber=day_number,
+                               date=(start + timedelta(days=index)).strftime('%b %d, %Y'), periods=periods))
+    
+    result = dict(itinerary, startDate=start.strftime('%b %d, %Y'), days=renumbered)
+    if isinstance(itinerary.get("userInputs"), dict):
+        result["userInputs"] = dict(itinerary["userInputs"], startDate=start.strftime('%Y-%m-%d'),
+                                    endDate=(start + timedelta(days=len(days))).strftime('%Y-%m-%d'))
+    return result
+
+
+def shift_itinerary(itinerary, start_date):
+    """
+    Move an itinerary to a new start date, keeping its plan
+    
+    Args:
+        itinerary (dict): Saved itinerary
+        start_date (str): New first day in YYYY-MM-DD format
+    
+    Returns:
+        dict: Copy of the itinerary with every date moved
+    
+    Raises:
+        ValueError: If start_date is not a YYYY-MM-DD date
+    """
+    try:
+        start = datetime.strptime(start_date, '%Y-%m-%d')
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid start date: {start_date!r}, expected YYYY-MM-DD") from None
+    return _renumbered(itinerary, list(itinerary.get("days") or []), start)
+
+
+def _is_plain_int(value):
+    """True for a plain int; JSON true/false would otherwise pass as 1/0"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def reorder_days(itinerary, order):
+    """
+    Rearrange the days of an itinerary; days left out of order are dropped
+    
+    The trip keeps its start date, and days are renumbered and re-dated in
+    their new order.
     
-    print(f"🏁 [CREATE_ITINERARY] ✅ Itinerary creation complete!")
-    return itinerary_data
\ No newline at end of file
+    Args:
+        itinerary (dict): Saved itinerary
+        order (list): dayNumbers of the days to keep, in their new order
+    
+    Returns:
+        dict: Copy of the itinerary with the days rearranged
+    
+    Raises:
+        ValueError: If order is empty, holds a non-integer, repeats a day or
+            names a missing one
+    """
+    days = {day.get("dayNumber"): day for day in itinerary.get("days") or []}
+    if not isinstance(order, list) or not order:
+        raise ValueError("order must list at least one dayNumber")
+    if not all(_is_plain_int(number) for number in order):
+        raise ValueError("order must list dayNumbers as integers")
+    if len(set(order)) != len(order):
+        raise ValueError("order repeats a day")
+    missing = [number for number in order if number not in days]
+    if missing:
+        raise ValueError(f"Itinerary has no day {missing[0]}")
+    return _renumbered(itinerary, [days[number] for number in order], _day_date(itinerary, 0))
+
+
+def drop_day(itinerary, day_number):
+    """
+    Remove one day of an itinerary, shortening the trip
+    
+    Args:
+        itinerary (dict): Saved itinerary
+        day_number (int): dayNumber of the day to remove
+    
+    Returns:
+        dict: Copy of the itinerary without the day
+    
+    Raises:
+        KeyError: If the itinerary has no such day
+        ValueError: If it is the only day left
+    """
+    numbers = [day.get("dayNumber") for day in itinerary.get("days") or []]
+    if day_number not in numbers:
+        raise KeyError(f"Itinerary has no day {day_number}")
+    if len(numbers) == 1:
+        raise ValueError("Cannot remove the only day of an itinerary")
+    return reorder_days(itinerary, [number for number in numbers if number != day_number])
+
+
+def _with_blank_day(itinerary):
+    """Itinerary with an empty day appended, to be filled by a day generation"""
+    blank = {"periods": {period: [] for period in PERIOD_NAMES}}
+    return _renumbered(itinerary, list(itinerary["days"]) + [blank], _day_date(itinerary, 0))
+
+
+def _check_extension(itinerary, count):
+    if not _is_plain_int(count) or not 1 <= count <= MAX_EXTEND_DAYS:
+        raise ValueError(f"count must be between 1 and {MAX_EXTEND_DAYS}")
+    if not itinerary.get("days"):
+        raise ValueError("Cannot extend an itinerary without days")
+    bind_request_context(destination=_destination(itinerary))
+
+
+def extend_itinerary(itinerary, count=1):
+    """
+    Add days to the end of an itinerary
+    
+    Each new day is a one-day generation (see build_day_prompt) with the
+    plan so far as context; the existing days are not regenerated.
+    
+    Args:
+        itinerary (dict): Saved itinerary
+        count (int): Days to add, at most MAX_EXTEND_DAYS
+    
+    Returns:
+        dict: Copy of the itinerary with the new days
+    
+    Raises:
+        ValueError: If count is out of range or there are no days to extend
+        LLMError: If no model produced a usable day
+        LLMOverloadedError: If a call was shed and no fallback is configured
+    """
+    _check_extension(itinerary, count)
+    lat, lon = geocode_city(_destination(itinerary))
+    pois = get_pois(lat, lon) or []
+    for _ in range(count):
+        itinerary = _with_blank_day(itinerary)
+        index = len(itinerary["days"]) - 1
+        generated = _run(_day_generation(itinerary, index, PERIOD_NAMES, pois))
+        itinerary = _splice_day(itinerary, index, PERIOD_NAMES, generated)
+    return itinerary
+
+
+async def extend_itinerary_async(itinerary, count=1, executor=None):
+    """
+    Async counterpart of extend_itinerary for the ASGI server
+    
+    Args:
+        itinerary (dict): Saved itinerary
+        count (int): Days to add, at most MAX_EXTEND_DAYS
+        executor (Executor): Pool for blocking lookups (default: loop's default)
+    
+    Returns:
+        dict: Copy of the itinerary with the new days
+    """
+    _check_extension(itinerary, count)
+    offload = _offloader(executor)
+    lat, lon = await offload(geocode_city, _destination(itinerary))
+    pois = await offload(get_pois, lat, lon) or []
+    for _ in range(count):
+        itinerary = _with_blank_day(itinerary)
+        index = len(itinerary["days"]) - 1
+        generated = await _run_async(_day_generation(itinerary, index, PERIOD_NAMES, pois))
+        itinerary = _splice_day(itinerary, index, PERIOD_NAMES, generated)
+    return itinerary
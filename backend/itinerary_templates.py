@@ -0,0 +1,356 @@
+"""
+Precomputed itinerary templates for WanderTrip
+Canonical itineraries for popular cities, built offline and served instead of a generation
+"""
+
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+
+from .config import get_settings
+from .observability import TEMPLATE_BUILDS, TEMPLATE_LOOKUPS
+from .observability.log import get_logger
+from .storage.itinerary_store import DEFAULT_DATA_DIR, VERSION_KEY, ItineraryStore
+from .utils.geocoding import CITY_COORDINATES
+from .utils.poi_service import FALLBACK_POIS
+
+logger = get_logger(__name__)
+
+# Template metadata kept next to the itinerary; removed before serving
+TEMPLATE_KEY = "template"
+# Travelers a template is generated for; the prompt names the party size,
+# so other party sizes are generated instead
+TEMPLATE_GUESTS = 2
+# Share of TEMPLATE_MAX_AGE after which a template is rebuilt, so it is
+# replaced while the old one can still be served
+REFRESH_FRACTION = 0.5
+
+_store = None
+_refresher = None
+_lock = threading.Lock()
+
+
+def template_cities():
+    """Cities templates are kept for: TEMPLATE_CITIES, else those with fallback coordinates and POIs"""
+    return get_settings().template_cities or tuple(city for city in FALLBACK_POIS if city in CITY_COORDINATES)
+
+
+def template_id(city, days):
+    """Store id of a city's template for a trip of days, e.g. 'new-york_3d'"""
+    return f"{re.sub(r'[^a-z0-9]+', '-', city.lower()).strip('-')}_{days}d"
+
+
+def _trip_days(startDate, endDate):
+    """Days build_prompt would ask for, or None when the dates do not parse"""
+    try:
+        days = (datetime.strptime(endDate, '%Y-%m-%d') - datetime.strptime(startDate, '%Y-%m-%d')).days
+    except (TypeError, ValueError):
+        return None
+    return days if days >= 1 else None
+
+
+def _age(document):
+    return time.time() - document[TEMPLATE_KEY]["generatedAt"]
+
+
+def _start_month(startDate):
+    try:
+        return datetime.strptime(startDate, '%Y-%m-%d').month
+    except (TypeError, ValueError):
+        return None
+
+
+class TemplateStore:
+    """
+    Templates kept as itinerary documents in an ItineraryStore of their own
+
+    Each save bumps the template's version like any itinerary; there is no
+    version history, since a stale template is simply rebuilt.
+
+    Args:
+        directory (str): Directory holding the templates
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.store = ItineraryStore(directory)
+
+    def get(self, city, days):
+        """
+        Load a template
+
+        Returns:
+            dict: Template document with its metadata, or None if never built
+        """
+        try:
+            return self.store.get(template_id(city, days))
+        except FileNotFoundError:
+            return None
+
+    def put(self, city, days, itinerary, guests=TEMPLATE_GUESTS, month=None):
+        """
+        Store an itinerary as the city's template, stamped with the current time
+
+        Args:
+            city (str): City, lower case as in template_cities()
+            days (int): Trip length
+            itinerary (dict): Generated itinerary
+            guests (int): Party size it was generated for
+            month (int): Month (1-12) of the start date it was generated for
+                (default: the current month)
+        """
+        document = {key: value for key, value in itinerary.items() if key != VERSION_KEY}
+        document[TEMPLATE_KEY] = {"city": city, "days": days, "guests": guests,
+                                  "month": month or datetime.now().month, "generatedAt": time.time()}
+        return self.store.save(document, itinerary_id=template_id(city, days))
+
+
+def get_template_store():
+    """Template store in TEMPLATE_DIR, else the templates folder of ITINERARY_DATA_DIR"""
+    global _store
+    directory = get_settings().template_dir or os.path.join(
+        os.getenv("ITINERARY_DATA_DIR") or DEFAULT_DATA_DIR, "templates"
+    )
+    if _store is None or _store.directory != directory:
+        with _lock:
+            if _store is None or _store.directory != directory:
+                _store = TemplateStore(directory)
+    return _store
+
+
+def adapt_template(document, destination, startDate):
+    """
+    Turn a stored template into the itinerary for one request
+
+    Args:
+        document (dict): Template document
+        destination (str): Destination as the user typed it
+        startDate (str): Trip start date in YYYY-MM-DD format
+
+    Returns:
+        dict: Itinerary dated from startDate, without template metadata
+    """
+    from .itinerary_service import shift_itinerary
+    itinerary = {key: value for key, value in document.items() if key not in (TEMPLATE_KEY, VERSION_KEY)}
+    itinerary = shift_itinerary(itinerary, startDate)
+    itinerary["destination"] = destination
+    return itinerary
+
+
+def find_template(destination, startDate, endDate, guestCount=TEMPLATE_GUESTS):
+    """
+    Itinerary from a template matching the trip, if one is fresh enough
+
+    A trip matches when its destination is one of template_cities() and
+    its length one of TEMPLATE_LENGTHS. The prompt names the party size
+    and the month, so the template must also have been generated for the
+    same guest count and for a trip starting in the same month. Templates
+    are read straight from disk: a small file, cheap enough for the ASGI
+    event loop.
+
+    Args:
+        destination (str): Travel destination
+        startDate (str): Trip start date in YYYY-MM-DD format
+        endDate (str): Trip end date in YYYY-MM-DD format
+        guestCount (int): Number of guests/travelers
+
+    Returns:
+        dict: Adapted itinerary, or None to generate one
+    """
+    settings = get_settings()
+    if not settings.itinerary_templates:
+        return None
+    city = (destination or "").strip().lower()
+    days = _trip_days(startDate, endDate)
+    if city not in template_cities() or days not in settings.template_lengths:
+        TEMPLATE_LOOKUPS.labels("unmatched").inc()
+        return None
+
+    document = get_template_store().get(city, days)
+    if document is None:
+        TEMPLATE_LOOKUPS.labels("missing").inc()
+        return None
+    built_for = document[TEMPLATE_KEY]
+    if built_for.get("guests") != guestCount or built_for.get("month") != _start_month(startDate):
+        TEMPLATE_LOOKUPS.labels("mismatch").inc()
+        return None
+    age = _age(document)
+    if age > settings.template_max_age:
+        logger.info("Template %s is %.1f h old; generating instead", template_id(city, days), age / 3600)
+        TEMPLATE_LOOKUPS.labels("stale").inc()
+        return None
+    TEMPLATE_LOOKUPS.labels("hit").inc()
+    logger.info("Serving template %s, %.1f h old", template_id(city, days), age / 3600)
+    return adapt_template(document, destination, startDate)
+
+
+def build_template(city, days, store=None):
+    """
+    Generate, check and store one city's template
+
+    The itinerary is generated as for a trip starting today, so month
+    hints in the prompt follow the season as templates are refreshed. It
+    is stored only if check_itinerary() finds no problem with it.
+
+    Args:
+        city (str): City, lower case as in template_cities()
+        days (int): Trip length
+        store (TemplateStore): Where to keep it (default: get_template_store())
+
+    Returns:
+        str: 'stored', 'rejected' or 'error'
+    """
+    from .itinerary_service import build_prompt_parts, check_itinerary, generate_itinerary
+    from .llm import TripSpec
+    from .utils.geocoding import geocode_city
+    from .utils.poi_service import get_pois
+
+    store = store or get_template_store()
+    destination = city.title()
+    start = datetime.now()
+    startDate = start.strftime('%Y-%m-%d')
+    endDate = (start + timedelta(days=days)).strftime('%Y-%m-%d')
+
+    try:
+        lat, lon = geocode_city(destination)
+        pois = get_pois(lat, lon)
+        prefix, prompt = build_prompt_parts(destination, startDate, endDate, TEMPLATE_GUESTS, pois)
+        trip = TripSpec(destination, startDate, endDate, TEMPLATE_GUESTS, pois or [])
+        itinerary = generate_itinerary(prompt, trip, prefix)
+    except Exception as e:
+        logger.warning("Template %s not built: %s: %s", template_id(city, days), type(e).__name__, e)
+        result = "error"
+    else:
+        problems = check_itinerary(itinerary, trip)
+        if problems:
+            logger.warning("Template %s rejected: %s", template_id(city, days), problems[0][1])
+            result = "rejected"
+        else:
+            store.put(city, days, itinerary, TEMPLATE_GUESTS, start.month)
+            logger.info("Template %s stored", template_id(city, days))
+            result = "stored"
+    TEMPLATE_BUILDS.labels(result).inc()
+    return result
+
+
+def build_templates(cities=None, lengths=None, store=None, max_age=None):
+    """
+    Build the templates that are missing or older than max_age
+
+    Args:
+        cities (iterable): Cities to cover (default: template_cities())
+        lengths (iterable): Trip lengths (default: TEMPLATE_LENGTHS)
+        store (TemplateStore): Where to keep them (default: get_template_store())
+        max_age (float): Seconds a template may have been kept before it
+            is rebuilt; None rebuilds every one
+
+    Returns:
+        dict: Count of templates by result ('stored', 'rejected', 'error', 'fresh')
+    """
+    settings = get_settings()
+    store = store or get_template_store()
+    counts = {"stored": 0, "rejected": 0, "error": 0, "fresh": 0}
+    for city in cities or template_cities():
+        for days in lengths or settings.template_lengths:
+            # Read just before building: another worker may have refreshed it
+            document = store.get(city, days)
+            if max_age is not None and document is not None and _age(document) <= max_age:
+                counts["fresh"] += 1
+                continue
+            counts[build_template(city, days, store)] += 1
+    return counts
+
+
+def refresh_templates(store=None):
+    """Rebuild templates past REFRESH_FRACTION of TEMPLATE_MAX_AGE, and build missing ones"""
+    return build_templates(store=store, max_age=get_settings().template_max_age * REFRESH_FRACTION)
+
+
+class TemplateRefresher:
+    """
+    Keeps templates fresh from a background thread
+
+    A pass runs at start and then every `interval` seconds; only stale
+    and missing templates cost a generation.
+
+    Args:
+        interval (float): Seconds between refresh passes
+        store (TemplateStore): Templates to refresh (default: get_template_store())
+    """
+
+    def __init__(self, interval, store=None):
+        self.interval = interval
+        self.store = store
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="wandertrip-template-refresher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                counts = refresh_templates(self.store)
+                logger.info("Template refresh: %s", counts)
+            except Exception:
+                logger.exception("Template refresh failed")
+            self._stop.wait(self.interval)
+
+
+def start_template_refresher():
+    """
+    Start the TemplateRefresher when TEMPLATE_REFRESH_INTERVAL is set
+
+    Called once by the server launcher (backend.serve), not by the app
+    factories, so multi-worker servers do not refresh in every worker.
+
+    Returns:
+        TemplateRefresher: The running refresher, or None when disabled
+    """
+    global _refresher
+    settings = get_settings()
+    if not settings.itinerary_templates or settings.template_refresh_interval <= 0:
+        return None
+    with _lock:
+        if _refresher is None:
+            _refresher = TemplateRefresher(settings.template_refresh_interval).start()
+    return _refresher
+
+
+def main(argv=None):
+    """Command-line entry point: python -m backend.itinerary_templates build|refresh|list"""
+    parser = argparse.ArgumentParser(description="Build and inspect precomputed itinerary templates")
+    parser.add_argument("command", choices=["build", "refresh", "list"],
+                        help="build every template, refresh stale and missing ones, or list them")
+    parser.add_argument("--cities", help="Comma-separated cities (default: TEMPLATE_CITIES)")
+    parser.add_argument("--lengths", help="Comma-separated trip lengths in days (default: TEMPLATE_LENGTHS)")
+    args = parser.parse_args(argv)
+
+    cities = tuple(city.strip().lower() for city in args.cities.split(",")) if args.cities else None
+    lengths = tuple(int(days) for days in args.lengths.split(",")) if args.lengths else None
+    if args.command == "list":
+        store = get_template_store()
+        for city in cities or template_cities():
+            for days in lengths or get_settings().template_lengths:
+                document = store.get(city, days)
+                age = f"{_age(document) / 3600:.1f} h" if document else "missing"
+                print(f"{template_id(city, days):<24}{age:>12}")
+        return 0
+
+    max_age = get_settings().template_max_age * REFRESH_FRACTION if args.command == "refresh" else None
+    counts = build_templates(cities, lengths, max_age=max_age)
+    print(json.dumps(counts))
+    return 1 if counts["error"] or counts["rejected"] else 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,66 @@
+"""
+LLM providers for WanderTrip
+
+Contains:
+- The provider interface and request/response types
+- Gemini provider with a shared, warm client
+- Deterministic local provider for load tests and degraded mode
+- Tolerant parsing and repair of JSON output
+- The compact wire format and its expander
+- Offline token estimates
+- Prompt-prefix caching
+- Overload protection: adaptive concurrency limit and circuit breaker
+- Hedged calls against latency outliers
+"""
+
+from .base import (
+    LLMProvider,
+    LLMResponse,
+    LLMError,
+    GenerationConfig,
+    GenerationRequest,
+    TripSpec
+)
+from .repair import parse_json_lenient, JSONRepairError
+from .compact import expand_itinerary, compact_itinerary, is_compact
+from .tokens import estimate_tokens
+from .prompt_cache import PromptCache, NoopPromptCache, InMemoryPromptCache, CachedPrefix
+from .limiter import (
+    AdaptiveLimiter, CircuitBreaker, GuardedProvider, LLMOverloadedError, CircuitOpenError, retry_after_seconds
+)
+from .hedging import Hedger
+from .providers import (
+    register_provider, get_provider, get_fallback_provider, get_hedger, default_config, prompt_cache
+)
+
+__all__ = [
+    'LLMProvider',
+    'LLMResponse',
+    'LLMError',
+    'GenerationConfig',
+    'GenerationRequest',
+    'TripSpec',
+    'parse_json_lenient',
+    'JSONRepairError',
+    'expand_itinerary',
+    'compact_itinerary',
+    'is_compact',
+    'estimate_tokens',
+    'PromptCache',
+    'NoopPromptCache',
+    'InMemoryPromptCache',
+    'CachedPrefix',
+    'AdaptiveLimiter',
+    'CircuitBreaker',
+    'GuardedProvider',
+    'LLMOverloadedError',
+    'CircuitOpenError',
+    'retry_after_seconds',
+    'Hedger',
+    'register_provider',
+    'get_provider',
+    'get_fallback_provider',
+    'get_hedger',
+    'default_config',
+    'prompt_cache'
+]
@@ -0,0 +1,104 @@
+"""
+LLM provider interface for WanderTrip
+Requests, responses and the base class every text-generation backend implements
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .prompt_cache import NoopPromptCache
+
+
+class LLMError(RuntimeError):
+    """Raised by providers when a generation cannot be produced"""
+
+
+@dataclass(frozen=True)
+class GenerationConfig:
+    """Model name and sampling parameters for one call"""
+    model: str
+    temperature: Optional[float] = None
+    max_output_tokens: Optional[int] = None
+
+    def sampling_params(self) -> Dict[str, Any]:
+        """Parameters set explicitly, in the provider-neutral snake_case form"""
+        params = {}
+        if self.temperature is not None:
+            params["temperature"] = self.temperature
+        if self.max_output_tokens is not None:
+            params["max_output_tokens"] = self.max_output_tokens
+        return params
+
+
+@dataclass(frozen=True)
+class TripSpec:
+    """Trip parameters a prompt was built from"""
+    destination: str
+    start_date: Optional[str]
+    end_date: Optional[str]
+    guest_count: int
+    pois: List[dict] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class GenerationRequest:
+    """
+    One itinerary generation
+
+    Providers that call a model send the prompt, serving the prefix from
+    their prompt cache when they can; the local provider builds its answer
+    from the trip instead.
+    """
+    prompt: str
+    trip: Optional[TripSpec] = None
+    config: Optional[GenerationConfig] = None
+    # Static start of the prompt; when set, prompt holds only the rest
+    prefix: Optional[str] = None
+    # JSON schema the output must follow; providers with JSON mode enforce it
+    response_schema: Optional[dict] = None
+    # 'full' frontend JSON or the 'compact' wire format (see compact.py)
+    output_format: str = "full"
+
+    @property
+    def full_prompt(self) -> str:
+        return (self.prefix or "") + self.prompt
+
+
+@dataclass
+class LLMResponse:
+    """Text produced by a provider plus what it cost"""
+    text: str
+    model: str
+    provider: str
+    usage: Dict[str, int] = field(default_factory=dict)
+
+
+class LLMProvider:
+    """
+    Base class for text-generation backends
+
+    Subclasses implement generate(); generate_async() defaults to running
+    it on a worker thread, and providers with a native async client
+    override it.
+
+    Args:
+        config (GenerationConfig): Default model and sampling parameters
+        prompt_cache (PromptCache): Where request prefixes are cached
+            (default: no caching)
+    """
+
+    name = "base"
+
+    def __init__(self, config: GenerationConfig, prompt_cache=None):
+        self.config = config
+        self.prompt_cache = prompt_cache or NoopPromptCache()
+
+    def resolve_config(self, request: GenerationRequest) -> GenerationConfig:
+        return request.config or self.config
+
+    def generate(self, request: GenerationRequest) -> LLMResponse:
+        raise NotImplementedError
+
+    async def generate_async(self, request: GenerationRequest) -> LLMResponse:
+        import asyncio
+        return await asyncio.to_thread(self.generate, request)
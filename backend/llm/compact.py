@@ -0,0 +1,128 @@
+"""
+Compact wire format for generated itineraries
+Short keys and positional arrays the model emits, expanded server-side to the frontend JSON
+"""
+
+from datetime import timedelta
+
+from ..models.itinerary_models import PERIOD_NAMES
+
+# Wire format:
+#   {"d": [day, ...], "x": [[activity, description, duration], ...]}
+#   day = [morning, afternoon, evening], each a list of [time, activity, description]
+# IDs, day numbers, dates, destination and startDate are filled in by the server.
+DAYS_KEY = "d"
+EXTRAS_KEY = "x"
+
+COMPACT_FORMAT = "compact"
+FULL_FORMAT = "full"
+OUTPUT_FORMATS = (COMPACT_FORMAT, FULL_FORMAT)
+
+
+def compact_response_schema(extras=True) -> dict:
+    """
+    Response schema for the compact format, in the subset Gemini accepts
+
+    Args:
+        extras (bool): Whether additional activities are asked for; days
+            regenerated on their own come without them
+
+    Returns:
+        dict: Schema with nested string arrays for days and extras
+    """
+    row = {"type": "array", "items": {"type": "string"}}
+    day = {"type": "array", "items": {"type": "array", "items": row}}
+    schema = {
+        "type": "object",
+        "properties": {DAYS_KEY: {"type": "array", "items": day}},
+        "required": [DAYS_KEY]
+    }
+    if extras:
+        schema["properties"][EXTRAS_KEY] = {"type": "array", "items": row}
+        schema["required"].append(EXTRAS_KEY)
+    return schema
+
+
+def is_compact(data) -> bool:
+    """Whether parsed model output is in the compact format"""
+    return isinstance(data, dict) and DAYS_KEY in data and "days" not in data
+
+
+def _rows(value, width):
+    """Rows of at least `width` strings; partial rows from truncated output are dropped"""
+    if not isinstance(value, list):
+        return []
+    return [row for row in value
+            if isinstance(row, list) and len(row) >= width and all(isinstance(cell, str) for cell in row[:width])]
+
+
+def expand_itinerary(data: dict, destination: str, start) -> dict:
+    """
+    Expand compact model output into the frontend itinerary JSON
+
+    Args:
+        data (dict): Parsed compact output
+        destination (str): Trip destination
+        start (datetime): First day of the trip
+
+    Returns:
+        dict: Itinerary in the format Itinerary.to_dict produces
+    """
+    days = []
+    compact_days = data.get(DAYS_KEY)
+    for day_index, compact_day in enumerate(compact_days if isinstance(compact_days, list) else []):
+        if not isinstance(compact_day, list):
+            continue
+        day_number = day_index + 1
+        periods = {}
+        for period_index, period in enumerate(PERIOD_NAMES):
+            rows = _rows(compact_day[period_index], 3) if period_index < len(compact_day) else []
+            periods[period] = [
+                {"time": row[0], "activity": row[1], "description": row[2],
+                 "id": f"day{day_number}_{period}_{i}"}
+                for i, row in enumerate(rows)
+            ]
+        days.append({
+            "dayNumber": day_number,
+            "date": (start + timedelta(days=day_index)).strftime("%b %d, %Y"),
+            "periods": periods
+        })
+
+    additional = [
+        {"id": f"extra_activity_{i}", "activity": row[0], "description": row[1],
+         "duration": row[2], "type": "additional"}
+        for i, row in enumerate(_rows(data.get(EXTRAS_KEY), 3))
+    ]
+
+    return {
+        "destination": destination,
+        "startDate": start.strftime("%b %d, %Y"),
+        "days": days,
+        "additionalActivities": additional
+    }
+
+
+def compact_itinerary(itinerary: dict) -> dict:
+    """
+    Reduce a frontend itinerary to the compact format (inverse of expand_itinerary)
+
+    Args:
+        itinerary (dict): Itinerary in the frontend JSON format
+
+    Returns:
+        dict: Compact representation
+    """
+    return {
+        DAYS_KEY: [
+            [
+                [[a.get("time", ""), a.get("activity", ""), a.get("description", "")]
+                 for a in day.get("periods", {}).get(period, [])]
+                for period in PERIOD_NAMES
+            ]
+            for day in itinerary.get("days", [])
+        ],
+        EXTRAS_KEY: [
+            [a.get("activity", ""), a.get("description", ""), a.get("duration", "")]
+            for a in itinerary.get("additionalActivities", [])
+        ]
+    }
@@ -0,0 +1,209 @@
+"""
+Gemini provider for WanderTrip
+One configured SDK client and cached model handles shared by all requests
+"""
+
+import asyncio
+import threading
+import time
+from datetime import timedelta
+
+from ..config import get_settings
+from ..observability.log import get_logger
+from ..utils.cassette import get_cassette, RecordedGeneration
+from .base import LLMProvider, LLMResponse
+from .prompt_cache import CachedPrefix, PromptCache
+
+logger = get_logger(__name__)
+
+SYSTEM_PREFIX = "You are a travel itinerary planner. "
+
+_genai = None
+_genai_lock = threading.Lock()
+
+
+def _get_genai():
+    """
+    Import and configure the Gemini SDK on first use
+
+    google.generativeai pulls in gRPC and protobuf, which takes hundreds of
+    milliseconds, so it is only loaded once a generation actually runs.
+
+    Returns:
+        module: Configured google.generativeai module
+    """
+    global _genai
+    if _genai is None:
+        with _genai_lock:
+            if _genai is None:
+                import google.generativeai as genai
+                settings = get_settings()
+                if not settings.gemini_api_key:
+                    logger.critical("GEMINI_API_KEY environment variable is not set; check your .env file")
+                if settings.gemini_api_endpoint:
+                    # A stand-in server (e.g. the load-test stub) speaks the REST API only
+                    genai.configure(api_key=settings.gemini_api_key, transport="rest",
+                                    client_options={"api_endpoint": settings.gemini_api_endpoint})
+                else:
+                    genai.configure(api_key=settings.gemini_api_key)
+                logger.info("Gemini API configured")
+                _genai = genai
+    return _genai
+
+
+def _usage(response):
+    """Token counts from a response's usage metadata, when present"""
+    metadata = getattr(response, "usage_metadata", None)
+    if not metadata:
+        return {}
+    if isinstance(metadata, dict):
+        return dict(metadata)
+    usage = {
+        "inputTokens": getattr(metadata, "prompt_token_count", None),
+        "outputTokens": getattr(metadata, "candidates_token_count", None),
+        "totalTokens": getattr(metadata, "total_token_count", None),
+        # Part of inputTokens served from a context cache
+        "cachedTokens": getattr(metadata, "cached_content_token_count", None) or None
+    }
+    return {key: value for key, value in usage.items() if value is not None}
+
+
+def _encode_generation(response):
+    return {"text": response.text, "usage": _usage(response)}
+
+
+def _decode_generation(recorded):
+    return RecordedGeneration(recorded["text"], recorded.get("usage"))
+
+
+class GeminiProvider(LLMProvider):
+    """
+    Google Gemini through the google.generativeai SDK
+
+    GenerativeModel handles are built once per model name and reused, so
+    every request shares the configured client and its connections.
+    Prompt prefixes are served from the prompt cache when one is
+    configured, and calls go through the record/replay cassette when one
+    is active.
+    """
+
+    name = "gemini"
+
+    def __init__(self, config, prompt_cache=None):
+        super().__init__(config, prompt_cache)
+        self._models = {}
+        # Cache name -> (expiry, handle) for models bound to a cached prefix
+        self._cached_models = {}
+        self._models_lock = threading.Lock()
+
+    def model(self, model_name):
+        """Cached GenerativeModel for a model name"""
+        handle = self._models.get(model_name)
+        if handle is None:
+            with self._models_lock:
+                handle = self._models.get(model_name)
+                if handle is None:
+                    handle = _get_genai().GenerativeModel(model_name)
+                    self._models[model_name] = handle
+        return handle
+
+    def cached_model(self, cached):
+        """
+        GenerativeModel bound to a cached prefix
+
+        Handles are kept per cache; those of expired caches are dropped as
+        new ones are added, since a re-registered prefix gets a new name.
+        """
+        entry = self._cached_models.get(cached.name)
+        if entry is None:
+            with self._models_lock:
+                entry = self._cached_models.get(cached.name)
+                if entry is None:
+                    now = time.time()
+                    self._cached_models = {name: kept for name, kept in self._cached_models.items()
+                                           if kept[0] > now}
+                    handle = _get_genai().GenerativeModel.from_cached_content(cached_content=cached.handle)
+                    entry = self._cached_models[cached.name] = (cached.expires_at, handle)
+        return entry[1]
+
+    def _call_args(self, request):
+        config = self.resolve_config(request)
+        # Keyed on the whole prompt, so recordings replay with or without prefix caching
+        cassette_request = {"model": config.model, "contents": SYSTEM_PREFIX + request.full_prompt}
+        params = config.sampling_params()
+        if request.response_schema is not None:
+            # Constrained decoding: the model can only emit schema-valid JSON
+            params["response_mime_type"] = "application/json"
+            params["response_schema"] = request.response_schema
+        return config, params or None, cassette_request
+
+    def _live_target(self, request, config):
+        """Model handle and contents to send, using the cached prefix when there is one"""
+        if request.prefix:
+            cached = self.prompt_cache.get(config.model, SYSTEM_PREFIX + request.prefix)
+            if cached is not None:
+                return self.cached_model(cached), request.prompt
+        return self.model(config.model), SYSTEM_PREFIX + request.full_prompt
+
+    def _response(self, raw, config):
+        return LLMResponse(text=raw.text, model=config.model, provider=self.name, usage=_usage(raw))
+
+    def generate(self, request):
+        config, params, cassette_request = self._call_args(request)
+
+        def live():
+            model, contents = self._live_target(request, config)
+            return model.generate_content(contents, generation_config=params)
+
+        cassette = get_cassette()
+        if cassette is None:
+            raw = live()
+        else:
+            raw = cassette.call("gemini", cassette_request, live, _encode_generation, _decode_generation)
+        return self._response(raw, config)
+
+    async def generate_async(self, request):
+        config, params, cassette_request = self._call_args(request)
+
+        async def live():
+            # Registering a prefix is a blocking API call
+            model, contents = await asyncio.to_thread(self._live_target, request, config)
+            return await model.generate_content_async(contents, generation_config=params)
+
+        cassette = get_cassette()
+        if cassette is None:
+            raw = await live()
+        else:
+            raw = await cassette.call_async("gemini", cassette_request, live,
+                                            _encode_generation, _decode_generation)
+        return self._response(raw, config)
+
+
+class GeminiPromptCache(PromptCache):
+    """
+    Prompt prefixes held in Gemini context caches (CachedContent)
+
+    Calls referencing a cache are billed the reduced cached-token rate for
+    the prefix and skip reprocessing it. Gemini rejects caches below a
+    model-specific minimum size, which min_tokens should reflect.
+    """
+
+    name = "gemini"
+
+    def _register(self, model, prefix, tokens, digest):
+        _get_genai()
+        from google.generativeai import caching
+        cached = caching.CachedContent.create(
+            model=model,
+            display_name=f"wandertrip-prefix-{digest}",
+            contents=[prefix],
+            ttl=timedelta(seconds=self.ttl)
+        )
+        metadata = getattr(cached, "usage_metadata", None)
+        return CachedPrefix(
+            name=cached.name,
+            model=model,
+            tokens=getattr(metadata, "total_token_count", None) or tokens,
+            expires_at=time.time() + self.ttl,
+            handle=cached
+        )
@@ -0,0 +1,290 @@
+"""
+Hedged LLM calls
+Fires a second request when the first runs past the observed latency quantile and keeps the first good answer
+"""
+
+import contextvars
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import replace
+
+from ..observability import LLM_HEDGE_DELAY, LLM_HEDGES, LLM_TOKENS
+from ..observability.log import get_logger
+from .limiter import LLMOverloadedError
+
+logger = get_logger(__name__)
+
+# Hedges that may be saved up while traffic is quiet
+MAX_BUDGET_CREDIT = 20.0
+
+
+class _LatencyWindow:
+    """Recent call latencies of one model and their hedging quantile"""
+
+    def __init__(self, size):
+        self.samples = deque(maxlen=size)
+        self.delay = None
+        self._fresh = 0
+
+    def add(self, latency, quantile, min_samples):
+        self.samples.append(latency)
+        self._fresh += 1
+        # Re-sort only every few samples; the quantile moves slowly
+        if len(self.samples) >= min_samples and (self.delay is None or self._fresh >= 10):
+            ordered = sorted(self.samples)
+            self.delay = ordered[min(len(ordered) - 1, int(quantile * len(ordered)))]
+            self._fresh = 0
+        return self.delay
+
+
+class Hedger:
+    """
+    Hedged requests against a provider
+
+    A call still running after the model's recent latency quantile gets a
+    second, identical request (or one to `alternate_model`); the first
+    response that `accept` approves is returned. The other is cancelled
+    on the async path. The sync path cannot cancel a call, so the loser
+    runs to completion in the background: its tokens are still counted,
+    and until it finishes it holds one hedge of the budget, since it uses
+    a limiter slot and quota like a hedge would. Each call earns `budget`
+    hedges and each hedge spends one, so hedges stay near `budget` of
+    traffic. No call is hedged until `min_samples` latencies are known.
+
+    Args:
+        quantile (float): Latency quantile after which to hedge
+        budget (float): Hedges allowed per call, e.g. 0.1 for 10%
+        alternate_model (str): Model for the hedge (default: the same)
+        window (int): Latencies kept per model
+        min_samples (int): Latencies needed before hedging starts
+    """
+
+    def __init__(self, quantile=0.9, budget=0.1, alternate_model=None, window=200, min_samples=20):
+        self.quantile = quantile
+        self.budget = budget
+        self.alternate_model = alternate_model
+        self.window = window
+        self.min_samples = min_samples
+        self._windows = {}
+        self._credit = 0.0
+        # Sync calls still running after their race was decided
+        self._losers = 0
+        self._lock = threading.Lock()
+
+    def delay(self, model):
+        """Seconds to wait before hedging a call to model, or None while unknown"""
+        window = self._windows.get(model)
+        return window.delay if window else None
+
+    def observe(self, model, latency):
+        """Record a finished call's latency"""
+        with self._lock:
+            window = self._windows.get(model)
+            if window is None:
+                window = self._windows[model] = _LatencyWindow(self.window)
+            delay = window.add(latency, self.quantile, self.min_samples)
+        if delay is not None:
+            LLM_HEDGE_DELAY.labels(model).set(round(delay, 3))
+
+    def _earn(self):
+        with self._lock:
+            self._credit = min(MAX_BUDGET_CREDIT, self._credit + self.budget)
+
+    def _spend(self, model):
+        with self._lock:
+            if self._credit - self._losers >= 1:
+                self._credit -= 1
+                return True
+        LLM_HEDGES.labels(model, "over_budget").inc()
+        return False
+
+    def _hedge_request(self, provider, request):
+        if not self.alternate_model:
+            return request
+        config = request.config or provider.config
+        return replace(request, config=replace(config, model=self.alternate_model))
+
+    def generate(self, provider, request, accept):
+        """
+        Generate, hedging a slow call
+
+        Args:
+            provider (LLMProvider): Provider to call
+            request (GenerationRequest): Request to send
+            accept (callable): LLMResponse -> bool, whether the answer is
+                good enough to return without waiting for the other call
+
+        Returns:
+            LLMResponse: First accepted response, else the primary's
+
+        Raises:
+            Exception: The primary's error when no call produced a response
+        """
+        model = _model(provider, request)
+        self._earn()
+        delay = self.delay(model)
+        if delay is None:
+            started = time.monotonic()
+            response = provider.generate(request)
+            self.observe(model, time.monotonic() - started)
+            return response
+
+        results = queue.Queue()
+        decided = threading.Event()
+        # Calls of this race still running; guarded by self._lock
+        running = [0]
+
+        def finished():
+            """Whether nobody waits for the call any more; releases its hold on the budget"""
+            with self._lock:
+                running[0] -= 1
+                if decided.is_set():
+                    self._losers -= 1
+                    return True
+            return False
+
+        def call(call_request, hedge):
+            started = time.monotonic()
+            try:
+                response = provider.generate(call_request)
+            except Exception as e:
+                finished()
+                results.put((hedge, None, e))
+                return
+            self.observe(_model(provider, call_request), time.monotonic() - started)
+            if finished():
+                # Nobody waits for it any more, but it was paid for
+                _record_discarded(response)
+            results.put((hedge, response, None))
+
+        def start(call_request, hedge):
+            with self._lock:
+                running[0] += 1
+            context = contextvars.copy_context()
+            threading.Thread(target=context.run, args=(call, call_request, hedge),
+                             name="llm-hedge" if hedge else "llm-call", daemon=True).start()
+
+        start(request, False)
+        pending = 1
+        hedged = False
+        try:
+            outcome = results.get(timeout=delay)
+        except queue.Empty:
+            if self._spend(model):
+                self._fired(model, delay)
+                start(self._hedge_request(provider, request), True)
+                pending += 1
+                hedged = True
+            outcome = results.get()
+
+        fallback = None
+        try:
+            while True:
+                pending -= 1
+                if self._accepted(model, outcome, accept, hedged):
+                    return outcome[1]
+                fallback = _preferred(fallback, outcome)
+                if not pending:
+                    return _settle(fallback)
+                outcome = results.get()
+        finally:
+            with self._lock:
+                decided.set()
+                self._losers += running[0]
+
+    async def generate_async(self, provider, request, accept):
+        """Async counterpart of generate(); the losing call is cancelled"""
+        import asyncio  # only the ASGI server needs it; keep it off the import path
+        model = _model(provider, request)
+        self._earn()
+        delay = self.delay(model)
+
+        async def call(call_request):
+            started = time.monotonic()
+            response = await provider.generate_async(call_request)
+            self.observe(_model(provider, call_request), time.monotonic() - started)
+            return response
+
+        if delay is None:
+            return await call(request)
+
+        primary = asyncio.ensure_future(call(request))
+        # When each call started, and its model
+        started = {primary: (time.monotonic(), model)}
+        done, pending = await asyncio.wait({primary}, timeout=delay)
+        hedged = False
+        if not done and self._spend(model):
+            self._fired(model, delay)
+            hedge_request = self._hedge_request(provider, request)
+            hedge = asyncio.ensure_future(call(hedge_request))
+            started[hedge] = (time.monotonic(), _model(provider, hedge_request))
+            pending.add(hedge)
+            hedged = True
+
+        fallback = None
+        try:
+            while True:
+                for task in done:
+                    error = task.exception()
+                    outcome = (task is not primary, None if error else task.result(), error)
+                    if self._accepted(model, outcome, accept, hedged):
+                        return outcome[1]
+                    fallback = _preferred(fallback, outcome)
+                if not pending:
+                    return _settle(fallback)
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
+                # It would have taken at least this long; leaving it out
+                # would bias the quantile low
+                task_started, task_model = started[task]
+                self.observe(task_model, time.monotonic() - task_started)
+
+    def _fired(self, model, delay):
+        logger.info("Hedging %s call after %.2fs", model, delay)
+        LLM_HEDGES.labels(model, "fired").inc()
+
+    def _accepted(self, model, outcome, accept, hedged):
+        """Whether a finished call's response is the answer; counts how hedges fared"""
+        hedge, response, error = outcome
+        if hedge and isinstance(error, LLMOverloadedError):
+            LLM_HEDGES.labels(model, "shed").inc()
+        if response is None or not accept(response):
+            return False
+        if hedged:
+            LLM_HEDGES.labels(model, "won" if hedge else "lost").inc()
+        return True
+
+
+def _model(provider, request):
+    return (request.config or provider.config).model
+
+
+def _preferred(current, outcome):
+    """Outcome to fall back on: any response over an error, the primary's over the hedge's"""
+    if current is None:
+        return outcome
+    if current[1] is None and outcome[1] is not None:
+        return outcome
+    if current[0] and not outcome[0] and outcome[1] is not None:
+        return outcome
+    return current
+
+
+def _settle(outcome):
+    """No answer was accepted: return the fallback response, or raise its error"""
+    hedge, response, error = outcome
+    if response is not None:
+        return response
+    raise error
+
+
+def _record_discarded(response):
+    """Token usage of a response that lost the race"""
+    usage = response.usage or {}
+    for key, direction in (("inputTokens", "input"), ("outputTokens", "output")):
+        if usage.get(key) is not None:
+            LLM_TOKENS.labels(response.provider, direction).observe(usage[key])
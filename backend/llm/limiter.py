@@ -0,0 +1,355 @@
+"""
+Overload protection for LLM providers
+Adaptive (AIMD) concurrency limit with a deadline-aware queue, and a circuit breaker
+"""
+
+import math
+import threading
+import time
+from collections import deque
+
+from ..observability import LLM_CIRCUIT_STATE, LLM_CONCURRENCY_LIMIT, LLM_QUEUE_DEPTH, LLM_SHED
+from ..observability.log import get_logger
+from .base import LLMError, LLMProvider
+
+logger = get_logger(__name__)
+
+# Exception class names that mean the upstream is overloaded or rate limiting us
+_OVERLOAD_ERRORS = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "DeadlineExceeded",
+    "TimeoutError", "Timeout", "ReadTimeout", "ConnectTimeout"
+}
+_OVERLOAD_STATUS = {429, 503, 504}
+
+
+class LLMOverloadedError(LLMError):
+    """
+    Raised instead of calling the provider when the call would not finish in time
+
+    Args:
+        message (str): What was shed and why
+        retry_after (float): Seconds after which a retry is likely to be admitted
+    """
+
+    def __init__(self, message, retry_after=1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(LLMOverloadedError):
+    """Raised while the circuit breaker is open"""
+
+
+def is_overload_error(error):
+    """Whether an exception from a provider signals overload (quota, 429/503, timeouts)"""
+    if any(cls.__name__ in _OVERLOAD_ERRORS for cls in type(error).__mro__):
+        return True
+    status = getattr(error, "code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    try:
+        return int(status) in _OVERLOAD_STATUS
+    except (TypeError, ValueError):
+        return False
+
+
+class _Waiter:
+    __slots__ = ("granted", "event", "loop", "future")
+
+    def __init__(self, loop=None):
+        self.granted = False
+        self.loop = loop
+        if loop is None:
+            self.event = threading.Event()
+        else:
+            self.future = loop.create_future()
+
+    def wake(self):
+        self.granted = True
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit that adapts to the upstream (additive increase, multiplicative decrease)
+
+    Each success while the limit is in use raises it by 1/limit, about one
+    slot per round of calls; an overload error cuts it by `backoff`, at
+    most once per typical call latency so a burst of failures counts once.
+    Callers beyond the limit wait in a FIFO queue. A caller is shed at
+    once when the queue is full or the expected wait exceeds its timeout,
+    rather than waiting only to time out.
+
+    Args:
+        name (str): Label for metrics and logs (the provider name)
+        initial_limit (int): Starting concurrency
+        min_limit (int): Floor for the limit
+        max_limit (int): Ceiling for the limit
+        max_queue (int): Callers allowed to wait
+        backoff (float): Factor applied to the limit on overload
+    """
+
+    def __init__(self, name, initial_limit=8, min_limit=1, max_limit=64, max_queue=64, backoff=0.5):
+        self.name = name
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.backoff = backoff
+        self.in_flight = 0
+        # Smoothed call latency, for wait estimates; seeded with a typical generation
+        self.latency = 5.0
+        self._last_decrease = 0.0
+        self._waiters = deque()
+        self._lock = threading.Lock()
+        self._limit_gauge = LLM_CONCURRENCY_LIMIT.labels(name)
+        self._queue_gauge = LLM_QUEUE_DEPTH.labels(name)
+        self._limit_gauge.set(int(self.limit))
+
+    def _admit_now(self):
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return True
+        return False
+
+    def _check_queue(self, timeout):
+        """Shed if the caller cannot be served in time; called with the lock held"""
+        if len(self._waiters) >= self.max_queue:
+            self._shed("queue_full", self.latency)
+        # Queued callers ahead drain at about `limit` per call latency
+        expected = self.latency * (len(self._waiters) + 1) / max(int(self.limit), 1)
+        if expected > timeout:
+            self._shed("deadline", expected)
+
+    def _shed(self, reason, retry_after):
+        LLM_SHED.labels(self.name, reason).inc()
+        raise LLMOverloadedError(f"{self.name} is overloaded ({reason}); {len(self._waiters)} calls queued",
+                                 retry_after=retry_after)
+
+    def _abandon(self, waiter):
+        """Timed out or cancelled: drop from the queue, or hand back a slot granted meanwhile"""
+        with self._lock:
+            if waiter.granted:
+                return True
+            self._waiters.remove(waiter)
+            self._queue_gauge.set(len(self._waiters))
+            return False
+
+    def acquire(self, timeout):
+        """
+        Take a slot, waiting up to timeout seconds
+
+        Raises:
+            LLMOverloadedError: If the caller was shed
+        """
+        with self._lock:
+            if self._admit_now():
+                return
+            self._check_queue(timeout)
+            waiter = _Waiter()
+            self._waiters.append(waiter)
+            self._queue_gauge.set(len(self._waiters))
+        if waiter.event.wait(timeout) or self._abandon(waiter):
+            return
+        with self._lock:
+            self._shed("deadline", self.latency)
+
+    async def acquire_async(self, timeout):
+        """Take a slot without blocking the event loop; see acquire()"""
+        import asyncio  # only the ASGI server needs it; keep it off the import path
+        with self._lock:
+            if self._admit_now():
+                return
+            self._check_queue(timeout)
+            waiter = _Waiter(asyncio.get_running_loop())
+            self._waiters.append(waiter)
+            self._queue_gauge.set(len(self._waiters))
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+            return
+        except asyncio.TimeoutError:
+            if self._abandon(waiter):
+                return
+        except asyncio.CancelledError:
+            if self._abandon(waiter):
+                self.release("cancelled", 0.0)
+            raise
+        with self._lock:
+            self._shed("deadline", self.latency)
+
+    def release(self, outcome, latency):
+        """
+        Return a slot and adapt the limit
+
+        Args:
+            outcome (str): 'success', 'overload', or anything else for no change
+            latency (float): Seconds the call took
+        """
+        with self._lock:
+            busy = self.in_flight >= self.limit / 2
+            self.in_flight -= 1
+            now = time.monotonic()
+            if outcome == "success":
+                self.latency += 0.2 * (latency - self.latency)
+                # Only grow when the limit is actually being used
+                if busy:
+                    self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            elif outcome == "overload" and now - self._last_decrease > self.latency:
+                self._last_decrease = now
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                logger.warning("%s overloaded, concurrency limit cut to %d", self.name, int(self.limit))
+            self._limit_gauge.set(int(self.limit))
+
+            while self._waiters and self.in_flight < int(self.limit):
+                self.in_flight += 1
+                self._waiters.popleft().wake()
+            self._queue_gauge.set(len(self._waiters))
+
+
+class CircuitBreaker:
+    """
+    Fail fast while the upstream is unhealthy
+
+    Opens after `failure_threshold` consecutive failed calls. While open,
+    calls are rejected without reaching the upstream; after `reset_timeout`
+    one probe call is let through (half-open) and its outcome closes or
+    reopens the circuit.
+
+    Args:
+        name (str): Label for metrics and logs
+        failure_threshold (int): Consecutive failures that open the circuit
+        reset_timeout (float): Seconds to stay open before probing
+    """
+
+    CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+    _STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self._gauge = LLM_CIRCUIT_STATE.labels(name)
+        self._gauge.set(0)
+
+    def _set_state(self, state):
+        if state != self.state:
+            logger.warning("%s circuit %s", self.name, state.replace("_", "-"))
+        self.state = state
+        self._gauge.set(self._STATE_VALUES[state])
+
+    def before_call(self):
+        """
+        Raises:
+            CircuitOpenError: If the call must not reach the upstream
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            remaining = self._opened_at + self.reset_timeout - time.monotonic()
+            if self.state == self.OPEN and remaining <= 0:
+                self._set_state(self.HALF_OPEN)
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+        LLM_SHED.labels(self.name, "circuit_open").inc()
+        raise CircuitOpenError(f"{self.name} circuit is open", retry_after=max(remaining, 1.0))
+
+    def record_skipped(self):
+        """A call let through by before_call() never reached the upstream"""
+        with self._lock:
+            self._probing = False
+
+    def record(self, success):
+        with self._lock:
+            self._probing = False
+            if success:
+                self.failures = 0
+                self._set_state(self.CLOSED)
+                return
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._set_state(self.OPEN)
+
+
+class GuardedProvider(LLMProvider):
+    """
+    Provider wrapper applying a circuit breaker and an adaptive concurrency limit
+
+    Args:
+        inner (LLMProvider): Provider doing the actual generation
+        limiter (AdaptiveLimiter): Concurrency limit for calls to inner
+        breaker (CircuitBreaker): Breaker for calls to inner
+        queue_timeout (float): Longest a call may wait for a slot
+    """
+
+    def __init__(self, inner, limiter, breaker, queue_timeout=10.0):
+        super().__init__(inner.config, inner.prompt_cache)
+        self.inner = inner
+        self.name = inner.name
+        self.limiter = limiter
+        self.breaker = breaker
+        self.queue_timeout = queue_timeout
+
+    def _finish(self, started, error=None):
+        latency = time.monotonic() - started
+        if error is None:
+            outcome = "success"
+        else:
+            outcome = "overload" if is_overload_error(error) else "error"
+        self.limiter.release(outcome, latency)
+        self.breaker.record(error is None)
+
+    def generate(self, request):
+        self.breaker.before_call()
+        try:
+            self.limiter.acquire(self.queue_timeout)
+        except LLMOverloadedError:
+            # The probe never ran; let the next caller try
+            self.breaker.record_skipped()
+            raise
+        started = time.monotonic()
+        try:
+            response = self.inner.generate(request)
+        except Exception as e:
+            self._finish(started, e)
+            raise
+        self._finish(started)
+        return response
+
+    async def generate_async(self, request):
+        import asyncio
+        self.breaker.before_call()
+        try:
+            await self.limiter.acquire_async(self.queue_timeout)
+        except (LLMOverloadedError, asyncio.CancelledError):
+            self.breaker.record_skipped()
+            raise
+        started = time.monotonic()
+        try:
+            response = await self.inner.generate_async(request)
+        except asyncio.CancelledError:
+            self.limiter.release("cancelled", 0.0)
+            self.breaker.record_skipped()
+            raise
+        except Exception as e:
+            self._finish(started, e)
+            raise
+        self._finish(started)
+        return response
+
+
+def retry_after_seconds(error):
+    """Whole seconds for a Retry-After header"""
+    return max(1, math.ceil(getattr(error, "retry_after", 1.0)))
@@ -0,0 +1,171 @@
+"""
+Deterministic local provider for WanderTrip
+Builds schema-valid itineraries from the trip's POIs without calling a model
+"""
+
+import json
+import re
+import time
+from datetime import datetime, timedelta
+
+from .base import LLMProvider, LLMResponse, TripSpec
+from .compact import COMPACT_FORMAT, compact_itinerary
+from .tokens import estimate_tokens
+
+DEFAULT_DAYS = 3
+
+# Used when a trip has fewer POIs than activity slots
+_GENERIC_ACTIVITIES = [
+    ("Old Town Walking Tour", "Wander the historic centre and its landmarks"),
+    ("Local Market Visit", "Browse stalls of regional food and crafts"),
+    ("City Viewpoint", "Take in panoramic views over the city"),
+    ("Riverside Stroll", "Relax along the waterfront"),
+    ("Museum Visit", "Explore local history and culture"),
+    ("Neighbourhood Café Stop", "Try a local speciality at a popular café")
+]
+
+_SLOTS = (
+    ("morning", "10:00", None),
+    ("afternoon", "13:00", ("Lunch at a local restaurant", "Enjoy regional cuisine")),
+    ("afternoon", "15:00", None),
+    ("evening", "19:30", None)
+)
+
+_EXTRA_DURATIONS = ("1 hour", "1-2 hours", "2-3 hours", "Half day")
+
+# Matches the opening line of build_prompt, for callers that pass no TripSpec
+_PROMPT_TRIP = re.compile(r"Create a (\d+)-day travel itinerary for (.+?) in \w+\.")
+_PROMPT_POIS = re.compile(r"Suggested POIs include: (.*?)\.?\n")
+
+
+def _trip_from_prompt(prompt):
+    match = _PROMPT_TRIP.search(prompt)
+    pois_match = _PROMPT_POIS.search(prompt)
+    pois = [{"name": name.strip(), "type": ""}
+            for name in (pois_match.group(1).split(",") if pois_match else []) if name.strip()]
+    if not match:
+        return TripSpec("Unknown", None, None, 2, pois), DEFAULT_DAYS
+    return TripSpec(match.group(2), None, None, 2, pois), max(1, int(match.group(1)))
+
+
+def _trip_days(trip):
+    try:
+        start = datetime.strptime(trip.start_date, "%Y-%m-%d")
+        end = datetime.strptime(trip.end_date, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        return datetime.now(), DEFAULT_DAYS
+    # Same day count build_prompt asks the model for
+    return start, max(1, (end - start).days)
+
+
+def synthesize_itinerary(trip, days=None, start=None):
+    """
+    Build an itinerary in the frontend JSON format from a trip's POIs
+
+    Every POI is scheduled once before generic activities are used, and
+    the output depends only on the inputs.
+
+    Args:
+        trip (TripSpec): Trip parameters and POIs
+        days (int): Number of days (default: from the trip's dates)
+        start (datetime): First day (default: the trip's start date)
+
+    Returns:
+        dict: Itinerary data
+    """
+    if days is None or start is None:
+        start, days = _trip_days(trip)
+    names = [poi["name"] for poi in trip.pois if poi.get("name")]
+    candidates = [(name, f"Visit {name}") for name in names] + _GENERIC_ACTIVITIES
+    cursor = 0
+
+    def next_activity():
+        nonlocal cursor
+        activity = candidates[cursor % len(candidates)]
+        cursor += 1
+        return activity
+
+    day_list = []
+    for day_index in range(days):
+        periods = {"morning": [], "afternoon": [], "evening": []}
+        for period, time_of_day, fixed in _SLOTS:
+            name, description = fixed or next_activity()
+            periods[period].append({
+                "time": time_of_day,
+                "activity": name,
+                "description": description,
+                "id": f"day{day_index + 1}_{period}_{len(periods[period])}"
+            })
+        day_list.append({
+            "dayNumber": day_index + 1,
+            "date": (start + timedelta(days=day_index)).strftime("%b %d, %Y"),
+            "periods": periods
+        })
+
+    # Unscheduled POIs first, then generic ideas, 10-15 in total like the model
+    extras = candidates[cursor:] + _GENERIC_ACTIVITIES
+    additional = [
+        {
+            "id": f"extra_activity_{i}",
+            "activity": name,
+            "description": description,
+            "duration": _EXTRA_DURATIONS[i % len(_EXTRA_DURATIONS)],
+            "type": "additional"
+        }
+        for i, (name, description) in enumerate(extras[:12])
+    ]
+
+    return {
+        "destination": trip.destination,
+        "startDate": start.strftime("%b %d, %Y"),
+        "days": day_list,
+        "additionalActivities": additional
+    }
+
+
+class LocalProvider(LLMProvider):
+    """
+    Provider that synthesizes itineraries locally
+
+    For load tests that must not spend API quota, and as a degraded-mode
+    fallback when the model is unavailable.
+
+    Args:
+        config (GenerationConfig): Reported as the model name 'local'
+        latency (float): Seconds to wait per call, to mimic a model
+        prompt_cache (PromptCache): Reports cached prefix tokens in usage
+            like a model with context caching would
+    """
+
+    name = "local"
+
+    def __init__(self, config, latency=0.0, prompt_cache=None):
+        super().__init__(config, prompt_cache)
+        self.latency = latency
+
+    def _generate(self, request):
+        prompt = request.full_prompt
+        if request.trip is not None:
+            itinerary = synthesize_itinerary(request.trip)
+        else:
+            trip, days = _trip_from_prompt(prompt)
+            itinerary = synthesize_itinerary(trip, days=days, start=datetime.now())
+        if request.output_format == COMPACT_FORMAT:
+            itinerary = compact_itinerary(itinerary)
+        text = json.dumps(itinerary)
+        usage = {"inputTokens": estimate_tokens(prompt), "outputTokens": estimate_tokens(text)}
+        cached = self.prompt_cache.get("local", request.prefix) if request.prefix else None
+        if cached is not None:
+            usage["cachedTokens"] = cached.tokens
+        return LLMResponse(text=text, model="local", provider=self.name, usage=usage)
+
+    def generate(self, request):
+        if self.latency:
+            time.sleep(self.latency)
+        return self._generate(request)
+
+    async def generate_async(self, request):
+        if self.latency:
+            import asyncio
+            await asyncio.sleep(self.latency)
+        return self._generate(request)
@@ -0,0 +1,129 @@
+"""
+Prompt-prefix caching for LLM providers
+Registers the static instruction block once and lets later calls reference it
+"""
+
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from ..observability import CACHE_LOOKUPS
+from ..observability.log import get_logger
+from .tokens import estimate_tokens
+
+logger = get_logger(__name__)
+
+# Failed registrations are not retried for this long
+RETRY_AFTER_SECONDS = 300
+
+
+@dataclass(frozen=True)
+class CachedPrefix:
+    """A prefix registered with a backend, referenced by name on later calls"""
+    name: str
+    model: str
+    tokens: int
+    expires_at: float
+    # Backend object for the cached content (e.g. the SDK's CachedContent)
+    handle: Any = None
+
+
+class PromptCache:
+    """
+    Registry of cached prompt prefixes, keyed by model and prefix text
+
+    get() returns a live entry, registering the prefix on first use and
+    again once it expires. Subclasses implement _register() for one
+    backend; failures are logged and remembered for RETRY_AFTER_SECONDS
+    so generations fall back to sending the whole prompt.
+
+    Args:
+        ttl (float): Seconds a registered prefix lives
+        min_tokens (int): Prefixes estimated below this are not cached
+            (backends reject small caches)
+    """
+
+    name = "base"
+
+    def __init__(self, ttl=3600.0, min_tokens=0):
+        self.ttl = ttl
+        self.min_tokens = min_tokens
+        self._entries = {}
+        self._failed = {}
+        self._lock = threading.Lock()
+        self._hits = CACHE_LOOKUPS.labels("prompt_prefix", "hit")
+        self._misses = CACHE_LOOKUPS.labels("prompt_prefix", "miss")
+
+    def get(self, model: str, prefix: str) -> Optional[CachedPrefix]:
+        """
+        Live cache entry for a prefix, registering it if needed
+
+        Args:
+            model (str): Model the prefix will be used with
+            prefix (str): Static start of the prompt
+
+        Returns:
+            Optional[CachedPrefix]: Entry to reference, or None to send the full prompt
+        """
+        key = (model, hashlib.sha256(prefix.encode("utf-8")).hexdigest())
+        now = time.time()
+        entry = self._entries.get(key)
+        # Leave a margin so an entry does not expire between lookup and use
+        if entry is not None and entry.expires_at - 60 > now:
+            self._hits.inc()
+            return entry
+        if self._failed.get(key, 0) > now:
+            return None
+        tokens = estimate_tokens(prefix)
+        if tokens < self.min_tokens:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at - 60 > now:
+                self._hits.inc()
+                return entry
+            self._misses.inc()
+            try:
+                entry = self._register(model, prefix, tokens, key[1][:16])
+            except Exception as e:
+                logger.warning("Could not cache prompt prefix for %s: %s: %s", model, type(e).__name__, e)
+                self._failed[key] = now + RETRY_AFTER_SECONDS
+                return None
+            self._entries[key] = entry
+            logger.info("Cached %d-token prompt prefix for %s as %s", entry.tokens, model, entry.name)
+            return entry
+
+    def _register(self, model, prefix, tokens, digest):
+        raise NotImplementedError
+
+
+class NoopPromptCache(PromptCache):
+    """For backends without context caching: every call sends the full prompt"""
+
+    name = "none"
+
+    def get(self, model, prefix):
+        return None
+
+
+class InMemoryPromptCache(PromptCache):
+    """
+    Cache that only records registrations
+
+    Stands in for a backend cache in the local provider and in load tests,
+    so the lookup and expiry path runs without a model.
+    """
+
+    name = "memory"
+
+    def __init__(self, ttl=3600.0, min_tokens=0):
+        super().__init__(ttl, min_tokens)
+        self.registrations = 0
+
+    def _register(self, model, prefix, tokens, digest):
+        self.registrations += 1
+        return CachedPrefix(name=f"local/{digest}", model=model, tokens=tokens,
+                            expires_at=time.time() + self.ttl)
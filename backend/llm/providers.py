@@ -0,0 +1,136 @@
+"""
+LLM provider registry for WanderTrip
+Builds the configured provider once per process and shares it across requests
+"""
+
+import os
+import threading
+
+from ..config import get_settings
+from .base import GenerationConfig
+from .prompt_cache import InMemoryPromptCache, NoopPromptCache
+
+_factories = {}
+_instances = {}
+_instances_lock = threading.Lock()
+_hedger = None
+
+
+def register_provider(name, factory):
+    """
+    Make a provider available by name
+
+    Args:
+        name (str): Value of LLM_PROVIDER / LLM_FALLBACK_PROVIDER selecting it
+        factory (callable): GenerationConfig -> LLMProvider
+    """
+    _factories[name] = factory
+    with _instances_lock:
+        _instances.pop(name, None)
+
+
+def default_config():
+    """Generation config from the LLM_* settings"""
+    settings = get_settings()
+    return GenerationConfig(
+        model=settings.llm_model,
+        temperature=settings.llm_temperature,
+        max_output_tokens=settings.llm_max_output_tokens
+    )
+
+
+def get_provider(name=None):
+    """
+    Shared provider instance
+
+    Args:
+        name (str): Provider name (default: LLM_PROVIDER, then 'gemini')
+
+    Returns:
+        LLMProvider: Provider built on first use and reused afterwards,
+            behind the concurrency limiter and circuit breaker
+    """
+    name = name or get_settings().llm_provider
+    provider = _instances.get(name)
+    if provider is None:
+        with _instances_lock:
+            provider = _instances.get(name)
+            if provider is None:
+                if name not in _factories:
+                    raise ValueError(f"Unknown LLM provider: {name}")
+                provider = _guard(_factories[name](default_config()))
+                _instances[name] = provider
+    return provider
+
+
+def _guard(provider):
+    """Wrap a provider in the LLM_LIMITER overload protection, when enabled"""
+    settings = get_settings()
+    if not settings.llm_limiter:
+        return provider
+    from .limiter import AdaptiveLimiter, CircuitBreaker, GuardedProvider
+    limiter = AdaptiveLimiter(
+        provider.name,
+        initial_limit=settings.llm_concurrency_initial,
+        max_limit=settings.llm_concurrency_max,
+        max_queue=settings.llm_queue_size
+    )
+    breaker = CircuitBreaker(provider.name, settings.llm_breaker_failures, settings.llm_breaker_reset)
+    return GuardedProvider(provider, limiter, breaker, queue_timeout=settings.llm_queue_timeout)
+
+
+def get_fallback_provider():
+    """Provider for degraded mode (LLM_FALLBACK_PROVIDER), or None"""
+    name = get_settings().llm_fallback_provider
+    return get_provider(name) if name else None
+
+
+def get_hedger():
+    """
+    Shared Hedger from the LLM_HEDGE* settings
+
+    Returns:
+        Hedger: Hedger built on first use, or None when hedging is off
+    """
+    global _hedger
+    settings = get_settings()
+    if not settings.llm_hedge:
+        return None
+    if _hedger is None:
+        with _instances_lock:
+            if _hedger is None:
+                from .hedging import Hedger
+                _hedger = Hedger(quantile=settings.llm_hedge_quantile, budget=settings.llm_hedge_budget,
+                                 alternate_model=settings.llm_hedge_model)
+    return _hedger
+
+
+def prompt_cache(cache_class):
+    """
+    Prompt cache for a provider from the LLM_PREFIX_CACHE* settings
+
+    Args:
+        cache_class (type): PromptCache subclass for the backend
+
+    Returns:
+        PromptCache: cache_class instance, or a no-op cache when disabled
+    """
+    settings = get_settings()
+    if not settings.llm_prefix_cache:
+        return NoopPromptCache()
+    return cache_class(ttl=settings.llm_prefix_cache_ttl, min_tokens=settings.llm_prefix_cache_min_tokens)
+
+
+def _gemini(config):
+    from .gemini import GeminiProvider, GeminiPromptCache
+    return GeminiProvider(config, prompt_cache=prompt_cache(GeminiPromptCache))
+
+
+def _local(config):
+    from .local import LocalProvider
+    return LocalProvider(config, latency=float(os.getenv("LOCAL_LLM_LATENCY", "0")),
+                         prompt_cache=prompt_cache(InMemoryPromptCache))
+
+
+register_provider("gemini", _gemini)
+register_provider("local", _local)
@@ -0,0 +1,122 @@
+"""
+Tolerant JSON parsing for LLM output
+Strips fences and prose, drops trailing commas and closes truncated documents
+"""
+
+import json
+
+# How many cut points to try when trimming a truncated document back
+MAX_TRUNCATION_ATTEMPTS = 64
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class JSONRepairError(ValueError):
+    """Raised when text cannot be turned into a JSON document"""
+
+
+def _strip_wrapping(text):
+    """Drop markdown fences and any prose before the first bracket (raw_decode ignores what follows)"""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else text[3:]
+    if text.rstrip().endswith("```"):
+        text = text.rstrip()[:-3]
+    starts = [position for position in (text.find("{"), text.find("[")) if position >= 0]
+    return text[min(starts):] if starts else text
+
+
+def _clean(text):
+    """
+    Remove trailing commas outside strings and note safe cut points
+
+    Returns:
+        tuple: (cleaned text, open-bracket stack at the end, whether the end
+            is inside a string, offsets of commas outside strings)
+    """
+    out = []
+    stack = []
+    in_string = escaped = False
+    commas = []
+    for char in text:
+        if in_string:
+            out.append(char)
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append(char)
+        elif char in "}]":
+            # A comma right before a closer is the classic LLM slip
+            while out and out[-1] in " \t\r\n":
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+                commas.pop()
+            if stack:
+                stack.pop()
+        elif char == ",":
+            commas.append(len(out))
+        out.append(char)
+    return "".join(out), stack, in_string, commas
+
+
+def _close(text, stack, in_string):
+    """Terminate an open string and close every open container"""
+    if in_string:
+        text += '"'
+    text = text.rstrip()
+    while text.endswith((",", ":")):
+        text = text[:-1].rstrip()
+    return text + "".join(_CLOSERS[opener] for opener in reversed(stack))
+
+
+def parse_json_lenient(text):
+    """
+    Parse JSON produced by a model, repairing common damage
+
+    Handles markdown fences and leading prose, trailing commas, and output
+    cut off mid-document (e.g. by max_output_tokens): the document is
+    trimmed back to its last complete element and closed.
+
+    Args:
+        text (str): Model output
+
+    Returns:
+        tuple: (parsed value, True if a repair was needed)
+
+    Raises:
+        JSONRepairError: If no repair produced valid JSON
+    """
+    try:
+        return json.loads(text), False
+    except json.JSONDecodeError:
+        pass
+
+    body = _strip_wrapping(text)
+    try:
+        # Fences and surrounding prose are expected wrapping, not damage
+        return json.JSONDecoder().raw_decode(body)[0], False
+    except json.JSONDecodeError:
+        pass
+
+    cleaned, stack, in_string, commas = _clean(body)
+    try:
+        return json.loads(_close(cleaned, stack, in_string)), True
+    except json.JSONDecodeError:
+        pass
+
+    # Drop the trailing partial element: cut at each earlier comma and close
+    for cut in reversed(commas[-MAX_TRUNCATION_ATTEMPTS:]):
+        prefix, prefix_stack, prefix_in_string, _ = _clean(cleaned[:cut])
+        try:
+            return json.loads(_close(prefix, prefix_stack, prefix_in_string)), True
+        except json.JSONDecodeError:
+            continue
+    raise JSONRepairError("Model output is not repairable JSON")
@@ -0,0 +1,25 @@
+"""
+Token estimates for prompts and model output
+A fast offline approximation of Gemini's SentencePiece counts, for budgets and benchmarks
+"""
+
+import math
+import re
+
+# Words in ~6 character pieces, digits and punctuation one token each,
+# whitespace runs one token. Use the countTokens API where exact numbers matter
+_TOKEN = re.compile(r"[A-Za-z]+|\d|\s+|[^\sA-Za-z\d]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate how many tokens a model would count for text
+
+    Args:
+        text (str): Prompt or output text
+
+    Returns:
+        int: Approximate token count
+    """
+    return sum(math.ceil(len(piece) / 6) if piece[0].isalpha() else 1
+               for piece in _TOKEN.findall(text))
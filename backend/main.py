@@ -3,24 +3,87 @@ WanderTrip Flask Application
 Main API server for travel itinerary planning
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request, send_file, stream_with_context
 from flask_cors import CORS
-import json
+import io
 import os
-import sys
+import time
 
-# Add the backend directory to the Python path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from .itinerary_service import (
+    create_itinerary, drop_day, extend_itinerary, regenerate_day, reorder_days, shift_itinerary
+)
+from .llm import LLMError, LLMOverloadedError, retry_after_seconds
+from .models import validate_itinerary_dict
+from .observability import (
+    render_metrics, CONTENT_TYPE, GENERATIONS_IN_FLIGHT, HTTP_REQUEST_SECONDS,
+    configure_logging, get_logger, log_payload, new_request_id, request_context,
+    bind_request_context, start_trace, finish_trace, parse_traceparent,
+    PROFILE_HEADER, RequestProfiler, should_profile, list_profiles, profile_path
+)
+from .storage import (
+    open_store, VersionConflictError, DEFAULT_ITINERARY_ID,
+    parse_if_match, format_etag, iter_export_lines, import_ndjson
+)
 
-from itinerary_service import generate_itinerary, build_prompt
-from utils.geocoding import geocode_city
-from utils.poi_service import get_pois
+logger = get_logger(__name__)
 
 
-def create_app():
+def create_app(data_dir=None):
     """Application factory pattern for Flask app"""
+    configure_logging()
     app = Flask(__name__)
-    CORS(app)  # Enable CORS for frontend requests
+    CORS(app, expose_headers=['ETag', 'X-Request-ID', 'Server-Timing', 'traceparent', 'X-Profile-Id'])  # Enable CORS for frontend requests
+    
+    store = open_store(data_dir or os.getenv('ITINERARY_DATA_DIR')
+                       or os.path.join(os.path.dirname(__file__), 'data'))
+    history = store.history
+    
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+        g.request_id = request.headers.get('X-Request-ID') or new_request_id()
+        endpoint = request.url_rule.rule if request.url_rule else request.path
+        g.trace, g.trace_token = start_trace(
+            f"{request.method} {endpoint}", parse_traceparent(request.headers.get('traceparent'))
+        )
+        g.log_context = request_context(request_id=g.request_id, trace_id=g.trace.trace_id)
+        g.log_context.__enter__()
+        
+        profile_mode = should_profile(request.headers.get(PROFILE_HEADER), is_admin_request())
+        if profile_mode:
+            g.profiler = RequestProfiler(profile_mode, request.method, endpoint, g.request_id).start()
+
+    @app.after_request
+    def record_request_latency(response):
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        HTTP_REQUEST_SECONDS.labels(endpoint, request.method, str(response.status_code)).observe(
+            time.perf_counter() - g.request_started
+        )
+        response.headers['X-Request-ID'] = g.request_id
+        response.headers['Server-Timing'] = g.trace.server_timing()
+        response.headers['Timing-Allow-Origin'] = '*'
+        response.headers['traceparent'] = g.trace.traceparent()
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            response.headers['X-Profile-Id'] = profiler.stop(response.status_code)['id']
+        return response
+
+    @app.teardown_request
+    def clear_request_context(exc):
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.stop(500)  # after_request was skipped by an unhandled error
+        log_context = g.pop('log_context', None)
+        if log_context is not None:
+            log_context.__exit__(None, None, None)
+        trace = g.pop('trace', None)
+        if trace is not None:
+            finish_trace(trace, g.pop('trace_token'))
+
+    @app.route('/metrics')
+    def metrics():
+        """Expose process metrics in Prometheus text format"""
+        return Response(render_metrics(), content_type=CONTENT_TYPE)
     
     @app.route('/')
     def index():
@@ -30,7 +93,12 @@ def create_app():
             "endpoints": [
                 "/api/itinerary",
                 "/api/generate", 
-                "/api/save"
+                "/api/save",
+                "/api/itinerary/history",
+                "/api/itinerary/<id>/days/<n>/regenerate",
+                "/api/itinerary/<id>/shift",
+                "/api/itinerary/<id>/days/reorder",
+                "/api/itinerary/<id>/days/extend"
             ]
         })
 
@@ -38,11 +106,10 @@ def create_app():
     def get_itinerary():
         """Serve the current itinerary data"""
         try:
-            # Use relative path from backend directory
-            data_path = os.path.join(os.path.dirname(__file__), 'data', 'itinerary_data.json')
-            with open(data_path, 'r') as f:
-                data = json.load(f)
-            return jsonify(data)
+            data = store.get()
+            response = jsonify(data)
+            response.headers['ETag'] = format_etag(data['version'])
+            return response
         except FileNotFoundError:
             return jsonify({"error": "No itinerary data found"}), 404
         except Exception as e:
@@ -50,16 +117,24 @@ def create_app():
 
     @app.route('/api/generate', methods=['POST'])
     def generate_new_itinerary():
-        """Generate a new itinerary based on user inputs"""
-        print("🚀 [API_GENERATE] Endpoint called!")
+        """Generate a new itinerary based on user inputs, replacing the version named by If-Match"""
+        expected_version, error = required_version()
+        if error:
+            return error
+        # Check before spending a generation on a stale copy
+        current_version = store.get_version()
+        if expected_version != '*' and expected_version != current_version:
+            return version_conflict(current_version)
+        with GENERATIONS_IN_FLIGHT.track_inprogress():
+            return _generate_new_itinerary(expected_version)
+
+    def _generate_new_itinerary(expected_version):
         try:
             data = request.json
-            print(f"🚀 [API_GENERATE] Received data: {data}")
+            log_payload(logger, "Generate request", data)
             
             destination = data.get('destination', 'Pasadena')
-            days = data.get('days', 3)
-            
-            print(f"🚀 [API_GENERATE] Destination: {destination}, Days: {days}")
+            bind_request_context(destination=destination)
             
             # Extract guest information
             guests = data.get('guests', {})
@@ -69,24 +144,8 @@ def create_app():
             start_date = data.get('startDate')
             end_date = data.get('endDate')
             
-            print(f"🚀 [API_GENERATE] Guests: {adults} adults, Dates: {start_date} to {end_date}")
-            
-            print(f"🚀 [API_GENERATE] Getting coordinates and POIs...")
-            # Get POIs for the destination
-            lat, lon = geocode_city(destination)
-            pois = get_pois(lat, lon)
-            
-            print(f"🚀 [API_GENERATE] Coordinates: {lat}, {lon}")
-            print(f"🚀 [API_GENERATE] POIs found: {len(pois) if pois else 0}")
-            
-            # Build prompt and generate itinerary using new parameter structure
-            print(f"🚀 [API_GENERATE] Building prompt and generating itinerary...")
-            prompt = build_prompt(destination, start_date, end_date, adults, pois)
-            itinerary_json = generate_itinerary(prompt)
-            
-            print(f"🚀 [API_GENERATE] ✅ Itinerary generated!")
-            print(f"🚀 [API_GENERATE] Generated destination: {itinerary_json.get('destination', 'Unknown')}")
-            print(f"🚀 [API_GENERATE] Generated days: {len(itinerary_json.get('days', []))}")
+            # Geocode, fetch POIs, build the prompt and run the configured LLM provider
+            itinerary_json = create_itinerary(destination, start_date, end_date, adults)
             
             # Add the actual user input data to the response
             itinerary_json['userInputs'] = {
@@ -96,41 +155,253 @@ def create_app():
                 'endDate': end_date
             }
             
-            print(f"🚀 [API_GENERATE] 💾 Saving to itinerary_data.json...")
-            # Save the new itinerary
-            data_path = os.path.join(os.path.dirname(__file__), 'data', 'itinerary_data.json')
-            with open(data_path, 'w') as f:
-                json.dump(itinerary_json, f, indent=2)
-            
-            print(f"🚀 [API_GENERATE] ✅ File saved successfully!")
-            print(f"🚀 [API_GENERATE] 📤 Returning response to client...")
+            try:
+                itinerary_json['version'] = store.save(itinerary_json, expected_version=expected_version)
+            except VersionConflictError as e:
+                # Saved by someone else while generating; their plan is kept
+                return version_conflict(e.current_version)
+            logger.info("Generated itinerary saved as version %d", itinerary_json['version'])
             
-            return jsonify(itinerary_json)
+            response = jsonify(itinerary_json)
+            response.headers['ETag'] = format_etag(itinerary_json['version'])
+            return response
             
+        except LLMOverloadedError as e:
+            # Shed fast instead of queueing behind an overloaded model; the saved plan is kept
+            return overloaded(e)
+        except Exception as e:
+            logger.exception("Generate failed")
+            return jsonify({"error": str(e)}), 500
+
+    @app.route('/api/itinerary/<itinerary_id>/days/<int:day_number>/regenerate', methods=['POST'])
+    def regenerate_itinerary_day(itinerary_id, day_number):
+        """Regenerate one day of an itinerary, or one ?period= of it, guarded by If-Match"""
+        period = request.args.get('period') or (request.get_json(silent=True) or {}).get('period')
+        with GENERATIONS_IN_FLIGHT.track_inprogress():
+            return update_itinerary(itinerary_id, lambda current: regenerate_day(current, day_number, period))
+
+    @app.route('/api/itinerary/<itinerary_id>/shift', methods=['POST'])
+    def shift_itinerary_dates(itinerary_id):
+        """Move an itinerary to the JSON body's startDate, guarded by If-Match"""
+        start_date = (request.get_json(silent=True) or {}).get('startDate')
+        return update_itinerary(itinerary_id, lambda current: shift_itinerary(current, start_date))
+
+    @app.route('/api/itinerary/<itinerary_id>/days/reorder', methods=['POST'])
+    def reorder_itinerary_days(itinerary_id):
+        """Rearrange days by the JSON body's order of dayNumbers, dropping the rest"""
+        order = (request.get_json(silent=True) or {}).get('order')
+        return update_itinerary(itinerary_id, lambda current: reorder_days(current, order))
+
+    @app.route('/api/itinerary/<itinerary_id>/days/<int:day_number>', methods=['DELETE'])
+    def delete_itinerary_day(itinerary_id, day_number):
+        """Remove one day, shortening the trip, guarded by If-Match"""
+        return update_itinerary(itinerary_id, lambda current: drop_day(current, day_number))
+
+    @app.route('/api/itinerary/<itinerary_id>/days/extend', methods=['POST'])
+    def extend_itinerary_days(itinerary_id):
+        """Add the JSON body's count of days (default 1) to the end of an itinerary"""
+        count = (request.get_json(silent=True) or {}).get('count', 1)
+        with GENERATIONS_IN_FLIGHT.track_inprogress():
+            return update_itinerary(itinerary_id, lambda current: extend_itinerary(current, count))
+
+    def update_itinerary(itinerary_id, transform):
+        """
+        Replace a stored itinerary with transform(itinerary), guarded by If-Match
+
+        Args:
+            itinerary_id (str): Itinerary identifier
+            transform (callable): Stored itinerary -> updated copy
+
+        Returns:
+            Response: The updated itinerary with its ETag, or an error
+        """
+        try:
+            current = store.get(itinerary_id)
+        except FileNotFoundError:
+            return jsonify({"error": f"Itinerary {itinerary_id} not found"}), 404
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        expected_version, error = required_version(itinerary_id)
+        if error:
+            return error
+        # Check before spending a generation on a stale copy
+        if expected_version != '*' and expected_version != current['version']:
+            return version_conflict(current['version'])
+        
+        try:
+            itinerary_json = transform(current)
+        except KeyError as e:
+            return jsonify({"error": e.args[0]}), 404
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except LLMOverloadedError as e:
+            return overloaded(e)
+        except LLMError as e:
+            logger.warning("Generation failed: %s", e)
+            return jsonify({"error": f"Could not generate the day: {e}"}), 502
         except Exception as e:
-            print(f"❌ [API_GENERATE] Error occurred: {e}")
-            print(f"❌ [API_GENERATE] Error type: {type(e).__name__}")
+            logger.exception("Itinerary update failed")
             return jsonify({"error": str(e)}), 500
+        
+        itinerary_json.pop('version', None)
+        try:
+            version = store.save(itinerary_json, expected_version=expected_version, itinerary_id=itinerary_id)
+        except VersionConflictError as e:
+            logger.warning("Version conflict: %s", e)
+            return version_conflict(e.current_version)
+        itinerary_json['version'] = version
+        response = jsonify(itinerary_json)
+        response.headers['ETag'] = format_etag(version)
+        return response
 
     @app.route('/api/save', methods=['POST'])
     def save_itinerary():
-        """Save modified itinerary data"""
-        print("💾 [API_SAVE] Endpoint called!")
+        """Save modified itinerary data, guarded by If-Match"""
         try:
             data = request.json
-            print(f"💾 [API_SAVE] Received data keys: {list(data.keys()) if data else 'None'}")
-            print(f"💾 [API_SAVE] Data destination: {data.get('destination', 'Unknown') if data else 'None'}")
-            
-            print(f"💾 [API_SAVE] Writing to itinerary_data.json...")
-            data_path = os.path.join(os.path.dirname(__file__), 'data', 'itinerary_data.json')
-            with open(data_path, 'w') as f:
-                json.dump(data, f, indent=2)
-            
-            print(f"💾 [API_SAVE] ✅ File saved successfully!")
-            return jsonify({"success": True, "message": "Itinerary saved successfully"})
+            log_payload(logger, "Save request", data)
+            return conditional_save(data, "Itinerary saved successfully")
         except Exception as e:
-            print(f"❌ [API_SAVE] Error occurred: {e}")
+            logger.exception("Save failed")
             return jsonify({"error": str(e)}), 500
+
+    @app.route('/api/itinerary/history', methods=['GET'])
+    def list_itinerary_history():
+        """List the saved versions of the current itinerary"""
+        return jsonify({"versions": history.list_versions(DEFAULT_ITINERARY_ID)})
+
+    @app.route('/api/itinerary/history/<int:version>', methods=['GET'])
+    def get_itinerary_version(version):
+        """Serve a past version of the current itinerary"""
+        try:
+            data = history.get_version(DEFAULT_ITINERARY_ID, version)
+        except KeyError as e:
+            return jsonify({"error": str(e)}), 404
+        response = jsonify(data)
+        response.headers['ETag'] = format_etag(version)
+        return response
+
+    @app.route('/api/itinerary/history/<int:version>/restore', methods=['POST'])
+    def restore_itinerary_version(version):
+        """Make a past version the current itinerary, guarded by If-Match"""
+        logger.info("Restoring version %d", version)
+        try:
+            data = history.get_version(DEFAULT_ITINERARY_ID, version)
+        except KeyError as e:
+            return jsonify({"error": str(e)}), 404
+        data.pop('version', None)
+        return conditional_save(data, f"Itinerary restored from version {version}")
+
+    @app.route('/api/admin/export', methods=['GET'])
+    def export_itineraries():
+        """Stream every stored itinerary as NDJSON"""
+        denied = require_admin()
+        if denied:
+            return denied
+        return Response(
+            stream_with_context(iter_export_lines(store)),
+            mimetype='application/x-ndjson',
+            headers={'Content-Disposition': 'attachment; filename=itineraries.ndjson'}
+        )
+
+    @app.route('/api/admin/import', methods=['POST'])
+    def import_itineraries():
+        """Import NDJSON itineraries streamed in the request body"""
+        denied = require_admin()
+        if denied:
+            return denied
+        lines = io.TextIOWrapper(request.stream, encoding='utf-8')
+        stats = import_ndjson(
+            store, lines,
+            batch_size=request.args.get('batchSize', 500, type=int),
+            validate=validate_itinerary_dict,
+            skip_invalid=request.args.get('skipInvalid') == 'true'
+        )
+        logger.info("%d records imported at %s records/s", stats['records'], stats['recordsPerSecond'])
+        return jsonify(stats), (200 if not stats['rejected'] else 422)
+
+    @app.route('/api/admin/profiles', methods=['GET'])
+    def list_profiled_requests():
+        """List profiled requests, slowest first"""
+        denied = require_admin()
+        if denied:
+            return denied
+        return jsonify({"profiles": list_profiles(request.args.get('limit', 20, type=int))})
+
+    @app.route('/api/admin/profiles/<profile_file>', methods=['GET'])
+    def download_profile(profile_file):
+        """Download a profile's .pstats or .collapsed file"""
+        denied = require_admin()
+        if denied:
+            return denied
+        try:
+            return send_file(profile_path(profile_file), as_attachment=True)
+        except FileNotFoundError:
+            return jsonify({"error": f"Profile {profile_file} not found"}), 404
+
+    def is_admin_request():
+        admin_token = os.getenv('ADMIN_TOKEN')
+        return bool(admin_token) and request.headers.get('X-Admin-Token') == admin_token
+
+    def require_admin():
+        """Reject the request unless it carries the ADMIN_TOKEN"""
+        if not os.getenv('ADMIN_TOKEN'):
+            return jsonify({"error": "Admin endpoints are disabled (ADMIN_TOKEN is not set)"}), 403
+        if not is_admin_request():
+            return jsonify({"error": "Invalid admin token"}), 401
+        return None
+
+    def overloaded(error):
+        response = jsonify({"error": "Itinerary generation is busy, please retry shortly"})
+        response.headers['Retry-After'] = str(retry_after_seconds(error))
+        return response, 503
+
+    def required_version(itinerary_id=DEFAULT_ITINERARY_ID):
+        """
+        Version named by the request's If-Match header
+
+        Returns:
+            tuple: (expected version, None), or (None, error response)
+        """
+        if_match = request.headers.get('If-Match')
+        if not if_match:
+            return None, (jsonify({
+                "error": "If-Match header with the itinerary version is required",
+                "currentVersion": store.get_version(itinerary_id)
+            }), 428)
+        try:
+            return parse_if_match(if_match), None
+        except ValueError:
+            return None, (jsonify({"error": f"Invalid If-Match header: {if_match}"}), 400)
+
+    def version_conflict(current_version):
+        response = jsonify({
+            "error": "Itinerary was modified by another save",
+            "currentVersion": current_version
+        })
+        response.headers['ETag'] = format_etag(current_version)
+        return response, 409
+
+    def conditional_save(data, message):
+        """Save data over the version named by the request's If-Match header"""
+        expected_version, error = required_version()
+        if error:
+            return error
+        
+        try:
+            version = store.save(data, expected_version=expected_version)
+        except VersionConflictError as e:
+            logger.warning("Version conflict: %s", e)
+            return version_conflict(e.current_version)
+        
+        logger.info("Itinerary saved as version %d", version)
+        response = jsonify({
+            "success": True,
+            "message": message,
+            "version": version
+        })
+        response.headers['ETag'] = format_etag(version)
+        return response
     
     return app
 
@@ -142,4 +413,5 @@ def run_server():
 
 
 if __name__ == '__main__':
+    # Run as a module from the project root: python -m backend.main
     run_server()
\ No newline at end of file
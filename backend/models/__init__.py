@@ -8,11 +8,15 @@ Contains classes and structures for representing:
 - Location data
 """
 
-from .itinerary_models import Itinerary, Activity, DayPlan, Location
+from .itinerary_models import (
+    Itinerary, Activity, DayPlan, Location, validate_itinerary_dict, itinerary_response_schema
+)
 
 __all__ = [
     'Itinerary',
     'Activity', 
     'DayPlan',
-    'Location'
+    'Location',
+    'validate_itinerary_dict',
+    'itinerary_response_schema'
 ]
\ No newline at end of file
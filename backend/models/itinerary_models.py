@@ -39,6 +39,18 @@ class Activity:
             "duration": self.duration,
             "type": self.activity_type
         }
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Activity':
+        """Create Activity from the dictionary format produced by to_dict"""
+        return cls(
+            id=data.get("id", ""),
+            name=data.get("activity", data.get("name", "")),
+            description=data.get("description", ""),
+            time=data.get("time", ""),
+            duration=data.get("duration"),
+            activity_type=data.get("type", data.get("activity_type", "general"))
+        )
 
 
 @dataclass
@@ -89,9 +101,9 @@ class Itinerary:
         """Create Itinerary instance from dictionary data"""
         days = []
         for day_data in data.get("days", []):
-            morning = [Activity(**act) for act in day_data["periods"].get("morning", [])]
-            afternoon = [Activity(**act) for act in day_data["periods"].get("afternoon", [])]
-            evening = [Activity(**act) for act in day_data["periods"].get("evening", [])]
+            morning = [Activity.from_dict(act) for act in day_data["periods"].get("morning", [])]
+            afternoon = [Activity.from_dict(act) for act in day_data["periods"].get("afternoon", [])]
+            evening = [Activity.from_dict(act) for act in day_data["periods"].get("evening", [])]
             
             day_plan = DayPlan(
                 day_number=day_data["dayNumber"],
@@ -103,7 +115,7 @@ class Itinerary:
             days.append(day_plan)
         
         additional_activities = [
-            Activity(**act) for act in data.get("additionalActivities", [])
+            Activity.from_dict(act) for act in data.get("additionalActivities", [])
         ]
         
         return cls(
@@ -119,4 +131,101 @@ class Itinerary:
     
     def get_duration_days(self) -> int:
         """Get number of days in itinerary"""
-        return len(self.days)
\ No newline at end of file
+        return len(self.days)
+
+PERIOD_NAMES = ("morning", "afternoon", "evening")
+
+
+def validate_itinerary_dict(data: dict) -> List[str]:
+    """
+    Check that a dictionary matches the frontend itinerary JSON format
+
+    Args:
+        data (dict): Itinerary data as stored and served by the API
+
+    Returns:
+        List[str]: Human-readable problems, empty if the data is valid
+    """
+    if not isinstance(data, dict):
+        return ["itinerary must be an object"]
+
+    errors = []
+    if not isinstance(data.get("destination"), str):
+        errors.append("destination must be a string")
+    if not isinstance(data.get("startDate"), str):
+        errors.append("startDate must be a string")
+
+    days = data.get("days")
+    if not isinstance(days, list):
+        errors.append("days must be a list")
+        days = []
+    for index, day in enumerate(days):
+        where = f"days[{index}]"
+        if not isinstance(day, dict):
+            errors.append(f"{where} must be an object")
+            continue
+        if not isinstance(day.get("dayNumber"), int):
+            errors.append(f"{where}.dayNumber must be an integer")
+        periods = day.get("periods")
+        if not isinstance(periods, dict):
+            errors.append(f"{where}.periods must be an object")
+            continue
+        for period in PERIOD_NAMES:
+            activities = periods.get(period, [])
+            if not isinstance(activities, list):
+                errors.append(f"{where}.periods.{period} must be a list")
+                continue
+            for position, activity in enumerate(activities):
+                if not isinstance(activity, dict) or not isinstance(activity.get("activity"), str):
+                    errors.append(f"{where}.periods.{period}[{position}].activity must be a string")
+
+    additional = data.get("additionalActivities", [])
+    if not isinstance(additional, list):
+        errors.append("additionalActivities must be a list")
+
+    return errors
+
+
+def _object_schema(properties: Dict[str, dict], required: List[str]) -> dict:
+    return {"type": "object", "properties": properties, "required": required}
+
+
+def itinerary_response_schema() -> dict:
+    """
+    Response schema for structured LLM output, matching Itinerary.to_dict
+
+    Uses the OpenAPI subset accepted by Gemini's response_schema.
+
+    Returns:
+        dict: Schema of the frontend itinerary JSON
+    """
+    string = {"type": "string"}
+    # Keys emitted by Activity.to_dict that the model must fill in
+    scheduled_activity = _object_schema(
+        {"id": string, "time": string, "activity": string, "description": string},
+        ["time", "activity", "description"]
+    )
+    additional_activity = _object_schema(
+        {"id": string, "activity": string, "description": string, "duration": string, "type": string},
+        ["activity", "description", "duration"]
+    )
+    day_plan = _object_schema(
+        {
+            "dayNumber": {"type": "integer"},
+            "date": string,
+            "periods": _object_schema(
+                {period: {"type": "array", "items": scheduled_activity} for period in PERIOD_NAMES},
+                list(PERIOD_NAMES)
+            )
+        },
+        ["dayNumber", "date", "periods"]
+    )
+    return _object_schema(
+        {
+            "destination": string,
+            "startDate": string,
+            "days": {"type": "array", "items": day_plan},
+            "additionalActivities": {"type": "array", "items": additional_activity}
+        },
+        ["destination", "startDate", "days", "additionalActivities"]
+    )
@@ -0,0 +1,110 @@
+"""
+Observability for the WanderTrip backend
+
+Contains helpers for:
+- Per-stage latency histograms, counters and gauges
+- Prometheus text export for the /metrics endpoint
+- Leveled, non-blocking logging with per-request context
+- Per-request trace spans and Server-Timing headers
+- Opt-in cProfile / stack-sampling profiles of single requests
+"""
+
+from .metrics import (
+    render_metrics,
+    time_stage,
+    timed_stage,
+    CONTENT_TYPE,
+    STAGE_SECONDS,
+    CACHE_LOOKUPS,
+    FALLBACKS,
+    GENERATIONS_IN_FLIGHT,
+    HTTP_REQUEST_SECONDS,
+    LLM_OUTPUT_PARSES,
+    PROMPT_TOKENS,
+    PROMPT_TRIMS,
+    LLM_TOKENS,
+    LLM_CONCURRENCY_LIMIT,
+    LLM_QUEUE_DEPTH,
+    LLM_SHED,
+    LLM_CIRCUIT_STATE,
+    LLM_TIER_RESULTS,
+    LLM_ESCALATIONS,
+    GENERATION_SECONDS,
+    LLM_HEDGES,
+    LLM_HEDGE_DELAY,
+    TEMPLATE_LOOKUPS,
+    TEMPLATE_BUILDS
+)
+from .log import (
+    get_logger,
+    configure_logging,
+    shutdown_logging,
+    log_payload,
+    new_request_id,
+    request_context,
+    bind_request_context,
+    current_request_context
+)
+from .tracing import (
+    Trace,
+    span,
+    start_trace,
+    finish_trace,
+    traced_request,
+    current_trace,
+    parse_traceparent
+)
+from .profiling import (
+    PROFILE_HEADER,
+    RequestProfiler,
+    should_profile,
+    list_profiles,
+    profile_path
+)
+
+__all__ = [
+    'render_metrics',
+    'time_stage',
+    'timed_stage',
+    'CONTENT_TYPE',
+    'STAGE_SECONDS',
+    'CACHE_LOOKUPS',
+    'FALLBACKS',
+    'GENERATIONS_IN_FLIGHT',
+    'HTTP_REQUEST_SECONDS',
+    'LLM_OUTPUT_PARSES',
+    'PROMPT_TOKENS',
+    'PROMPT_TRIMS',
+    'LLM_TOKENS',
+    'LLM_CONCURRENCY_LIMIT',
+    'LLM_QUEUE_DEPTH',
+    'LLM_SHED',
+    'LLM_CIRCUIT_STATE',
+    'LLM_TIER_RESULTS',
+    'LLM_ESCALATIONS',
+    'GENERATION_SECONDS',
+    'LLM_HEDGES',
+    'LLM_HEDGE_DELAY',
+    'TEMPLATE_LOOKUPS',
+    'TEMPLATE_BUILDS',
+    'get_logger',
+    'configure_logging',
+    'shutdown_logging',
+    'log_payload',
+    'new_request_id',
+    'request_context',
+    'bind_request_context',
+    'current_request_context',
+    'Trace',
+    'span',
+    'start_trace',
+    'finish_trace',
+    'traced_request',
+    'current_trace',
+    'parse_traceparent',
+    'PROFILE_HEADER',
+    'RequestProfiler',
+    'should_profile',
+    'list_profiles',
+    'profile_path'
+]
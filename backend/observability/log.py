@@ -0,0 +1,208 @@
+"""
+Structured logging for WanderTrip
+Leveled loggers with per-request context and a queue-based background writer
+"""
+
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+import uuid
+from contextlib import contextmanager
+
+
+# Root of every backend logger; handlers are attached here only
+ROOT_LOGGER_NAME = "wandertrip"
+
+# Fields of the current request, attached to every record logged while it runs
+_request_context = contextvars.ContextVar("wandertrip_request_context", default={})
+
+_listener = None
+_configure_lock = threading.Lock()
+
+# Attributes every LogRecord has; anything else was passed via extra=
+_STANDARD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "context"}
+
+
+def get_logger(name):
+    """
+    Get a logger under the wandertrip hierarchy
+
+    Args:
+        name (str): Module name, e.g. __name__
+
+    Returns:
+        logging.Logger: Logger whose records go through the background writer
+    """
+    if name.startswith("backend."):
+        name = name[len("backend."):]
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}")
+
+
+def new_request_id():
+    return uuid.uuid4().hex[:16]
+
+
+@contextmanager
+def request_context(**fields):
+    """
+    Attach fields (request_id, destination, ...) to records logged in the block
+
+    Works across threads and asyncio tasks because it is a context variable.
+    """
+    token = _request_context.set({**_request_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _request_context.reset(token)
+
+
+def bind_request_context(**fields):
+    """Add fields to the current request's context without a block"""
+    _request_context.set({**_request_context.get(), **fields})
+
+
+def current_request_context():
+    return _request_context.get()
+
+
+class _ContextFilter(logging.Filter):
+    """Snapshot the request context onto the record in the calling thread"""
+
+    def filter(self, record):
+        record.context = _request_context.get()
+        return True
+
+
+# Argument types that cannot change between the log call and the listener
+_IMMUTABLE_ARG_TYPES = (str, bytes, int, float, complex, type(None))
+
+
+def _is_immutable(value):
+    if isinstance(value, (tuple, frozenset)):
+        return all(_is_immutable(item) for item in value)
+    return isinstance(value, _IMMUTABLE_ARG_TYPES)
+
+
+class _DeferredFormattingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread
+
+    The stock QueueHandler merges msg % args (and any traceback) on the
+    logging thread; here the record is enqueued as is, so the request
+    thread only pays for creating the record and a queue put. Records
+    whose args could be mutated before the listener gets to them (dicts,
+    lists, arbitrary objects) are still formatted on the spot.
+    """
+
+    def prepare(self, record):
+        args = record.args
+        if isinstance(args, dict):
+            args = tuple(args.values())
+        if args and not _is_immutable(args):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with level, logger, message, context and extras"""
+
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "context", {}))
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines for local development"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        context = getattr(record, "context", {})
+        if context:
+            line += " [" + " ".join(f"{key}={value}" for key, value in context.items()) + "]"
+        return line
+
+
+def configure_logging(level=None, fmt=None, stream=None):
+    """
+    Send backend logs through a background thread; safe to call repeatedly
+
+    Args:
+        level (str): Minimum level (default: LOG_LEVEL env var, then INFO)
+        fmt (str): 'json' or 'text' (default: LOG_FORMAT env var, then text)
+        stream: Output stream for the writer (default: stderr)
+    """
+    global _listener
+    with _configure_lock:
+        root = logging.getLogger(ROOT_LOGGER_NAME)
+        root.setLevel((level or os.getenv("LOG_LEVEL", "INFO")).upper())
+        if _listener is not None:
+            return
+
+        fmt = fmt or os.getenv("LOG_FORMAT", "text")
+        output = logging.StreamHandler(stream)
+        output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+        log_queue = queue.SimpleQueue()
+        handler = _DeferredFormattingQueueHandler(log_queue)
+        handler.addFilter(_ContextFilter())
+        root.addHandler(handler)
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+
+
+def shutdown_logging():
+    """Flush queued records and stop the background writer"""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def _payload_sample_rate():
+    return float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.01"))
+
+
+def log_payload(logger, message, payload, limit=2000, sample_rate=None):
+    """
+    Log a request/response payload at DEBUG for a sample of calls
+
+    Args:
+        logger (logging.Logger): Logger to write to
+        message (str): Description of the payload
+        payload: Object or text to log; truncated to limit characters
+        limit (int): Maximum characters of payload to keep
+        sample_rate (float): Fraction of calls to log (default:
+            LOG_PAYLOAD_SAMPLE_RATE env var, then 0.01)
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    rate = _payload_sample_rate() if sample_rate is None else sample_rate
+    if rate < 1 and random.random() >= rate:
+        return
+    text = payload if isinstance(payload, str) else json.dumps(payload, default=str)
+    if len(text) > limit:
+        text = text[:limit] + f"... ({len(text) - limit} more chars)"
+    logger.debug("%s: %s", message, text)
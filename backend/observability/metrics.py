@@ -0,0 +1,365 @@
+"""
+Metrics for WanderTrip
+Counters, gauges and histograms exported in Prometheus text format
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+
+from .tracing import span
+
+
+# Latency buckets (seconds) spanning cache hits to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80)
+
+
+def _format_labels(labelnames, labelvalues, extra=None):
+    pairs = list(zip(labelnames, labelvalues))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for name, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Base for metrics with optional labels; children are created once per label set"""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._children_lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._new_child()
+
+    def labels(self, *labelvalues):
+        """Get the child metric for one combination of label values"""
+        child = self._children.get(labelvalues)
+        if child is None:
+            with self._children_lock:
+                child = self._children.setdefault(labelvalues, self._new_child())
+        return child
+
+    def _samples(self):
+        if not self.labelnames:
+            yield (), self._default
+        else:
+            for labelvalues, child in list(self._children.items()):
+                yield labelvalues, child
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for labelvalues, child in self._samples():
+            lines.extend(child.render(self.name, self.labelnames, labelvalues))
+        return "\n".join(lines)
+
+
+class _CounterChild:
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    def render(self, name, labelnames, labelvalues):
+        yield f"{name}{_format_labels(labelnames, labelvalues)} {_format_value(self._value)}"
+
+
+class _GaugeChild(_CounterChild):
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def set(self, value):
+        with self._lock:
+            self._value = value
+
+    @contextmanager
+    def track_inprogress(self):
+        """Increment while the block runs"""
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self._buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    @contextmanager
+    def time(self):
+        """Observe the duration of the block in seconds"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def render(self, name, labelnames, labelvalues):
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        cumulative = 0
+        for bound, count in zip(self._buckets + (float("inf"),), counts):
+            cumulative += count
+            labels = _format_labels(labelnames, labelvalues, ("le", _format_value(float(bound))))
+            yield f"{name}_bucket{labels} {cumulative}"
+        labels = _format_labels(labelnames, labelvalues)
+        yield f"{name}_sum{labels} {_format_value(total)}"
+        yield f"{name}_count{labels} {cumulative}"
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self._default.inc(amount)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def inc(self, amount=1):
+        self._default.inc(amount)
+
+    def dec(self, amount=1):
+        self._default.dec(amount)
+
+    def set(self, value):
+        self._default.set(value)
+
+    def track_inprogress(self):
+        return self._default.track_inprogress()
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets"""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+
+class Registry:
+    """Collection of metrics rendered together at /metrics"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        """Render every metric in Prometheus text exposition format 0.0.4"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def counter(name, documentation, labelnames=()):
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name, documentation, labelnames=()):
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+def render_metrics():
+    """Current metrics of this process as Prometheus text"""
+    return REGISTRY.render()
+
+
+# ----------------------------------------------------------------------
+# Generation pipeline metrics
+# ----------------------------------------------------------------------
+
+STAGE_SECONDS = histogram(
+    "wandertrip_stage_duration_seconds",
+    "Time spent in each itinerary generation stage",
+    labelnames=("stage",)
+)
+CACHE_LOOKUPS = counter(
+    "wandertrip_cache_lookups_total",
+    "Lookups in in-process caches by result",
+    labelnames=("cache", "result")
+)
+FALLBACKS = counter(
+    "wandertrip_fallbacks_total",
+    "Times a stage fell back to static data or an error itinerary",
+    labelnames=("kind",)
+)
+GENERATIONS_IN_FLIGHT = gauge(
+    "wandertrip_generations_in_flight",
+    "Itinerary generations currently running"
+)
+LLM_OUTPUT_PARSES = counter(
+    "wandertrip_llm_output_parses_total",
+    "Parses of LLM output by result (clean, repaired, failed)",
+    labelnames=("result",)
+)
+# Token counts rarely fit the latency buckets
+TOKEN_BUCKETS = (100, 250, 500, 750, 1000, 1500, 2000, 3000, 4000, 6000, 8000, 12000, 16000)
+PROMPT_TOKENS = histogram(
+    "wandertrip_prompt_tokens_estimated",
+    "Estimated input tokens of each built prompt, after budget trimming",
+    buckets=TOKEN_BUCKETS
+)
+PROMPT_TRIMS = counter(
+    "wandertrip_prompt_trims_total",
+    "Prompts shrunk to fit LLM_PROMPT_TOKEN_BUDGET by step (schema, pois, over_budget)",
+    labelnames=("step",)
+)
+LLM_TOKENS = histogram(
+    "wandertrip_llm_tokens",
+    "Tokens per generation from the provider's usage metadata",
+    labelnames=("provider", "direction"),
+    buckets=TOKEN_BUCKETS
+)
+LLM_CONCURRENCY_LIMIT = gauge(
+    "wandertrip_llm_concurrency_limit",
+    "Current adaptive concurrency limit for LLM calls",
+    labelnames=("provider",)
+)
+LLM_QUEUE_DEPTH = gauge(
+    "wandertrip_llm_queue_depth",
+    "LLM calls waiting for a concurrency slot",
+    labelnames=("provider",)
+)
+LLM_SHED = counter(
+    "wandertrip_llm_shed_total",
+    "LLM calls rejected before reaching the provider (queue_full, deadline, circuit_open)",
+    labelnames=("provider", "reason")
+)
+LLM_CIRCUIT_STATE = gauge(
+    "wandertrip_llm_circuit_state",
+    "LLM circuit breaker state (0 closed, 1 half-open, 2 open)",
+    labelnames=("provider",)
+)
+LLM_TIER_RESULTS = counter(
+    "wandertrip_llm_tier_results_total",
+    "Generation attempts per model tier by result (accepted, escalated, exhausted, kept, error)",
+    labelnames=("model", "result")
+)
+LLM_ESCALATIONS = counter(
+    "wandertrip_llm_escalations_total",
+    "Escalations to the next model tier by the tier left and the failed check",
+    labelnames=("model", "reason")
+)
+GENERATION_SECONDS = histogram(
+    "wandertrip_llm_generation_seconds",
+    "Time from the first tier's call to the returned itinerary, by the tier that answered",
+    labelnames=("model",)
+)
+LLM_HEDGES = counter(
+    "wandertrip_llm_hedges_total",
+    "Hedged LLM calls by result (fired, won, lost, over_budget, shed)",
+    labelnames=("model", "result")
+)
+LLM_HEDGE_DELAY = gauge(
+    "wandertrip_llm_hedge_delay_seconds",
+    "Latency quantile after which a call to the model is hedged",
+    labelnames=("model",)
+)
+TEMPLATE_LOOKUPS = counter(
+    "wandertrip_template_lookups_total",
+    "Generations checked against precomputed templates by result (hit, stale, missing, mismatch, unmatched)",
+    labelnames=("result",)
+)
+TEMPLATE_BUILDS = counter(
+    "wandertrip_template_builds_total",
+    "Template generations by result (stored, rejected, error)",
+    labelnames=("result",)
+)
+HTTP_REQUEST_SECONDS = histogram(
+    "wandertrip_http_request_duration_seconds",
+    "API request latency by endpoint and status code",
+    labelnames=("endpoint", "method", "status")
+)
+
+
+@contextmanager
+def time_stage(stage):
+    """Context manager timing one pipeline stage, also traced as a span"""
+    with span(stage), STAGE_SECONDS.labels(stage).time():
+        yield
+
+
+def timed_stage(stage):
+    """Decorator timing every call of a function as a pipeline stage"""
+    def decorator(func):
+        child = STAGE_SECONDS.labels(stage)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    child.observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
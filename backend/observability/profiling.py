@@ -0,0 +1,213 @@
+"""
+On-demand request profiling for WanderTrip
+cProfile or stack-sampling profiles of single requests, kept in a rotating directory
+"""
+
+import cProfile
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+# Per-request opt-in header; honoured only with a valid admin token
+PROFILE_HEADER = "X-Profile"
+
+DEFAULT_PROFILE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "profiles")
+DEFAULT_KEEP = 200
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+
+def profile_dir():
+    return os.getenv("PROFILE_DIR", DEFAULT_PROFILE_DIR)
+
+
+def should_profile(header_value, is_admin):
+    """
+    Decide whether to profile the current request
+
+    Args:
+        header_value (str): Value of the X-Profile header, if any
+        is_admin (bool): Whether the request carries a valid admin token
+
+    Returns:
+        str: Profiler to use ('cprofile' or 'sample'), or None
+    """
+    if header_value and is_admin:
+        mode = header_value.strip().lower()
+        return mode if mode in ("cprofile", "sample") else os.getenv("PROFILE_MODE", "cprofile")
+    rate = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+    if rate > 0 and random.random() < rate:
+        return os.getenv("PROFILE_MODE", "cprofile")
+    return None
+
+
+class _StackSampler:
+    """Samples one thread's stack on a timer and counts collapsed stacks"""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="wandertrip-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+
+    def collapsed(self):
+        """Stacks in the collapsed format read by flamegraph.pl and speedscope"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class RequestProfiler:
+    """
+    Profile one request handled on the calling thread
+
+    Args:
+        mode (str): 'cprofile' for deterministic profiling or 'sample' for
+            a low-overhead stack sampler
+        method (str): HTTP method, stored with the profile
+        endpoint (str): Route being profiled, stored with the profile
+        request_id (str): Request id used in the file names
+    """
+
+    def __init__(self, mode, method, endpoint, request_id):
+        self.mode = mode
+        self.method = method
+        self.endpoint = endpoint
+        self.request_id = request_id
+        self._profiler = None
+        self._sampler = None
+
+    def start(self):
+        self.started_wall = time.time()
+        self.started = time.perf_counter()
+        if self.mode == "sample":
+            interval = float(os.getenv("PROFILE_SAMPLE_INTERVAL", DEFAULT_SAMPLE_INTERVAL))
+            self._sampler = _StackSampler(threading.get_ident(), interval)
+            self._sampler.start()
+        else:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    def stop(self, status=None):
+        """
+        Stop profiling and write the profile files
+
+        Args:
+            status (int): Response status code, stored with the profile
+
+        Returns:
+            dict: Metadata of the written profile
+        """
+        duration = time.perf_counter() - self.started
+        if self._profiler is not None:
+            self._profiler.disable()
+        if self._sampler is not None:
+            self._sampler.stop()
+
+        directory = profile_dir()
+        os.makedirs(directory, exist_ok=True)
+        name = time.strftime("%Y%m%dT%H%M%S", time.gmtime(self.started_wall)) + f"-{self.request_id}"
+        if self._profiler is not None:
+            profile_file = name + ".pstats"
+            self._profiler.dump_stats(os.path.join(directory, profile_file))
+        else:
+            profile_file = name + ".collapsed"
+            with open(os.path.join(directory, profile_file), "w", encoding="utf-8") as f:
+                f.write(self._sampler.collapsed())
+
+        meta = {
+            "id": name,
+            "requestId": self.request_id,
+            "method": self.method,
+            "endpoint": self.endpoint,
+            "status": status,
+            "mode": self.mode,
+            "durationMs": round(duration * 1000, 2),
+            "startedAt": self.started_wall,
+            "file": profile_file
+        }
+        with open(os.path.join(directory, name + ".json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        _rotate(directory, int(os.getenv("PROFILE_KEEP", DEFAULT_KEEP)))
+        return meta
+
+
+def _read_profiles(directory):
+    profiles = []
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return profiles
+    for filename in names:
+        if not filename.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, filename), encoding="utf-8") as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue  # being written or rotated away concurrently
+    return profiles
+
+
+def _rotate(directory, keep):
+    """Delete the oldest profiles beyond the newest keep"""
+    profiles = sorted(_read_profiles(directory), key=lambda meta: meta["startedAt"])
+    for meta in profiles[:max(0, len(profiles) - keep)]:
+        for filename in (meta["id"] + ".json", meta["file"]):
+            try:
+                os.remove(os.path.join(directory, filename))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles(limit=20):
+    """
+    Profiled requests, slowest first
+
+    Args:
+        limit (int): Maximum number of profiles to return
+
+    Returns:
+        list: Profile metadata dicts
+    """
+    profiles = _read_profiles(profile_dir())
+    profiles.sort(key=lambda meta: meta["durationMs"], reverse=True)
+    return profiles[:limit]
+
+
+def profile_path(profile_file):
+    """
+    Path of a profile data file in the profile directory
+
+    Raises:
+        FileNotFoundError: If the name is not a profile file in the directory
+    """
+    directory = profile_dir()
+    if os.path.basename(profile_file) != profile_file or not profile_file.endswith((".pstats", ".collapsed")):
+        raise FileNotFoundError(profile_file)
+    path = os.path.join(directory, profile_file)
+    if not os.path.isfile(path):
+        raise FileNotFoundError(profile_file)
+    return path
@@ -0,0 +1,291 @@
+"""
+Request tracing for WanderTrip
+Per-request spans, Server-Timing headers and an optional JSONL trace file
+"""
+
+import contextvars
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# Trace of the request being handled and the innermost open span
+_current_trace = contextvars.ContextVar("wandertrip_trace", default=None)
+_current_span_id = contextvars.ContextVar("wandertrip_span_id", default=None)
+
+# W3C trace context: version-traceid-parentid-flags
+_TRACEPARENT = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-[0-9a-f]{16}-[0-9a-f]{2}$")
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _new_span_id():
+    # Span ids only need to be unique within a trace; uuid4 is ~4x slower
+    return f"{random.getrandbits(64):016x}"
+
+
+def parse_traceparent(header):
+    """
+    Trace id carried by a W3C traceparent header
+
+    Args:
+        header (str): traceparent header value, or None
+
+    Returns:
+        str: 32 hex digit trace id, or None if absent or malformed
+    """
+    if not header:
+        return None
+    match = _TRACEPARENT.match(header.strip().lower())
+    if not match or match.group(1) == "0" * 32:
+        return None
+    return match.group(1)
+
+
+class Trace:
+    """Spans recorded while handling one request"""
+
+    def __init__(self, name, trace_id=None):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.root_span_id = _new_span_id()
+        self.name = name
+        self.started_wall = time.time()
+        self.started = time.perf_counter()
+        self.finished = None
+        self.thread_id = threading.get_ident()
+        # list.append is atomic, so spans from offload threads need no lock
+        self.spans = []
+
+    def add(self, name, span_id, parent_id, started, ended, attributes):
+        self.spans.append((name, span_id, parent_id, started, ended,
+                           threading.get_ident(), attributes))
+
+    def duration(self):
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return end - self.started
+
+    def traceparent(self):
+        return f"00-{self.trace_id}-{self.root_span_id}-01"
+
+    def server_timing(self):
+        """
+        Server-Timing header value: total time plus time per span name
+
+        Spans sharing a name (e.g. two geocode calls) are summed.
+        """
+        totals = {}
+        for name, _, _, started, ended, _, _ in self.spans:
+            totals[name] = totals.get(name, 0.0) + (ended - started)
+        parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in totals.items()]
+        parts.append(f"total;dur={self.duration() * 1000:.1f}")
+        return ", ".join(parts)
+
+    def to_records(self):
+        """Spans as dicts with wall-clock start and duration in microseconds"""
+        def record(name, span_id, parent_id, started, ended, thread_id, attributes):
+            entry = {
+                "traceId": self.trace_id,
+                "spanId": span_id,
+                "parentId": parent_id,
+                "name": name,
+                "startUs": int((self.started_wall + started - self.started) * 1e6),
+                "durUs": int((ended - started) * 1e6),
+                "tid": thread_id
+            }
+            if attributes:
+                entry["attributes"] = attributes
+            return entry
+
+        root = record(self.name, self.root_span_id, None, self.started,
+                      self.started + self.duration(), self.thread_id, None)
+        return [root] + [record(*span) for span in self.spans]
+
+
+class span:
+    """
+    Context manager recording a span in the current request's trace
+
+    Outside a traced request it does nothing beyond a context variable
+    lookup, so library code can open spans unconditionally.
+
+    Args:
+        name (str): Span name, e.g. the pipeline stage
+        **attributes: Extra fields stored with the span
+    """
+
+    __slots__ = ("name", "attributes", "trace", "span_id", "parent_id", "token", "started")
+
+    def __init__(self, name, **attributes):
+        self.name = name
+        self.attributes = attributes
+        self.trace = None
+
+    def __enter__(self):
+        trace = _current_trace.get()
+        if trace is None:
+            return self
+        self.trace = trace
+        self.span_id = _new_span_id()
+        self.parent_id = _current_span_id.get() or trace.root_span_id
+        self.token = _current_span_id.set(self.span_id)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.trace is None:
+            return False
+        ended = time.perf_counter()
+        _current_span_id.reset(self.token)
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        self.trace.add(self.name, self.span_id, self.parent_id, self.started, ended, self.attributes)
+        return False
+
+
+def start_trace(name, trace_id=None):
+    """
+    Begin tracing the current request
+
+    Args:
+        name (str): Name of the root span, e.g. "POST /api/generate"
+        trace_id (str): Trace id propagated from the caller (default: new)
+
+    Returns:
+        tuple: (Trace, token to pass to finish_trace)
+    """
+    trace = Trace(name, trace_id)
+    return trace, _current_trace.set(trace)
+
+
+def finish_trace(trace, token):
+    """End a trace started with start_trace and queue it for the trace file"""
+    trace.finished = time.perf_counter()
+    _current_trace.reset(token)
+    writer = _get_writer()
+    if writer is not None:
+        writer.put(trace)
+
+
+@contextmanager
+def traced_request(name, trace_id=None):
+    """Trace the block as one request; yields the Trace"""
+    trace, token = start_trace(name, trace_id)
+    try:
+        yield trace
+    finally:
+        finish_trace(trace, token)
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+class _TraceFileWriter:
+    """Appends finished traces to a JSONL file from a background thread"""
+
+    def __init__(self, path):
+        self.path = path
+        self.queue = queue.SimpleQueue()
+        thread = threading.Thread(target=self._run, name="wandertrip-trace-writer", daemon=True)
+        thread.start()
+
+    def put(self, trace):
+        self.queue.put(trace)
+
+    def _run(self):
+        while True:
+            traces = [self.queue.get()]
+            # Drain whatever else is waiting so a burst costs one write
+            while True:
+                try:
+                    traces.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            lines = [json.dumps(record) for trace in traces for record in trace.to_records()]
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+            except OSError:
+                pass  # tracing must never take the API down
+
+
+def _get_writer():
+    """Writer for TRACE_FILE, created on first use; None when unset"""
+    global _writer
+    path = os.getenv("TRACE_FILE")
+    if not path:
+        return None
+    if _writer is None or _writer.path != path:
+        with _writer_lock:
+            if _writer is None or _writer.path != path:
+                _writer = _TraceFileWriter(path)
+    return _writer
+
+
+def to_chrome_trace(records):
+    """
+    Convert trace file records to Chrome trace event format
+
+    The result loads in Perfetto (ui.perfetto.dev) or chrome://tracing as
+    one flame-style timeline per trace.
+
+    Args:
+        records (iterable): Dicts as written to the trace file
+
+    Returns:
+        dict: {"traceEvents": [...]}
+    """
+    events = []
+    process_ids = {}
+    for record in records:
+        pid = process_ids.setdefault(record["traceId"], len(process_ids) + 1)
+        if record["parentId"] is None:
+            events.append({"ph": "M", "name": "process_name", "pid": pid,
+                           "args": {"name": f"{record['name']} {record['traceId'][:8]}"}})
+        events.append({
+            "ph": "X",
+            "name": record["name"],
+            "ts": record["startUs"],
+            "dur": record["durUs"],
+            "pid": pid,
+            "tid": record["tid"],
+            "args": {"spanId": record["spanId"], **record.get("attributes", {})}
+        })
+    return {"traceEvents": events}
+
+
+def main(argv=None):
+    """Command line entry point: convert a trace file for a timeline viewer"""
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(
+        description="Convert a WanderTrip JSONL trace file to Chrome trace event JSON"
+    )
+    parser.add_argument("trace_file", help="File written via TRACE_FILE")
+    parser.add_argument("--trace-id", help="Only include this trace")
+    parser.add_argument("--output", "-o", help="Output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    with open(args.trace_file, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    if args.trace_id:
+        records = [record for record in records if record["traceId"] == args.trace_id]
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        json.dump(to_chrome_trace(records), output)
+    finally:
+        if args.output:
+            output.close()
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
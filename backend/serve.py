@@ -0,0 +1,70 @@
+"""
+WanderTrip server launcher
+Runs the API either on Flask's dev server or as a multi-worker ASGI service
+"""
+
+import argparse
+import os
+
+
+def build_parser():
+    """Command-line options shared by main.py and python -m backend.serve"""
+    parser = argparse.ArgumentParser(description="Run the WanderTrip API server")
+    parser.add_argument("--mode", choices=["dev", "asgi"], default=os.getenv("SERVER_MODE", "dev"),
+                        help="dev: Flask debug server; asgi: FastAPI under uvicorn (default: dev)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", 1)),
+                        help="ASGI worker processes (default: WEB_CONCURRENCY or 1)")
+    parser.add_argument("--offload-threads", type=int, default=None,
+                        help="Threads per worker for blocking calls (default: 256)")
+    parser.add_argument("--data-dir", default=None, help="Itinerary data directory")
+    parser.add_argument("--log-level", default="info")
+    return parser
+
+
+def run(args):
+    """
+    Start the server described by parsed command-line options
+
+    Args:
+        args (argparse.Namespace): Options from build_parser()
+    """
+    # Passed through the environment so every uvicorn worker process sees them
+    if args.data_dir:
+        os.environ["ITINERARY_DATA_DIR"] = args.data_dir
+    if args.offload_threads:
+        os.environ["OFFLOAD_THREADS"] = str(args.offload_threads)
+
+    # One refresher for the whole server: here in the launcher, never in the
+    # app factories, which run once per uvicorn worker. Flask's reloader
+    # re-runs this function in its serving child, marked by WERKZEUG_RUN_MAIN.
+    if os.environ.get("WERKZEUG_RUN_MAIN") != "true":
+        from .itinerary_templates import start_template_refresher
+        start_template_refresher()
+
+    if args.mode == "dev":
+        from .main import create_app
+        app = create_app()
+        app.run(debug=True, port=args.port, host=args.host)
+        return
+
+    import uvicorn
+    uvicorn.run(
+        "backend.asgi:create_asgi_app",
+        factory=True,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level=args.log_level,
+        # Access logs go through a lock on stdout for every request
+        access_log=False
+    )
+
+
+def main(argv=None):
+    run(build_parser().parse_args(argv))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Storage layer for WanderTrip itineraries
+
+Contains components for:
+- Versioned, file-backed itinerary documents
+- Optimistic concurrency control for concurrent saves
+- Content-addressed version history with shared subtrees
+- Dictionary-compressed storage codecs
+- Streaming NDJSON bulk import/export
+"""
+
+from .itinerary_store import (
+    ItineraryStore,
+    VersionConflictError,
+    open_store,
+    DEFAULT_ITINERARY_ID,
+    parse_if_match,
+    format_etag
+)
+from .version_history import VersionHistory
+from .codec import JsonCodec, ZlibDictCodec, train_dictionary, load_codec
+from .bulk_io import export_ndjson, import_ndjson, iter_export_lines
+
+__all__ = [
+    'ItineraryStore',
+    'VersionConflictError',
+    'open_store',
+    'DEFAULT_ITINERARY_ID',
+    'parse_if_match',
+    'format_etag',
+    'VersionHistory',
+    'JsonCodec',
+    'ZlibDictCodec',
+    'train_dictionary',
+    'load_codec',
+    'export_ndjson',
+    'import_ndjson',
+    'iter_export_lines'
+]
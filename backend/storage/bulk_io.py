@@ -0,0 +1,208 @@
+"""
+Bulk NDJSON import/export for WanderTrip itineraries
+Streams one itinerary per line so dumps of any size run in constant memory
+"""
+
+import argparse
+import gzip
+import io
+import json
+import sys
+import time
+
+from .itinerary_store import open_store, is_valid_itinerary_id, DEFAULT_DATA_DIR, VERSION_KEY
+
+
+DEFAULT_BATCH_SIZE = 500
+
+
+class BulkStats:
+    """Running totals for an import or export"""
+
+    def __init__(self):
+        self.records = 0
+        self.rejected = 0
+        self.bytes = 0
+        self.errors = []
+        self._started = time.perf_counter()
+
+    def to_dict(self):
+        elapsed = time.perf_counter() - self._started
+        return {
+            "records": self.records,
+            "rejected": self.rejected,
+            "bytes": self.bytes,
+            "seconds": round(elapsed, 3),
+            "recordsPerSecond": round(self.records / elapsed, 1) if elapsed > 0 else 0.0,
+            "errors": self.errors
+        }
+
+
+def iter_export_lines(store):
+    """
+    Generate NDJSON lines for every stored itinerary
+
+    Args:
+        store (ItineraryStore): Store to export
+
+    Yields:
+        str: One line per itinerary: {"id": ..., "itinerary": {...}}
+    """
+    for itinerary_id in store.list_ids():
+        try:
+            itinerary = store.get(itinerary_id)
+        except FileNotFoundError:
+            # Removed between listing and reading
+            continue
+        yield json.dumps({"id": itinerary_id, "itinerary": itinerary}, ensure_ascii=False) + "\n"
+
+
+def export_ndjson(store, out_file):
+    """
+    Write every stored itinerary to a text stream as NDJSON
+
+    Args:
+        store (ItineraryStore): Store to export
+        out_file: Writable text stream
+
+    Returns:
+        dict: Export statistics including records per second
+    """
+    stats = BulkStats()
+    for line in iter_export_lines(store):
+        out_file.write(line)
+        stats.records += 1
+        stats.bytes += len(line)
+    out_file.flush()
+    return stats.to_dict()
+
+
+def _parse_record(line, validate):
+    """Decode and validate one NDJSON line, returning (id, itinerary)"""
+    record = json.loads(line)
+    if not isinstance(record, dict) or "id" not in record or "itinerary" not in record:
+        raise ValueError("record must be an object with 'id' and 'itinerary'")
+    if not is_valid_itinerary_id(str(record["id"])):
+        raise ValueError(f"invalid itinerary id {record['id']!r}")
+    itinerary = record["itinerary"]
+    if not isinstance(itinerary, dict):
+        raise ValueError("itinerary must be an object")
+    if validate:
+        problems = validate(itinerary)
+        if problems:
+            raise ValueError("; ".join(problems[:3]))
+    itinerary = {key: value for key, value in itinerary.items() if key != VERSION_KEY}
+    return str(record["id"]), itinerary
+
+
+def _commit_batch(store, batch):
+    """
+    Save a batch all-or-nothing, restoring prior contents if a write fails
+
+    Index and history records are held back until every document is
+    written, so a rolled-back batch leaves no trace in either.
+    """
+    previous = {}
+    deferred = []
+    try:
+        for itinerary_id, itinerary in batch:
+            if itinerary_id not in previous:
+                previous[itinerary_id] = store.read_raw(itinerary_id)
+            store.save(itinerary, itinerary_id=itinerary_id, deferred=deferred)
+    except Exception:
+        for itinerary_id, raw in previous.items():
+            store.write_raw(itinerary_id, raw)
+        raise
+    store.record_deferred(deferred)
+
+
+def import_ndjson(store, in_file, batch_size=DEFAULT_BATCH_SIZE, validate=None, skip_invalid=False):
+    """
+    Load itineraries from an NDJSON text stream in batches
+
+    Lines are read one at a time and held only until their batch is
+    committed. A batch is validated as a whole before anything is written;
+    by default one bad record rejects its whole batch, with skip_invalid
+    only the bad records are dropped. Each save bumps the stored version.
+
+    Args:
+        store (ItineraryStore): Store to import into
+        in_file: Readable text stream of {"id": ..., "itinerary": {...}} lines
+        batch_size (int): Records committed together (default: 500)
+        validate (callable): Returns a list of problems for an itinerary
+        skip_invalid (bool): Drop invalid records instead of their batch
+
+    Returns:
+        dict: Import statistics including records per second
+    """
+    stats = BulkStats()
+    batch, batch_errors = [], []
+
+    def flush():
+        if batch_errors and not skip_invalid:
+            stats.rejected += len(batch) + len(batch_errors)
+        elif batch:
+            _commit_batch(store, batch)
+            stats.records += len(batch)
+            stats.rejected += len(batch_errors)
+        else:
+            stats.rejected += len(batch_errors)
+        stats.errors.extend(batch_errors[:max(0, 100 - len(stats.errors))])
+        batch.clear()
+        batch_errors.clear()
+
+    for line_number, line in enumerate(in_file, start=1):
+        stats.bytes += len(line)
+        if not line.strip():
+            continue
+        try:
+            batch.append(_parse_record(line, validate))
+        except ValueError as e:
+            # json.JSONDecodeError is a ValueError too
+            batch_errors.append(f"line {line_number}: {e}")
+        if len(batch) + len(batch_errors) >= batch_size:
+            flush()
+    flush()
+    return stats.to_dict()
+
+
+def _open_text(path, mode):
+    """Open a path for text I/O; '-' is stdin/stdout and *.gz is gzip"""
+    if path == "-":
+        stream = sys.stdin if mode == "r" else sys.stdout
+        return io.TextIOWrapper(stream.buffer, encoding="utf-8", closefd=False)
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8", buffering=1024 * 1024)
+
+
+def main(argv=None):
+    """Command-line entry point: python -m backend.storage.bulk_io export|import FILE"""
+    from ..models import validate_itinerary_dict
+
+    parser = argparse.ArgumentParser(description="Bulk NDJSON import/export of stored itineraries")
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("path", help="NDJSON file ('-' for stdin/stdout, *.gz for gzip)")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="Itinerary data directory")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--skip-invalid", action="store_true", help="Drop invalid records, not whole batches")
+    args = parser.parse_args(argv)
+
+    store = open_store(args.data_dir)
+    if args.command == "export":
+        with _open_text(args.path, "w") as f:
+            stats = export_ndjson(store, f)
+    else:
+        with _open_text(args.path, "r") as f:
+            stats = import_ndjson(store, f, batch_size=args.batch_size,
+                                  validate=validate_itinerary_dict, skip_invalid=args.skip_invalid)
+
+    print(f"{args.command}: {stats['records']} records ({stats['rejected']} rejected) "
+          f"in {stats['seconds']}s, {stats['recordsPerSecond']} records/s", file=sys.stderr)
+    for error in stats["errors"]:
+        print(f"  {error}", file=sys.stderr)
+    return 1 if stats["rejected"] else 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,269 @@
+"""
+Storage codecs for WanderTrip itineraries
+Compresses stored itinerary JSON with zlib and a trained preset dictionary
+"""
+
+import argparse
+import glob
+import json
+import os
+import struct
+import zlib
+from collections import Counter
+
+
+# Header of documents written by ZlibDictCodec: magic + dictionary id
+MAGIC = b"WTZ1"
+_HEADER = struct.Struct(">4sI")
+
+# zlib only looks back 32 KiB, so a larger preset dictionary is wasted
+MAX_DICTIONARY_SIZE = 32 * 1024
+
+# Skeleton of a stored itinerary, used when no trained dictionary is available
+_SEED_DOCUMENT = {
+    "destination": "",
+    "startDate": "Jan 01, 2025",
+    "days": [
+        {
+            "dayNumber": 1,
+            "date": "Jan 01, 2025",
+            "periods": {
+                period: [
+                    {"time": "10:00", "activity": "", "description": "", "id": f"day1_{period}_0"}
+                ]
+                for period in ("morning", "afternoon", "evening")
+            }
+        }
+    ],
+    "additionalActivities": [
+        {"id": "extra_activity_0", "activity": "", "description": "",
+         "duration": "1-2 hours", "type": "additional"}
+    ],
+    "userInputs": {"destination": "", "adults": 2, "startDate": "2025-01-01", "endDate": "2025-01-04"},
+    "version": 1
+}
+
+
+def _serialize(data):
+    """Compact JSON used as the codec's plaintext"""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _decompress(raw, dictionaries):
+    """Decode a WTZ1 document with whichever known dictionary it names"""
+    _, dictionary_id = _HEADER.unpack_from(raw)
+    dictionary = dictionaries.get(dictionary_id)
+    if dictionary is None:
+        raise ValueError(f"Document was compressed with unknown dictionary {dictionary_id:08x}")
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS, zdict=dictionary)
+    body = decompressor.decompress(raw[_HEADER.size:]) + decompressor.flush()
+    return json.loads(body)
+
+
+class JsonCodec:
+    """
+    Plain pretty-printed JSON, the original on-disk format
+
+    Documents with the ``WTZ1`` header are still decoded when their
+    dictionary is known, so switching back from ``zdict`` keeps existing
+    files readable; they are rewritten as JSON on their next save.
+    """
+
+    name = "json"
+
+    def __init__(self, dictionaries=None):
+        self.dictionaries = dict(dictionaries or {})
+
+    def encode(self, data):
+        return json.dumps(data, indent=2).encode("utf-8")
+
+    def decode(self, raw):
+        if raw.startswith(MAGIC):
+            return _decompress(raw, self.dictionaries)
+        return json.loads(raw)
+
+
+class ZlibDictCodec:
+    """
+    zlib compression primed with a preset dictionary
+
+    Stored itineraries are small and share most of their bytes (keys,
+    period names, id patterns, date formats), which plain zlib cannot
+    exploit because each document is compressed on its own. A preset
+    dictionary gives every document that shared history up front.
+
+    Decoding is transparent: documents without the ``WTZ1`` header are
+    parsed as plain JSON, and documents compressed with an older
+    dictionary are decoded with it when it is passed in ``dictionaries``.
+    Either way they are rewritten with the current dictionary on their
+    next save.
+    """
+
+    name = "zdict"
+
+    def __init__(self, dictionary, level=9, dictionaries=None):
+        self.dictionary = dictionary
+        self.dictionary_id = zlib.crc32(dictionary)
+        self.level = level
+        self.dictionaries = dict(dictionaries or {})
+        self.dictionaries[self.dictionary_id] = dictionary
+
+    def encode(self, data):
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, zlib.MAX_WBITS,
+                                      zdict=self.dictionary)
+        body = compressor.compress(_serialize(data)) + compressor.flush()
+        return _HEADER.pack(MAGIC, self.dictionary_id) + body
+
+    def decode(self, raw):
+        if not raw.startswith(MAGIC):
+            return json.loads(raw)
+        return _decompress(raw, self.dictionaries)
+
+
+def train_dictionary(samples, size=MAX_DICTIONARY_SIZE, fragment_lengths=(64, 32, 16, 8)):
+    """
+    Build a zlib preset dictionary from a sample corpus
+
+    Counts, for several fragment lengths, how many samples contain each
+    fragment of their compact JSON, then greedily keeps the fragments that
+    cover the most bytes across the corpus. The best fragments are placed
+    at the end of the dictionary, where zlib can reach them with the
+    shortest distances.
+
+    Args:
+        samples (list): Itinerary documents (dicts) to learn from
+        size (int): Maximum dictionary size in bytes (default: 32 KiB)
+        fragment_lengths (tuple): Fragment lengths to consider, longest first
+
+    Returns:
+        bytes: Preset dictionary for ZlibDictCodec
+    """
+    corpus = [_serialize(sample) for sample in samples]
+    min_samples = 2 if len(corpus) > 1 else 1
+
+    scores = Counter()
+    for length in fragment_lengths:
+        document_frequency = Counter()
+        for text in corpus:
+            document_frequency.update({
+                text[i:i + length] for i in range(0, max(len(text) - length + 1, 0))
+            })
+        for fragment, count in document_frequency.items():
+            if count >= min_samples:
+                scores[fragment] = count * length
+
+    chosen = []
+    used = 0
+    for fragment, _ in scores.most_common():
+        if used + len(fragment) > size:
+            continue
+        if any(fragment in kept for kept in chosen):
+            continue
+        chosen.append(fragment)
+        used += len(fragment)
+        if used >= size:
+            break
+
+    # most_common() is best-first; zlib prefers the best material last
+    return b"".join(reversed(chosen))
+
+
+def default_dictionary():
+    """Dictionary derived from the stored itinerary skeleton"""
+    return _serialize(_SEED_DOCUMENT)
+
+
+def _archive_path(dictionary_path, dictionary_id):
+    """Where a replaced dictionary is kept so older documents stay readable"""
+    return f"{dictionary_path}.{dictionary_id:08x}"
+
+
+def _known_dictionaries(dictionary_path=None):
+    """
+    Collect every dictionary stored documents may have been compressed with
+
+    Args:
+        dictionary_path (str): Trained dictionary file; archived
+            predecessors next to it (``<path>.<id>``) are included too
+
+    Returns:
+        dict: Dictionary bytes keyed by dictionary id
+    """
+    dictionaries = {}
+    builtin = default_dictionary()
+    dictionaries[zlib.crc32(builtin)] = builtin
+    if not dictionary_path:
+        return dictionaries
+
+    paths = glob.glob(glob.escape(dictionary_path) + "." + "[0-9a-f]" * 8)
+    if os.path.exists(dictionary_path):
+        paths.append(dictionary_path)
+    for path in paths:
+        with open(path, "rb") as f:
+            dictionary = f.read()
+        dictionaries[zlib.crc32(dictionary)] = dictionary
+    return dictionaries
+
+
+def load_codec(name=None, dictionary_path=None):
+    """
+    Create the storage codec selected by configuration
+
+    Whatever the codec, every known dictionary is loaded for decoding, so
+    changing ITINERARY_CODEC or retraining the dictionary never strands
+    files that are already on disk.
+
+    Args:
+        name (str): 'zdict' or 'json' (default: ITINERARY_CODEC env var, then 'zdict')
+        dictionary_path (str): Trained dictionary file (default:
+            ITINERARY_CODEC_DICTIONARY env var); the built-in skeleton
+            dictionary is used when the file does not exist
+
+    Returns:
+        JsonCodec or ZlibDictCodec: Codec instance
+    """
+    name = name or os.getenv("ITINERARY_CODEC", ZlibDictCodec.name)
+    if name not in (JsonCodec.name, ZlibDictCodec.name):
+        raise ValueError(f"Unknown itinerary codec: {name}")
+
+    dictionary_path = dictionary_path or os.getenv("ITINERARY_CODEC_DICTIONARY")
+    dictionaries = _known_dictionaries(dictionary_path)
+    if name == JsonCodec.name:
+        return JsonCodec(dictionaries)
+
+    if dictionary_path and os.path.exists(dictionary_path):
+        with open(dictionary_path, "rb") as f:
+            return ZlibDictCodec(f.read(), dictionaries=dictionaries)
+    return ZlibDictCodec(default_dictionary(), dictionaries=dictionaries)
+
+
+def main(argv=None):
+    """Train a dictionary from itinerary JSON files: codec.py OUT SAMPLE..."""
+    parser = argparse.ArgumentParser(description="Train a zlib preset dictionary for itinerary storage")
+    parser.add_argument("output", help="Path to write the dictionary to")
+    parser.add_argument("samples", nargs="+", help="Itinerary JSON files to train on")
+    parser.add_argument("--size", type=int, default=MAX_DICTIONARY_SIZE, help="Dictionary size in bytes")
+    args = parser.parse_args(argv)
+
+    samples = []
+    for path in args.samples:
+        with open(path, "rb") as f:
+            samples.append(JsonCodec().decode(f.read()))
+
+    dictionary = train_dictionary(samples, size=args.size)
+    if os.path.exists(args.output):
+        # Documents written with the old dictionary still need it to decode
+        with open(args.output, "rb") as f:
+            previous = f.read()
+        if previous != dictionary:
+            archived = _archive_path(args.output, zlib.crc32(previous))
+            os.replace(args.output, archived)
+            print(f"Kept the previous dictionary as {archived}")
+    with open(args.output, "wb") as f:
+        f.write(dictionary)
+    print(f"Wrote {len(dictionary)} byte dictionary trained on {len(samples)} samples to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
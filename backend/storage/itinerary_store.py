@@ -0,0 +1,398 @@
+"""
+Versioned itinerary storage for WanderTrip
+File-backed itinerary documents with optimistic concurrency control
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from ..observability import timed_stage
+from .codec import JsonCodec, load_codec
+from .version_history import VersionHistory
+
+try:  # POSIX
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+
+# Itinerary served by the legacy single-plan endpoints
+DEFAULT_ITINERARY_ID = "current"
+
+# backend/data, where the API keeps its itineraries
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+# Key holding the document version inside every stored itinerary
+VERSION_KEY = "version"
+
+_ITINERARY_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class VersionConflictError(Exception):
+    """Raised when a conditional save does not match the stored version"""
+
+    def __init__(self, itinerary_id, expected_version, current_version):
+        super().__init__(
+            f"Itinerary '{itinerary_id}' is at version {current_version}, "
+            f"expected {expected_version}"
+        )
+        self.itinerary_id = itinerary_id
+        self.expected_version = expected_version
+        self.current_version = current_version
+
+
+def parse_if_match(header_value):
+    """
+    Parse an If-Match header into an expected version
+
+    Args:
+        header_value (str): Raw header value, e.g. '"3"', 'W/"3"', '3' or '*'
+
+    Returns:
+        int or str: Expected version number, or '*' to match any stored version
+
+    Raises:
+        ValueError: If the header does not contain a version number
+    """
+    value = header_value.strip()
+    if value == "*":
+        return "*"
+    if value.startswith("W/"):
+        value = value[2:]
+    return int(value.strip('"'))
+
+
+def is_valid_itinerary_id(itinerary_id):
+    """Check that an id is safe to use as a file name"""
+    return bool(_ITINERARY_ID_PATTERN.match(itinerary_id))
+
+
+def format_etag(version):
+    """Format a version number as a strong ETag"""
+    return f'"{version}"'
+
+
+@contextmanager
+def _file_lock(lock_path):
+    """Hold an exclusive advisory lock on lock_path across processes"""
+    with open(lock_path, "a+b") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:  # pragma: no cover - Windows
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:  # pragma: no cover - Windows
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class ItineraryStore:
+    """
+    Stores itinerary documents as JSON files, one per itinerary
+
+    Every document carries a monotonically increasing ``version``. Reads take
+    no lock: writes go to a temporary file that is atomically renamed over
+    the old one, so a reader always sees a complete document. Writes hold a
+    lock (thread lock plus a cross-process file lock) only for the
+    compare-and-swap of the version and the rename.
+
+    Itineraries other than the default one live in a sharded tree,
+    ``itineraries/<ab>/<cd>/<id>.json`` where ``abcd`` starts the SHA-1 of
+    the id, so no directory grows past a few entries per 65k trips. Write
+    locks are striped per top-level shard rather than per itinerary, and
+    ids are appended to ``itineraries/index.txt`` when first created so
+    listing never walks the tree.
+
+    When a VersionHistory is attached, every save is also recorded there;
+    its content-addressed objects are written before the lock is taken.
+    Documents are encoded with the given codec (plain JSON by default).
+    """
+
+    def __init__(self, data_dir, history=None, codec=None):
+        self.data_dir = data_dir
+        self.history = history
+        self.codec = codec or JsonCodec()
+        self.itineraries_dir = os.path.join(data_dir, "itineraries")
+        self.index_path = os.path.join(self.itineraries_dir, "index.txt")
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def path_for(self, itinerary_id):
+        """
+        Get the file path backing an itinerary
+
+        Args:
+            itinerary_id (str): Itinerary identifier
+
+        Returns:
+            str: Absolute path of the itinerary's JSON file
+        """
+        if not is_valid_itinerary_id(itinerary_id):
+            raise ValueError(f"Invalid itinerary id: {itinerary_id!r}")
+        if itinerary_id == DEFAULT_ITINERARY_ID:
+            return os.path.join(self.data_dir, "itinerary_data.json")
+        shard = self._shard(itinerary_id)
+        return os.path.join(self.itineraries_dir, shard[:2], shard[2:], f"{itinerary_id}.json")
+
+    @staticmethod
+    def _shard(itinerary_id):
+        """Four hex digits spreading ids evenly over the shard tree"""
+        return hashlib.sha1(itinerary_id.encode("utf-8")).hexdigest()[:4]
+
+    def get(self, itinerary_id=DEFAULT_ITINERARY_ID):
+        """
+        Load a stored itinerary without taking any lock
+
+        Args:
+            itinerary_id (str): Itinerary identifier
+
+        Returns:
+            dict: Itinerary document including its ``version``
+
+        Raises:
+            FileNotFoundError: If the itinerary has never been saved
+        """
+        with open(self.path_for(itinerary_id), "rb") as f:
+            data = self.codec.decode(f.read())
+        data.setdefault(VERSION_KEY, 0)
+        return data
+
+    def list_ids(self):
+        """
+        Iterate over the ids of all stored itineraries
+
+        Reads the index file line by line; ids of itineraries removed by a
+        rollback may still be listed, so callers should tolerate
+        FileNotFoundError when loading them.
+
+        Yields:
+            str: Itinerary identifiers, lazily, without loading any document
+        """
+        if os.path.exists(self.path_for(DEFAULT_ITINERARY_ID)):
+            yield DEFAULT_ITINERARY_ID
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    itinerary_id = line.strip()
+                    if itinerary_id:
+                        yield itinerary_id
+        except FileNotFoundError:
+            return
+
+    def rebuild_index(self):
+        """
+        Rewrite the index from the shard tree
+
+        Also moves itineraries saved by the earlier flat layout
+        (``itineraries/<id>.json``) into their shards.
+
+        Returns:
+            int: Number of itineraries indexed
+        """
+        os.makedirs(self.itineraries_dir, exist_ok=True)
+        with os.scandir(self.itineraries_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(".json"):
+                    itinerary_id = entry.name[:-len(".json")]
+                    if is_valid_itinerary_id(itinerary_id):
+                        target = self.path_for(itinerary_id)
+                        os.makedirs(os.path.dirname(target), exist_ok=True)
+                        os.replace(entry.path, target)
+
+        ids = []
+        for root, _, files in os.walk(self.itineraries_dir):
+            if root == self.itineraries_dir:
+                continue
+            ids.extend(name[:-len(".json")] for name in files if name.endswith(".json"))
+
+        with _file_lock(self.index_path + ".lock"):
+            self._atomic_write(self.index_path, "".join(f"{i}\n" for i in ids).encode("utf-8"))
+        return len(ids)
+
+    def get_version(self, itinerary_id=DEFAULT_ITINERARY_ID):
+        """
+        Get the current version of an itinerary
+
+        Args:
+            itinerary_id (str): Itinerary identifier
+
+        Returns:
+            int: Stored version, or 0 if the itinerary does not exist
+        """
+        try:
+            return self.get(itinerary_id)[VERSION_KEY]
+        except FileNotFoundError:
+            return 0
+
+    @timed_stage("persist")
+    def save(self, data, expected_version=None, itinerary_id=DEFAULT_ITINERARY_ID, deferred=None):
+        """
+        Save an itinerary, bumping its version
+
+        Args:
+            data (dict): Itinerary document to store
+            expected_version (int or str): Version the caller last read, '*' to
+                require any existing version, or None for an unconditional write
+            itinerary_id (str): Itinerary identifier
+            deferred (list): When given, the index and history records of the
+                save are collected here instead of written; pass the list to
+                record_deferred() once the whole batch has been written
+
+        Returns:
+            int: The new version of the stored itinerary
+
+        Raises:
+            VersionConflictError: If expected_version does not match the store
+        """
+        path = self.path_for(itinerary_id)
+        document = dict(data)
+
+        # Serialize outside the critical section whenever the new version is known
+        payload = None
+        if isinstance(expected_version, int):
+            document[VERSION_KEY] = expected_version + 1
+            payload = self.codec.encode(document)
+
+        root_hash = stats = None
+        if self.history:
+            root_hash, stats = self.history.put_tree(document)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._write_lock(itinerary_id):
+            created = not os.path.exists(path)
+            current_version = self.get_version(itinerary_id)
+            if expected_version == "*":
+                if created:
+                    raise VersionConflictError(itinerary_id, expected_version, current_version)
+            elif expected_version is not None and expected_version != current_version:
+                raise VersionConflictError(itinerary_id, expected_version, current_version)
+
+            if payload is None:
+                document[VERSION_KEY] = current_version + 1
+                payload = self.codec.encode(document)
+            self._atomic_write(path, payload)
+            record = (itinerary_id, created, document[VERSION_KEY], root_hash, stats)
+            if deferred is None:
+                self._record(*record)
+            else:
+                deferred.append(record)
+
+        return document[VERSION_KEY]
+
+    def record_deferred(self, deferred):
+        """
+        Write the index and history records collected by save(deferred=...)
+
+        Args:
+            deferred (list): Records collected while saving a batch
+        """
+        for record in deferred:
+            with self._write_lock(record[0]):
+                self._record(*record)
+
+    def _record(self, itinerary_id, created, version, root_hash, stats):
+        """Append a save to the listing index and the version history"""
+        if created and itinerary_id != DEFAULT_ITINERARY_ID:
+            self._append_index(itinerary_id)
+        if self.history:
+            self.history.append(itinerary_id, version, root_hash, stats)
+
+    def read_raw(self, itinerary_id):
+        """
+        Read an itinerary's encoded bytes as stored on disk
+
+        Args:
+            itinerary_id (str): Itinerary identifier
+
+        Returns:
+            bytes: Stored bytes, or None if the itinerary does not exist
+        """
+        try:
+            with open(self.path_for(itinerary_id), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def write_raw(self, itinerary_id, raw):
+        """
+        Put back bytes previously returned by read_raw
+
+        Used to roll back a failed batch; raw=None removes the itinerary.
+        Only the document is restored, so batches defer their index and
+        history records until every write has succeeded.
+
+        Args:
+            itinerary_id (str): Itinerary identifier
+            raw (bytes): Bytes to restore, or None
+        """
+        path = self.path_for(itinerary_id)
+        with self._write_lock(itinerary_id):
+            if raw is None:
+                if os.path.exists(path):
+                    os.remove(path)
+            else:
+                self._atomic_write(path, raw)
+
+    @contextmanager
+    def _write_lock(self, itinerary_id):
+        """Hold the thread and file locks of the stripe owning an itinerary"""
+        if itinerary_id == DEFAULT_ITINERARY_ID:
+            stripe = DEFAULT_ITINERARY_ID
+            lock_path = self.path_for(itinerary_id) + ".lock"
+        else:
+            stripe = self._shard(itinerary_id)[:2]
+            lock_path = os.path.join(self.itineraries_dir, stripe, ".lock")
+
+        with self._locks_guard:
+            thread_lock = self._locks.get(stripe)
+            if thread_lock is None:
+                thread_lock = self._locks[stripe] = threading.Lock()
+
+        with thread_lock, _file_lock(lock_path):
+            yield
+
+    def _append_index(self, itinerary_id):
+        """Record a newly created itinerary in the listing index"""
+        with _file_lock(self.index_path + ".lock"):
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(itinerary_id + "\n")
+
+    @staticmethod
+    def _atomic_write(path, payload):
+        """Write payload bytes to a temp file and rename it over path"""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+def open_store(data_dir=DEFAULT_DATA_DIR):
+    """
+    Open the itinerary store the way the API configures it
+
+    Args:
+        data_dir (str): Data directory (default: backend/data)
+
+    Returns:
+        ItineraryStore: Store with version history and the configured codec
+    """
+    history = VersionHistory(os.path.join(data_dir, "history"))
+    store = ItineraryStore(data_dir, history=history, codec=load_codec())
+    if os.path.isdir(store.itineraries_dir) and not os.path.exists(store.index_path):
+        store.rebuild_index()
+    return store
@@ -0,0 +1,203 @@
+"""
+Content-addressed version history for WanderTrip itineraries
+Stores each day/activity subtree once and keeps small per-version roots
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+from datetime import datetime, timezone
+
+
+# Marker used inside stored nodes to point at another object; keys of saved
+# documents that start with "$" get one more "$", so they never look like it
+REF_KEY = "$ref"
+_ESCAPE = "$"
+_OBJECT_HASH = re.compile(r"[0-9a-f]{64}")
+
+
+def _canonical(value):
+    """Serialize a value deterministically so equal subtrees hash equally"""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def _escape(value):
+    """Copy of saved data with every key starting with "$" given one more "$" """
+    if isinstance(value, dict):
+        return {(_ESCAPE + key if key.startswith(_ESCAPE) else key): _escape(item)
+                for key, item in value.items()}
+    if isinstance(value, list):
+        return [_escape(item) for item in value]
+    return value
+
+
+class VersionHistory:
+    """
+    Merkle-style history of saved itineraries
+
+    Activities and days are stored as immutable objects named by the SHA-256
+    of their canonical JSON, under ``objects/<2 hex>/<hash>.json``. A version
+    is a root object holding the itinerary's top-level fields plus references
+    to its days and additional activities, so saving an edit only writes the
+    activities and days that actually changed, one new day node per touched
+    day and the root. Each itinerary has an append-only log in
+    ``refs/<itinerary_id>.jsonl`` mapping versions to root hashes.
+    """
+
+    def __init__(self, history_dir):
+        self.history_dir = history_dir
+        self.objects_dir = os.path.join(history_dir, "objects")
+        self.refs_dir = os.path.join(history_dir, "refs")
+
+    # ------------------------------------------------------------------
+    # Object store
+    # ------------------------------------------------------------------
+
+    def _object_path(self, object_hash):
+        if not isinstance(object_hash, str) or not _OBJECT_HASH.fullmatch(object_hash):
+            raise ValueError(f"Invalid history object hash: {object_hash!r}")
+        return os.path.join(self.objects_dir, object_hash[:2], f"{object_hash}.json")
+
+    def _put(self, value, stats):
+        """Store a value once and return its hash"""
+        payload = _canonical(value)
+        object_hash = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        path = self._object_path(object_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+            stats["newObjects"] += 1
+            stats["newBytes"] += len(payload)
+        return object_hash
+
+    def _load(self, object_hash):
+        """Load an object and resolve every reference inside it"""
+        with open(self._object_path(object_hash), "r", encoding="utf-8") as f:
+            return self._resolve(json.load(f))
+
+    def _resolve(self, value):
+        if isinstance(value, dict):
+            if len(value) == 1 and REF_KEY in value:
+                return self._load(value[REF_KEY])
+            return {(key[1:] if key.startswith(_ESCAPE) else key): self._resolve(item)
+                    for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._resolve(item) for item in value]
+        return value
+
+    def put_tree(self, data):
+        """
+        Store an itinerary as a tree of content-addressed objects
+
+        Args:
+            data (dict): Itinerary document (its ``version`` key is ignored)
+
+        Returns:
+            tuple: (root_hash, stats) where stats counts objects and bytes that
+                were not already in the store
+        """
+        stats = {"newObjects": 0, "newBytes": 0}
+
+        def ref(value):
+            return {REF_KEY: self._put(value, stats)}
+
+        root = _escape({key: value for key, value in data.items() if key != "version"})
+
+        days = []
+        for day in root.get("days", []):
+            day_node = dict(day)
+            periods = day_node.get("periods")
+            if isinstance(periods, dict):
+                day_node["periods"] = {
+                    name: [ref(activity) for activity in activities]
+                    if isinstance(activities, list) else activities
+                    for name, activities in periods.items()
+                }
+            days.append(ref(day_node))
+        if "days" in root:
+            root["days"] = days
+
+        if isinstance(root.get("additionalActivities"), list):
+            root["additionalActivities"] = [ref(a) for a in root["additionalActivities"]]
+
+        return self._put(root, stats), stats
+
+    # ------------------------------------------------------------------
+    # Version log
+    # ------------------------------------------------------------------
+
+    def _log_path(self, itinerary_id):
+        return os.path.join(self.refs_dir, f"{itinerary_id}.jsonl")
+
+    def append(self, itinerary_id, version, root_hash, stats=None):
+        """
+        Record that a version of an itinerary points at a root object
+
+        Callers must serialize appends per itinerary (the store does this
+        inside its write lock).
+
+        Args:
+            itinerary_id (str): Itinerary identifier
+            version (int): Version number assigned by the store
+            root_hash (str): Hash returned by put_tree
+            stats (dict): Optional storage stats returned by put_tree
+        """
+        entry = {
+            "version": version,
+            "root": root_hash,
+            "savedAt": datetime.now(timezone.utc).isoformat(timespec="seconds")
+        }
+        if stats:
+            entry.update(stats)
+        os.makedirs(self.refs_dir, exist_ok=True)
+        with open(self._log_path(itinerary_id), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def list_versions(self, itinerary_id):
+        """
+        List the recorded versions of an itinerary
+
+        Args:
+            itinerary_id (str): Itinerary identifier
+
+        Returns:
+            list: Log entries ordered from oldest to newest
+        """
+        entries = []
+        try:
+            with open(self._log_path(itinerary_id), "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # A concurrent append may leave a partial last line
+                        continue
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def get_version(self, itinerary_id, version):
+        """
+        Rebuild a stored version of an itinerary
+
+        Args:
+            itinerary_id (str): Itinerary identifier
+            version (int): Version number to load
+
+        Returns:
+            dict: Itinerary document as it was saved, with its ``version``
+
+        Raises:
+            KeyError: If the version was never recorded
+        """
+        for entry in reversed(self.list_versions(itinerary_id)):
+            if entry["version"] == version:
+                data = self._load(entry["root"])
+                data["version"] = version
+                return data
+        raise KeyError(f"Itinerary '{itinerary_id}' has no version {version}")
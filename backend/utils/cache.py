@@ -0,0 +1,61 @@
+"""
+In-process caching for WanderTrip lookups
+Small thread-safe TTL cache for upstream API results
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from ..observability import CACHE_LOOKUPS
+
+
+class TTLCache:
+    """
+    Least-recently-used cache whose entries expire after a fixed time
+
+    Hits and misses are counted in wandertrip_cache_lookups_total under
+    the cache's name.
+    """
+
+    def __init__(self, name, ttl, maxsize=1024):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = CACHE_LOOKUPS.labels(name, "hit")
+        self._misses = CACHE_LOOKUPS.labels(name, "miss")
+
+    def get(self, key):
+        """
+        Look up a cached value
+
+        Args:
+            key: Hashable cache key
+
+        Returns:
+            The cached value, or None if absent or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._hits.inc()
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+        self._misses.inc()
+        return None
+
+    def set(self, key, value):
+        """Store a value, evicting the least recently used entry when full"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
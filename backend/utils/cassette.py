@@ -0,0 +1,220 @@
+"""
+Record/replay of upstream API traffic for WanderTrip
+Cassette files of OpenTripMap and Gemini interactions for offline, deterministic runs
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+from ..observability.log import get_logger
+from .http import get_session
+
+logger = get_logger(__name__)
+
+# Query parameters that must never be written to a cassette
+SECRET_PARAMS = ("apikey", "key", "api_key")
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode when no recording matches a request"""
+
+
+class RecordedResponse:
+    """Stand-in for requests.Response built from a recording"""
+
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self._body = body
+
+    def json(self):
+        if self._body is None:
+            raise ValueError("Recorded response has no JSON body")
+        return self._body
+
+
+class RecordedGeneration:
+    """Stand-in for a Gemini GenerateContentResponse built from a recording"""
+
+    def __init__(self, text, usage=None):
+        self.text = text
+        self.usage_metadata = usage
+
+
+def request_key(kind, request):
+    """Stable hash of a request description, used to match recordings"""
+    canonical = json.dumps({"kind": kind, "request": request}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+
+def scrub_params(params):
+    """Copy of query parameters without API keys"""
+    return {key: value for key, value in (params or {}).items() if key not in SECRET_PARAMS}
+
+
+class Cassette:
+    """
+    Recorded upstream interactions kept in a JSONL file
+
+    In record mode every call runs live and its request, response and
+    latency are appended to the file. In replay mode calls are answered
+    from the file; repeated identical requests get their recordings in
+    order, the last one repeating once they run out.
+
+    Args:
+        path (str): Cassette file
+        mode (str): 'record' or 'replay'
+        latency_scale (float): In replay, sleep for the recorded latency
+            times this factor (0 replays at full speed)
+    """
+
+    def __init__(self, path, mode, latency_scale=0.0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._recordings = {}
+        self._cursors = {}
+        if mode == "replay":
+            self._load()
+
+    def _load(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._recordings.setdefault(entry["key"], []).append(entry)
+        logger.info("Loaded %d recorded interactions from %s",
+                    sum(map(len, self._recordings.values())), self.path)
+
+    def _next_recording(self, kind, request):
+        key = request_key(kind, request)
+        with self._lock:
+            entries = self._recordings.get(key)
+            if not entries:
+                raise CassetteMissError(f"No {kind} recording for {json.dumps(request)[:200]}")
+            index = self._cursors.get(key, 0)
+            self._cursors[key] = index + 1
+            return entries[min(index, len(entries) - 1)]
+
+    def _record(self, kind, request, response, latency):
+        entry = {
+            "key": request_key(kind, request),
+            "kind": kind,
+            "request": request,
+            "response": response,
+            "latency": round(latency, 6),
+            "recordedAt": time.time()
+        }
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+    def call(self, kind, request, live, encode, decode):
+        """
+        Run or replay one upstream call
+
+        Args:
+            kind (str): Upstream name, e.g. 'opentripmap' or 'gemini'
+            request (dict): JSON-safe description of the request (no secrets)
+            live (callable): Makes the real call and returns its response
+            encode (callable): Response -> JSON-safe dict to record
+            decode (callable): Recorded dict -> response stand-in
+
+        Returns:
+            Live response, or the decoded recording in replay mode
+        """
+        if self.mode == "replay":
+            entry = self._next_recording(kind, request)
+            if self.latency_scale:
+                time.sleep(entry["latency"] * self.latency_scale)
+            return decode(entry["response"])
+
+        started = time.perf_counter()
+        response = live()
+        self._record(kind, request, encode(response), time.perf_counter() - started)
+        return response
+
+    async def call_async(self, kind, request, live, encode, decode):
+        """Async counterpart of call; live returns an awaitable"""
+        if self.mode == "replay":
+            entry = self._next_recording(kind, request)
+            if self.latency_scale:
+                import asyncio
+                await asyncio.sleep(entry["latency"] * self.latency_scale)
+            return decode(entry["response"])
+
+        started = time.perf_counter()
+        response = await live()
+        self._record(kind, request, encode(response), time.perf_counter() - started)
+        return response
+
+
+_cassette = None
+_cassette_config = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette():
+    """
+    Cassette configured by the environment, or None when disabled
+
+    CASSETTE_MODE is off (default), record or replay; CASSETTE_PATH is the
+    file (default: cassette.jsonl); CASSETTE_LATENCY_SCALE replays recorded
+    latencies scaled by that factor (default: 0, full speed).
+
+    Returns:
+        Cassette: Shared cassette, or None
+    """
+    global _cassette, _cassette_config
+    mode = os.getenv("CASSETTE_MODE", "off")
+    if mode == "off":
+        return None
+    config = (mode, os.getenv("CASSETTE_PATH", "cassette.jsonl"),
+              float(os.getenv("CASSETTE_LATENCY_SCALE", "0")))
+    if config != _cassette_config:
+        with _cassette_lock:
+            if config != _cassette_config:
+                _cassette = Cassette(config[1], mode, latency_scale=config[2])
+                _cassette_config = config
+    return _cassette
+
+
+def _encode_http(response):
+    try:
+        body = response.json()
+    except ValueError:
+        body = None
+    return {"status": response.status_code, "json": body}
+
+
+def _decode_http(recorded):
+    return RecordedResponse(recorded["status"], recorded["json"])
+
+
+def http_get(url, params=None, session=None):
+    """
+    GET through the cassette when one is active
+
+    Args:
+        url (str): Request URL
+        params (dict): Query parameters; API keys are left out of recordings
+        session: requests.Session for live calls (default: shared session)
+
+    Returns:
+        requests.Response or RecordedResponse
+    """
+    cassette = get_cassette()
+    live = lambda: (session or get_session()).get(url, params=params)
+    if cassette is None:
+        return live()
+    # Matched on the path so recordings replay against any host (live API or stub)
+    request = {"method": "GET", "path": urlparse(url).path, "params": scrub_params(params)}
+    return cassette.call("opentripmap", request, live, _encode_http, _decode_http)
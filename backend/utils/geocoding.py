@@ -3,13 +3,16 @@ Geographic location services for WanderTrip
 Handles city geocoding using OpenTripMap API with fallback coordinates
 """
 
-import os
-import requests
-from dotenv import load_dotenv
+from ..config import get_settings
+from ..observability import FALLBACKS, timed_stage
+from ..observability.log import get_logger
+from .cache import TTLCache
+from .cassette import http_get
 
-# Load environment variables
-load_dotenv()
-OPENTRIPMAP_API_KEY = os.getenv("OPENTRIPMAP_API_KEY")
+logger = get_logger(__name__)
+
+# City coordinates rarely change; only successful API lookups are cached
+_geocode_cache = TTLCache("geocode", ttl=24 * 3600)
 
 # Fallback coordinates for major cities
 CITY_COORDINATES = {
@@ -94,6 +97,7 @@ def get_city_coordinates(city_name):
     return None
 
 
+@timed_stage("geocode")
 def geocode_city(city_name):
     """
     Get latitude and longitude coordinates for a city
@@ -104,33 +108,39 @@ def geocode_city(city_name):
     Returns:
         tuple: (latitude, longitude) as floats
     """
-    print(f"🌍 [GEOCODING] Looking up coordinates for: {city_name}")
+    api_key = get_settings().opentripmap_api_key
     
     # Try OpenTripMap API first
-    if OPENTRIPMAP_API_KEY:
-        url = f"https://api.opentripmap.com/0.1/en/places/geoname"
-        params = {"name": city_name, "apikey": OPENTRIPMAP_API_KEY}
+    if api_key:
+        cache_key = city_name.lower().strip()
+        cached = _geocode_cache.get(cache_key)
+        if cached:
+            return cached
+        
+        url = f"{get_settings().opentripmap_base_url}/geoname"
+        params = {"name": city_name, "apikey": api_key}
         
         try:
-            print(f"🌍 [GEOCODING] Trying OpenTripMap API...")
-            resp = requests.get(url, params=params)
+            resp = http_get(url, params=params)
             data = resp.json()
             
             if resp.status_code == 200 and "lat" in data and "lon" in data:
-                print(f"🌍 [GEOCODING] ✅ API found coordinates: {data['lat']}, {data['lon']}")
+                logger.debug("Geocoded %s via API: %s, %s", city_name, data["lat"], data["lon"])
+                _geocode_cache.set(cache_key, (data["lat"], data["lon"]))
                 return data["lat"], data["lon"]
             else:
-                print(f"🌍 [GEOCODING] ⚠️ API response: {data}")
+                logger.warning("Geocoding API returned status %d for %s", resp.status_code, city_name)
                 
         except Exception as e:
-            print(f"🌍 [GEOCODING] ⚠️ API error: {e}")
+            logger.warning("Geocoding API error: %s", type(e).__name__)
     
     # Use fallback coordinates
+    FALLBACKS.labels("geocode").inc()
     coords = get_city_coordinates(city_name)
     if coords:
-        print(f"🌍 [GEOCODING] ✅ Using fallback coordinates: {coords[0]}, {coords[1]}")
+        logger.info("Using fallback coordinates for %s", city_name)
         return coords
     
     # Final fallback: Use Paris coordinates
-    print(f"🌍 [GEOCODING] ⚠️ City '{city_name}' not found, using Paris as default")
+    logger.warning("City %r not found, using Paris as default", city_name)
     return 48.8566, 2.3522
\ No newline at end of file
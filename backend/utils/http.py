@@ -0,0 +1,28 @@
+"""
+Shared HTTP session for outbound API calls
+Created on first use so importing the backend does not import requests
+"""
+
+import threading
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Get the process-wide requests session
+
+    Reusing one session keeps TCP/TLS connections to OpenTripMap alive
+    across lookups instead of reconnecting on every call.
+
+    Returns:
+        requests.Session: Shared session
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                _session = requests.Session()
+    return _session
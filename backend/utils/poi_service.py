@@ -4,13 +4,16 @@ Uses OpenTripMap API to find tourist attractions and landmarks
 Includes fallback static data for common destinations
 """
 
-import os
-import requests
-from dotenv import load_dotenv
+from ..config import get_settings
+from ..observability import FALLBACKS, timed_stage
+from ..observability.log import get_logger
+from .cache import TTLCache
+from .cassette import http_get
 
-# Load environment variables
-load_dotenv()
-OPENTRIPMAP_API_KEY = os.getenv("OPENTRIPMAP_API_KEY")
+logger = get_logger(__name__)
+
+# POIs around a point change slowly; only successful API lookups are cached
+_poi_cache = TTLCache("pois", ttl=3600)
 
 # Fallback POI data for common destinations
 FALLBACK_POIS = {
@@ -111,6 +114,7 @@ def get_fallback_pois(destination):
     ]
 
 
+@timed_stage("poi_fetch")
 def get_pois(lat, lon, radius=5000, limit=10):
     """
     Get points of interest within a radius of given coordinates
@@ -124,27 +128,29 @@ def get_pois(lat, lon, radius=5000, limit=10):
     Returns:
         list: List of POI dictionaries with 'name' and 'type' keys
     """
-    print(f"🔍 [POI_SERVICE] Searching for POIs at coordinates: {lat}, {lon}")
+    api_key = get_settings().opentripmap_api_key
     
     # Try OpenTripMap API first
-    if OPENTRIPMAP_API_KEY:
-        url = f"https://api.opentripmap.com/0.1/en/places/radius"
+    if api_key:
+        cache_key = (round(lat, 4), round(lon, 4), radius, limit)
+        cached = _poi_cache.get(cache_key)
+        if cached:
+            return list(cached)
+        
+        url = f"{get_settings().opentripmap_base_url}/radius"
         params = {
             "radius": radius,
             "lon": lon,
             "lat": lat,
             "rate": 3,       # 1=low, 3=popular
             "limit": limit,
-            "apikey": OPENTRIPMAP_API_KEY,
+            "apikey": api_key,
         }
         
         try:
-            print(f"🔍 [POI_SERVICE] Making API request to OpenTripMap...")
-            resp = requests.get(url, params=params)
+            resp = http_get(url, params=params)
             data = resp.json()
             
-            print(f"🔍 [POI_SERVICE] API Response status: {resp.status_code}")
-            
             if resp.status_code == 200 and data and "features" in data:
                 pois = []
                 for place in data.get("features", []):
@@ -154,21 +160,22 @@ def get_pois(lat, lon, radius=5000, limit=10):
                         pois.append({"name": name, "type": kinds})
                 
                 if pois:
-                    print(f"🔍 [POI_SERVICE] ✅ Found {len(pois)} POIs from API")
+                    logger.debug("Found %d POIs from API", len(pois))
+                    _poi_cache.set(cache_key, pois[:limit])
                     return pois[:limit]
                 else:
-                    print(f"🔍 [POI_SERVICE] ⚠️ API returned no POIs, using fallback data")
+                    logger.info("POI API returned no named places, using fallback data")
             else:
-                print(f"🔍 [POI_SERVICE] ⚠️ API returned empty response, using fallback data")
+                logger.warning("POI API returned status %d, using fallback data", resp.status_code)
             
         except Exception as e:
-            print(f"🔍 [POI_SERVICE] ⚠️ API error: {e}, using fallback data")
+            logger.warning("POI API error: %s, using fallback data", type(e).__name__)
     else:
-        print(f"🔍 [POI_SERVICE] ⚠️ No API key, using fallback data")
+        logger.info("No OpenTripMap API key, using fallback POIs")
     
     # Use fallback data based on coordinates
+    FALLBACKS.labels("pois").inc()
     fallback_pois = get_fallback_pois_by_coordinates(lat, lon)
-    print(f"🔍 [POI_SERVICE] ✅ Using {len(fallback_pois)} fallback POIs")
     return fallback_pois[:limit]
 
 
@@ -220,12 +227,12 @@ def get_poi_details(poi_id):
     Returns:
         dict: Detailed POI information including description, image URLs, etc.
     """
-    url = f"https://api.opentripmap.com/0.1/en/places/xid/{poi_id}"
-    params = {"apikey": OPENTRIPMAP_API_KEY}
+    url = f"{get_settings().opentripmap_base_url}/xid/{poi_id}"
+    params = {"apikey": get_settings().opentripmap_api_key}
     
     try:
-        resp = requests.get(url, params=params)
+        resp = http_get(url, params=params)
         return resp.json()
     except Exception as e:
-        print(f"Error fetching POI details: {e}")
+        logger.warning("Error fetching POI details: %s", type(e).__name__)
         return {}
\ No newline at end of file
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Storage codec benchmark
+Compares size and encode/decode time of raw JSON, gzip and zlib+dictionary
+"""
+
+import argparse
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+
+# Add the project root to Python path to import backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.storage.codec import JsonCodec, ZlibDictCodec, train_dictionary, default_dictionary
+from benchmarks.fixtures import make_itinerary
+
+
+class GzipJsonCodec:
+    """Plain gzip over the pretty-printed JSON, for comparison"""
+
+    name = "gzip"
+
+    def encode(self, data):
+        return gzip.compress(json.dumps(data, indent=2).encode("utf-8"), compresslevel=9)
+
+    def decode(self, raw):
+        return json.loads(gzip.decompress(raw))
+
+
+def time_per_call(func, items, rounds):
+    """Median seconds per call of func over items, across rounds"""
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        samples.append((time.perf_counter() - start) / len(items))
+    return statistics.median(samples)
+
+
+def load_corpus(count):
+    """Synthetic itineraries of varied shape plus the checked-in sample"""
+    corpus = [
+        make_itinerary(days=2 + i % 6, activities_per_period=1 + i % 3, seed=i)
+        for i in range(count)
+    ]
+    sample_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                               "backend", "data", "itinerary_data.json")
+    if os.path.exists(sample_path):
+        with open(sample_path, "rb") as f:
+            corpus.append(json.loads(f.read()))
+    return corpus
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--samples", type=int, default=200, help="Synthetic itineraries to generate")
+    parser.add_argument("--rounds", type=int, default=5, help="Timing rounds per codec")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.samples)
+    # Train on half the corpus, measure on the other half
+    training, evaluation = corpus[::2], corpus[1::2]
+
+    codecs = [
+        ("raw json", JsonCodec()),
+        ("gzip json", GzipJsonCodec()),
+        ("zlib + skeleton dict", ZlibDictCodec(default_dictionary())),
+        ("zlib + trained dict", ZlibDictCodec(train_dictionary(training))),
+    ]
+
+    results = []
+    raw_size = None
+    for label, codec in codecs:
+        encoded = [codec.encode(doc) for doc in evaluation]
+        assert all(codec.decode(blob) == doc for blob, doc in zip(encoded, evaluation))
+        size = sum(len(blob) for blob in encoded)
+        raw_size = raw_size or size
+        results.append({
+            "codec": label,
+            "bytes": size,
+            "ratio": round(raw_size / size, 2),
+            "encode_us": round(time_per_call(codec.encode, evaluation, args.rounds) * 1e6, 1),
+            "decode_us": round(time_per_call(codec.decode, encoded, args.rounds) * 1e6, 1),
+        })
+
+    if args.json:
+        print(json.dumps({"documents": len(evaluation), "results": results}, indent=2))
+        return 0
+
+    print(f"{len(evaluation)} documents (trained on {len(training)})")
+    print(f"{'codec':<22}{'bytes':>10}{'ratio':>8}{'encode us':>12}{'decode us':>12}")
+    for row in results:
+        print(f"{row['codec']:<22}{row['bytes']:>10}{row['ratio']:>8}"
+              f"{row['encode_us']:>12}{row['decode_us']:>12}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Compact output format benchmark
+Compares prompt/output tokens, estimated generation latency and expand cost of the full and compact formats
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+from backend.itinerary_service import build_prompt, _parse_itinerary_response
+from backend.llm import TripSpec, estimate_tokens
+from backend.llm.compact import COMPACT_FORMAT, FULL_FORMAT, compact_itinerary
+from backend.utils.poi_service import get_fallback_pois
+from benchmarks.fixtures import make_itinerary
+
+DESTINATIONS = [
+    "Paris", "London", "Rome", "Tokyo", "New York", "Barcelona",
+    "Amsterdam", "Berlin", "Lisbon", "Prague", "Sydney", "Dubai"
+]
+
+def gemini_token_counter(model_name):
+    """Exact counts from the Gemini countTokens API (needs GEMINI_API_KEY)"""
+    from backend.llm.providers import get_provider
+    model = get_provider("gemini").model(model_name)
+    return lambda text: model.count_tokens(text).total_tokens
+
+
+def model_outputs(itinerary):
+    """What the model emits per format: the full prompt asks for indented, fenced JSON"""
+    full_doc = {key: itinerary[key] for key in ("destination", "startDate", "days", "additionalActivities")}
+    return {
+        FULL_FORMAT: "```json\n" + json.dumps(full_doc, indent=4) + "\n```",
+        COMPACT_FORMAT: json.dumps(compact_itinerary(itinerary), separators=(",", ":"))
+    }
+
+
+def median_us(func, rounds=200):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, nargs="+", default=[3, 5, 7], help="Trip lengths to test")
+    parser.add_argument("--decode-tps", type=float, default=200.0,
+                        help="Model output tokens per second, for the latency estimate")
+    parser.add_argument("--prefill-tps", type=float, default=8000.0,
+                        help="Model prompt tokens per second, for the latency estimate")
+    parser.add_argument("--gemini", metavar="MODEL", help="Count tokens with the Gemini API instead of estimating")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    count_tokens = gemini_token_counter(args.gemini) if args.gemini else estimate_tokens
+    totals = {fmt: {"prompt_tokens": 0, "output_tokens": 0, "seconds": 0.0, "parse_us": []}
+              for fmt in (FULL_FORMAT, COMPACT_FORMAT)}
+    samples = 0
+
+    for index, destination in enumerate(DESTINATIONS):
+        pois = get_fallback_pois(destination)
+        for days in args.days:
+            itinerary = make_itinerary(days=days, destination=destination, seed=index)
+            inputs = itinerary["userInputs"]
+            trip = TripSpec(destination, inputs["startDate"], inputs["endDate"], 2, pois)
+            outputs = model_outputs(itinerary)
+            for fmt, text in outputs.items():
+                prompt = build_prompt(destination, trip.start_date, trip.end_date, 2, pois, output_format=fmt)
+                prompt_tokens = count_tokens(prompt)
+                output_tokens = count_tokens(text)
+                parsed = _parse_itinerary_response(text, trip)
+                assert parsed["days"] == itinerary["days"], f"{fmt} round trip changed {destination}"
+                total = totals[fmt]
+                total["prompt_tokens"] += prompt_tokens
+                total["output_tokens"] += output_tokens
+                total["seconds"] += prompt_tokens / args.prefill_tps + output_tokens / args.decode_tps
+                total["parse_us"].append(median_us(lambda: _parse_itinerary_response(text, trip)))
+            samples += 1
+
+    results = []
+    for fmt, total in totals.items():
+        results.append({
+            "format": fmt,
+            "prompt_tokens": round(total["prompt_tokens"] / samples),
+            "output_tokens": round(total["output_tokens"] / samples),
+            "est_latency_s": round(total["seconds"] / samples, 2),
+            "parse_us": round(statistics.median(total["parse_us"]), 1)
+        })
+    full, compact = results
+    reduction = {
+        "output_tokens_pct": round(100 * (1 - compact["output_tokens"] / full["output_tokens"]), 1),
+        "prompt_tokens_pct": round(100 * (1 - compact["prompt_tokens"] / full["prompt_tokens"]), 1),
+        "est_latency_pct": round(100 * (1 - compact["est_latency_s"] / full["est_latency_s"]), 1)
+    }
+
+    if args.json:
+        print(json.dumps({"samples": samples, "tokens": "gemini" if args.gemini else "estimated",
+                          "results": results, "reduction": reduction}, indent=2))
+        return 0
+
+    print(f"{samples} itineraries ({len(DESTINATIONS)} destinations x {args.days} days), "
+          f"tokens {'from ' + args.gemini if args.gemini else 'estimated'}; means per itinerary")
+    print(f"{'format':<10}{'prompt tok':>12}{'output tok':>12}{'est. latency s':>16}{'parse+expand us':>17}")
+    for row in results:
+        print(f"{row['format']:<10}{row['prompt_tokens']:>12}{row['output_tokens']:>12}"
+              f"{row['est_latency_s']:>16}{row['parse_us']:>17}")
+    print(f"compact saves {reduction['output_tokens_pct']}% output tokens, "
+          f"{reduction['prompt_tokens_pct']}% prompt tokens, "
+          f"~{reduction['est_latency_pct']}% generation latency")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Hedged LLM call benchmark
+Runs calls with a heavy latency tail through the Hedger and compares latency percentiles and extra calls with and without hedging
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+from backend.llm import GenerationConfig, GenerationRequest, Hedger, LLMProvider, LLMResponse
+
+
+class TailProvider(LLMProvider):
+    """
+    Provider whose latency is lognormal with occasional slow outliers
+
+    Args:
+        median (float): Median latency in seconds
+        sigma (float): Lognormal shape; larger means a longer tail
+        outlier_rate (float): Share of calls that are `outlier_factor` slower
+        outlier_factor (float): Slowdown of an outlier
+        seed (int): Random seed
+    """
+
+    name = "tail"
+
+    def __init__(self, median, sigma=0.3, outlier_rate=0.05, outlier_factor=5.0, seed=0):
+        super().__init__(GenerationConfig(model="tail"))
+        self.median = median
+        self.sigma = sigma
+        self.outlier_rate = outlier_rate
+        self.outlier_factor = outlier_factor
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _latency(self):
+        with self._lock:
+            self.calls += 1
+            latency = self.median * self._rng.lognormvariate(0, self.sigma)
+            if self._rng.random() < self.outlier_rate:
+                latency *= self.outlier_factor
+        return latency
+
+    def generate(self, request):
+        time.sleep(self._latency())
+        return LLMResponse(text="{}", model="tail", provider=self.name)
+
+    async def generate_async(self, request):
+        await asyncio.sleep(self._latency())
+        return LLMResponse(text="{}", model="tail", provider=self.name)
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 1)
+    return {"p50_ms": pick(0.50), "p90_ms": pick(0.90), "p99_ms": pick(0.99)}
+
+
+def run_sync(provider, hedger, calls, concurrency):
+    """Latency of each call from `concurrency` threads"""
+    request = GenerationRequest(prompt="")
+    latencies = []
+    lock = threading.Lock()
+    remaining = iter(range(calls))
+
+    def worker():
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            started = time.perf_counter()
+            if hedger is None:
+                provider.generate(request)
+            else:
+                hedger.generate(provider, request, lambda response: True)
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+async def run_async(provider, hedger, calls, concurrency):
+    """Latency of each call from `concurrency` tasks"""
+    request = GenerationRequest(prompt="")
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            if hedger is None:
+                await provider.generate_async(request)
+            else:
+                await hedger.generate_async(provider, request, lambda response: True)
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return latencies
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--median", type=float, default=0.05, help="Median call latency in seconds")
+    parser.add_argument("--outlier-rate", type=float, default=0.05)
+    parser.add_argument("--outlier-factor", type=float, default=5.0)
+    parser.add_argument("--quantile", type=float, default=0.9, help="Hedge after this latency quantile")
+    parser.add_argument("--budget", type=float, default=0.1, help="Hedges allowed per call")
+    parser.add_argument("--mode", choices=["sync", "async"], default="async")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = []
+    for hedging in (False, True):
+        provider = TailProvider(args.median, outlier_rate=args.outlier_rate,
+                                outlier_factor=args.outlier_factor, seed=args.seed)
+        hedger = Hedger(quantile=args.quantile, budget=args.budget) if hedging else None
+        if args.mode == "sync":
+            latencies = run_sync(provider, hedger, args.calls, args.concurrency)
+        else:
+            latencies = asyncio.run(run_async(provider, hedger, args.calls, args.concurrency))
+        results.append({
+            "hedging": hedging,
+            **percentiles(latencies),
+            "extra_calls_pct": round(100 * (provider.calls - args.calls) / args.calls, 1)
+        })
+
+    if args.json:
+        print(json.dumps({"mode": args.mode, "calls": args.calls, "results": results}, indent=2))
+        return 0
+
+    print(f"{args.calls} {args.mode} calls, median {args.median * 1000:.0f} ms, "
+          f"{args.outlier_rate:.0%} outliers x{args.outlier_factor}; hedge after p{args.quantile * 100:.0f}, "
+          f"budget {args.budget:.0%}")
+    print(f"{'hedging':<10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'extra calls %':>16}")
+    for row in results:
+        print(f"{'on' if row['hedging'] else 'off':<10}{row['p50_ms']:>10}{row['p90_ms']:>10}"
+              f"{row['p99_ms']:>10}{row['extra_calls_pct']:>16}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark and regression gate
+Measures cold import cost of backend modules with ``python -X importtime``
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules measured by default, from the package root to the heavy leaves
+DEFAULT_MODULES = [
+    "backend",
+    "backend.config",
+    "backend.models",
+    "backend.storage",
+    "backend.utils",
+    "backend.itinerary_service",
+]
+
+# Importing any of these from a lightweight module means an eager import crept back in
+HEAVY_MODULES = ["google.generativeai", "grpc", "flask", "fastapi", "requests"]
+
+# Modules that must stay free of HEAVY_MODULES at import time
+LIGHT_MODULES = ["backend", "backend.config", "backend.models", "backend.storage",
+                 "backend.utils", "backend.itinerary_service"]
+
+
+def measure(module):
+    """
+    Import a module in a fresh interpreter and parse -X importtime output
+
+    Args:
+        module (str): Dotted module name
+
+    Returns:
+        tuple: (cumulative microseconds for module, set of modules imported)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    cumulative = None
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if not cumulative_us.isdigit():
+            continue  # header line
+        imported.add(name)
+        if name == module:
+            cumulative = int(cumulative_us)
+    return cumulative, imported
+
+
+def check_imports(module, imported):
+    """Problems with what importing a module dragged in"""
+    problems = []
+    if module in LIGHT_MODULES:
+        heavy = sorted(name for name in imported
+                       if any(name == h or name.startswith(h + ".") for h in HEAVY_MODULES))
+        if heavy:
+            problems.append(f"{module} imports heavy modules at import time: {', '.join(heavy[:5])}")
+    # A backend module loaded both as backend.x and as top-level x is loaded twice
+    for name in imported:
+        if name.startswith("backend.") and name[len("backend."):] in imported:
+            problems.append(f"{name} is also imported as top-level '{name[len('backend.'):]}'")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--rounds", type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument("--save", metavar="FILE", help="Write results as a baseline")
+    parser.add_argument("--compare", metavar="FILE", help="Fail if slower than this baseline")
+    parser.add_argument("--tolerance", type=float, default=1.5,
+                        help="Allowed slowdown factor against the baseline (default: 1.5)")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="Fail if any module's median cumulative import exceeds this")
+    args = parser.parse_args(argv)
+
+    results, problems = {}, []
+    for module in args.modules:
+        samples = []
+        for _ in range(args.rounds):
+            cumulative, imported = measure(module)
+            samples.append(cumulative / 1000)
+        problems.extend(check_imports(module, imported))
+        results[module] = {
+            "median_ms": round(statistics.median(samples), 2),
+            "min_ms": round(min(samples), 2),
+            "modules_imported": len(imported)
+        }
+
+    print(f"{'module':<30}{'median ms':>12}{'min ms':>10}{'modules':>10}")
+    for module, row in results.items():
+        print(f"{module:<30}{row['median_ms']:>12}{row['min_ms']:>10}{row['modules_imported']:>10}")
+
+    if args.budget_ms is not None:
+        for module, row in results.items():
+            if row["median_ms"] > args.budget_ms:
+                problems.append(f"{module} imports in {row['median_ms']} ms, budget is {args.budget_ms} ms")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        for module, row in results.items():
+            before = baseline.get(module)
+            # Ignore sub-millisecond noise on modules that are nearly free
+            if before and row["median_ms"] > max(before["median_ms"] * args.tolerance, before["median_ms"] + 1):
+                problems.append(f"{module} regressed: {before['median_ms']} ms -> {row['median_ms']} ms")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    exit(main())
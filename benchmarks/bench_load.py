@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test against local OpenTripMap and Gemini stand-ins
+Drives generate/get/save mixes from concurrent virtual users and reports latency as JSON
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+from benchmarks.bench_serving import start_server, stop_server
+from benchmarks.fixtures import make_itinerary
+from benchmarks.stubs import GeminiStub, OpenTripMapStub
+
+DESTINATIONS = ["Paris", "London", "Rome", "Tokyo", "New York", "Lisbon", "Kyoto", "Oslo"]
+
+
+def parse_mix(text):
+    """Parse 'generate=1,get=8,save=1' into operation weights"""
+    weights = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ("generate", "get", "save"):
+            raise argparse.ArgumentTypeError(f"Unknown operation: {name}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def summarize(latencies, errors, duration, shed=0):
+    """Throughput, goodput, latency percentiles, error rate and 503 sheds of one operation"""
+    latencies = sorted(latencies)
+    count = len(latencies)
+    quantile = lambda q: round(latencies[min(count - 1, int(q * count))] * 1000, 2) if count else None
+    return {
+        "requests": count,
+        "throughput": round(count / duration, 2),
+        "goodput": round((count - errors - shed) / duration, 2),
+        "p50_ms": quantile(0.50),
+        "p95_ms": quantile(0.95),
+        "p99_ms": quantile(0.99),
+        "errors": errors,
+        "error_rate": round(errors / count, 4) if count else 0.0,
+        "shed": shed
+    }
+
+
+def run_users(port, users, duration, mix, seed):
+    """
+    Run virtual users against the server for `duration` seconds
+
+    Args:
+        port (int): Server port on localhost
+        users (int): Concurrent virtual users, one connection each
+        duration (float): Seconds to run
+        mix (dict): Operation name -> relative weight
+        seed (int): Seed for the operation sequence
+
+    Returns:
+        dict: Per-operation and overall summaries
+    """
+    operations, weights = zip(*mix.items())
+    # Operation -> (latencies, [errors, sheds])
+    results = {name: ([], [0, 0]) for name in operations}
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def request(conn, method, path, body=None, headers=None):
+        conn.request(method, path, body=body, headers=headers or {})
+        response = conn.getresponse()
+        return response.status, response.getheader("ETag"), response.read(), response.getheader("Retry-After")
+
+    def user(index):
+        rng = random.Random(seed + index)
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+        while time.perf_counter() < stop_at:
+            operation = rng.choices(operations, weights)[0]
+            started = time.perf_counter()
+            retry_after = None
+            try:
+                if operation == "generate":
+                    body = json.dumps({
+                        "destination": rng.choice(DESTINATIONS),
+                        "startDate": "2025-06-01",
+                        "endDate": f"2025-06-0{rng.randint(2, 6)}",
+                        "guests": {"adults": rng.randint(1, 4)}
+                    })
+                    _, etag, _, _ = request(conn, "GET", "/api/itinerary")
+                    status, _, payload, retry_after = request(conn, "POST", "/api/generate", body, {
+                        "Content-Type": "application/json", "If-Match": etag or '"0"'
+                    })
+                    # Another user saving first is a lost race, as for save
+                    ok = status == 409 or (status == 200 and "error" not in json.loads(payload))
+                elif operation == "get":
+                    status, _, _, _ = request(conn, "GET", "/api/itinerary")
+                    ok = status == 200
+                else:
+                    status, etag, payload, _ = request(conn, "GET", "/api/itinerary")
+                    status, _, _, _ = request(conn, "POST", "/api/save", payload, {
+                        "Content-Type": "application/json", "If-Match": etag or '"0"'
+                    })
+                    # A 409 is the expected outcome of a lost race, not an error
+                    ok = status in (200, 409)
+            except (OSError, ValueError, http.client.HTTPException):
+                ok = False
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+            elapsed = time.perf_counter() - started
+            # A 503 with Retry-After is load shedding, counted apart from errors
+            shed = not ok and status == 503 and retry_after is not None
+            latencies, counts = results[operation]
+            with lock:
+                latencies.append(elapsed)
+                counts[1 if shed else 0] += not ok
+            if shed:
+                # Back off like a client honouring Retry-After, capped to keep load on
+                time.sleep(min(float(retry_after), 1.0))
+
+    threads = [threading.Thread(target=user, args=(i,)) for i in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    summary = {name: summarize(latencies, counts[0], duration, counts[1])
+               for name, (latencies, counts) in results.items()}
+    summary["overall"] = summarize(
+        [latency for latencies, _ in results.values() for latency in latencies],
+        sum(counts[0] for _, counts in results.values()),
+        duration,
+        sum(counts[1] for _, counts in results.values())
+    )
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mode", choices=["dev", "asgi"], default="dev")
+    parser.add_argument("--users", type=int, default=16, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("generate=1,get=8,save=1"),
+                        help="Operation weights (default: generate=1,get=8,save=1)")
+    parser.add_argument("--workers", type=int, default=2, help="ASGI worker processes")
+    parser.add_argument("--otm-latency", type=float, default=0.05,
+                        help="OpenTripMap stub latency in seconds")
+    parser.add_argument("--llm-latency", type=float, default=2.0,
+                        help="Gemini stub latency in seconds")
+    parser.add_argument("--provider", choices=["gemini", "local"], default="gemini",
+                        help="LLM provider: gemini against the stub, or the built-in local "
+                             "provider with --llm-latency (needs no Gemini SDK)")
+    parser.add_argument("--llm-capacity", type=int, default=0,
+                        help="Concurrent calls the Gemini stub serves before answering 429 (default: unlimited)")
+    parser.add_argument("--llm-days", type=int, default=3,
+                        help="Days in the stub's itinerary when the prompt gives no trip length")
+    parser.add_argument("--model-tiers", metavar="MODELS",
+                        help="LLM_MODEL_TIERS for the server (default: the backend's fast-then-strong tiers)")
+    parser.add_argument("--fast-latency", type=float,
+                        help="Gemini stub latency of 'lite' models (default: 0.4 x --llm-latency)")
+    parser.add_argument("--fast-flaw-rate", type=float, default=0.1,
+                        help="Share of 'lite' model answers that fail the quality checks and escalate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=18090)
+    parser.add_argument("--output", metavar="FILE", help="Also write the report to this file")
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument("--record", metavar="CASSETTE",
+                          help="Record the server's upstream traffic to this cassette")
+    cassette.add_argument("--replay", metavar="CASSETTE",
+                          help="Answer upstream calls from this cassette instead of the stubs")
+    parser.add_argument("--replay-latency-scale", type=float, default=0.0,
+                        help="Replay recorded latencies scaled by this factor (default: 0)")
+    args = parser.parse_args(argv)
+
+    otm = OpenTripMapStub(latency=args.otm_latency).start()
+    fast_latency = 0.4 * args.llm_latency if args.fast_latency is None else args.fast_latency
+    gemini = GeminiStub(latency=args.llm_latency, days=args.llm_days, capacity=args.llm_capacity,
+                        fast_latency=fast_latency, fast_flaw_rate=args.fast_flaw_rate, seed=args.seed).start()
+    data_dir = tempfile.mkdtemp(prefix="wandertrip-load-")
+    with open(os.path.join(data_dir, "itinerary_data.json"), "w") as f:
+        json.dump(make_itinerary(days=args.llm_days), f, indent=2)
+
+    env = {
+        "OPENTRIPMAP_API_KEY": "stub",
+        "OPENTRIPMAP_BASE_URL": otm.base_url,
+        "GEMINI_API_KEY": "stub",
+        "GEMINI_API_ENDPOINT": gemini.url,
+        "LOG_LEVEL": "WARNING",
+        "LLM_PROVIDER": args.provider,
+        "LOCAL_LLM_LATENCY": str(args.llm_latency)
+    }
+    if args.model_tiers is not None:
+        env["LLM_MODEL_TIERS"] = args.model_tiers
+    if args.record or args.replay:
+        env.update({
+            "CASSETTE_MODE": "record" if args.record else "replay",
+            "CASSETTE_PATH": os.path.abspath(args.record or args.replay),
+            "CASSETTE_LATENCY_SCALE": str(args.replay_latency_scale)
+        })
+    process = start_server(args.mode, args.port, data_dir, args.workers, env=env)
+    try:
+        results = run_users(args.port, args.users, args.duration, args.mix, args.seed)
+    finally:
+        stop_server(process)
+        otm.stop()
+        gemini.stop()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    report = json.dumps({
+        "mode": args.mode,
+        "users": args.users,
+        "duration_s": args.duration,
+        "mix": args.mix,
+        "stubs": {
+            "otm_latency_s": args.otm_latency,
+            "llm_latency_s": args.llm_latency,
+            "llm_fast_latency_s": fast_latency,
+            "llm_fast_flaw_rate": args.fast_flaw_rate,
+            "llm_capacity": args.llm_capacity,
+            "llm_rejected": gemini.rejected,
+            "llm_response_bytes": len(gemini.response_text),
+            "otm_requests": otm.requests,
+            "llm_requests": gemini.requests,
+            "llm_requests_by_model": gemini.model_requests
+        },
+        "results": results
+    }, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    return 1 if results["overall"]["errors"] else 0
+
+
+if __name__ == "__main__":
+    exit(main())
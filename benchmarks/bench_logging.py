@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Logging overhead benchmark
+Measures what a request thread pays per log call under the queue-based setup
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+from backend.observability.log import (
+    configure_logging, get_logger, log_payload, request_context, shutdown_logging
+)
+from benchmarks.fixtures import make_itinerary
+
+# Log calls made by one /api/generate at INFO after the print() migration
+CALLS_PER_REQUEST = 5
+
+
+def per_call_us(func, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return round((time.perf_counter() - started) / iterations * 1e6, 3)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=100000)
+    parser.add_argument("--format", choices=["text", "json"], default="json")
+    args = parser.parse_args(argv)
+
+    # Output goes to an in-memory sink so disk/terminal speed is not measured
+    sink = io.StringIO()
+    configure_logging(level="INFO", fmt=args.format, stream=sink)
+    logger = get_logger("bench")
+    payload = make_itinerary(days=4)
+
+    def emitted():
+        logger.info("Itinerary saved as version %d", 7)
+
+    def filtered():
+        logger.debug("Prompt built: %d chars", 4096)
+
+    def payload_filtered():
+        log_payload(logger, "Generate request", payload)
+
+    def print_baseline():
+        print(f"💾 [API_SAVE] ✅ File saved successfully (version {7})!", file=sink)
+
+    with request_context(request_id="bench", destination="Paris"):
+        results = {
+            "info_emitted_us": per_call_us(emitted, args.iterations),
+            "debug_filtered_us": per_call_us(filtered, args.iterations),
+            "payload_filtered_us": per_call_us(payload_filtered, args.iterations),
+            "print_baseline_us": per_call_us(print_baseline, args.iterations),
+        }
+    shutdown_logging()
+
+    results["per_request_at_info_us"] = round(results["info_emitted_us"] * CALLS_PER_REQUEST, 2)
+    print(json.dumps({"iterations": args.iterations, "format": args.format, **results}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the pure-Python hot paths
+Warmed-up, multi-round timings with a compare mode for regression review
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+from backend.itinerary_service import build_prompt
+from backend.llm.compact import compact_itinerary, expand_itinerary
+from backend.models import Itinerary
+from backend.storage import JsonCodec, open_store
+from backend.utils import geocoding
+from backend.utils.poi_service import get_fallback_pois, get_fallback_pois_by_coordinates
+from benchmarks.fixtures import make_gazetteer, make_itinerary, make_pois
+
+# Registered cases: name -> context manager factory yielding the function to time
+CASES = {}
+
+
+def case(name):
+    def register(factory):
+        CASES[name] = contextmanager(factory)
+        return factory
+    return register
+
+
+@case("build_prompt[10 pois]")
+def _build_prompt_small():
+    pois = make_pois(10)
+    yield lambda: build_prompt("Paris", "2025-06-01", "2025-06-04", 2, pois)
+
+
+@case("build_prompt[1k pois]")
+def _build_prompt_large():
+    pois = make_pois(1000)
+    yield lambda: build_prompt("Paris", "2025-06-01", "2025-06-04", 2, pois)
+
+
+@case("get_city_coordinates[exact]")
+def _coordinates_exact():
+    yield lambda: geocoding.get_city_coordinates("Lisbon")
+
+
+@case("get_city_coordinates[miss]")
+def _coordinates_miss():
+    yield lambda: geocoding.get_city_coordinates("Atlantis")
+
+
+@contextmanager
+def _gazetteer(count):
+    original = geocoding.CITY_COORDINATES
+    geocoding.CITY_COORDINATES = {**original, **make_gazetteer(count)}
+    try:
+        yield
+    finally:
+        geocoding.CITY_COORDINATES = original
+
+
+@case("get_city_coordinates[1k cities, partial]")
+def _coordinates_partial_large():
+    with _gazetteer(1000):
+        yield lambda: geocoding.get_city_coordinates("Greater Dublin Area")
+
+
+@case("get_city_coordinates[1k cities, miss]")
+def _coordinates_miss_large():
+    with _gazetteer(1000):
+        yield lambda: geocoding.get_city_coordinates("Atlantis")
+
+
+@case("get_fallback_pois")
+def _fallback_pois():
+    yield lambda: get_fallback_pois("Rome")
+
+
+@case("get_fallback_pois_by_coordinates")
+def _fallback_pois_by_coordinates():
+    yield lambda: get_fallback_pois_by_coordinates(41.9, 12.5)
+
+
+@case("Itinerary.from_dict[4 days]")
+def _from_dict_small():
+    data = make_itinerary(days=4)
+    yield lambda: Itinerary.from_dict(data)
+
+
+@case("Itinerary.from_dict[1k activities]")
+def _from_dict_large():
+    # 83 days x 3 periods x 4 activities + 4 extras = 1000 activities
+    data = make_itinerary(days=83, activities_per_period=4, extras=4)
+    yield lambda: Itinerary.from_dict(data)
+
+
+@case("Itinerary.to_dict[1k activities]")
+def _to_dict_large():
+    itinerary = Itinerary.from_dict(make_itinerary(days=83, activities_per_period=4, extras=4))
+    yield itinerary.to_dict
+
+
+@case("expand_itinerary[1k activities]")
+def _expand_large():
+    compact = compact_itinerary(make_itinerary(days=83, activities_per_period=4, extras=4))
+    start = datetime(2025, 6, 1)
+    yield lambda: expand_itinerary(compact, "Paris", start)
+
+
+@case("JsonCodec.encode[1k activities]")
+def _json_encode_large():
+    codec = JsonCodec()
+    data = make_itinerary(days=83, activities_per_period=4, extras=4)
+    yield lambda: codec.encode(data)
+
+
+@case("ItineraryStore.save[4 days]")
+def _store_save():
+    data_dir = tempfile.mkdtemp(prefix="wandertrip-micro-")
+    try:
+        store = open_store(data_dir)
+        data = make_itinerary(days=4)
+        yield lambda: store.save(data)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def calibrate(func, min_round_time):
+    """Smallest power-of-ten loop count whose round takes at least min_round_time"""
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        if time.perf_counter() - started >= min_round_time or loops >= 10 ** 7:
+            return loops
+        loops *= 10
+
+
+def measure(func, rounds, warmup, min_round_time):
+    """
+    Time func over warmed-up rounds
+
+    Returns:
+        dict: Per-call statistics in microseconds
+    """
+    for _ in range(warmup):
+        func()
+    loops = calibrate(func, min_round_time)
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter() - started) / loops * 1e6)
+    quartiles = statistics.quantiles(samples, n=4) if len(samples) > 1 else [samples[0]] * 3
+    return {
+        "median_us": round(statistics.median(samples), 3),
+        "mean_us": round(statistics.mean(samples), 3),
+        "stdev_us": round(statistics.stdev(samples), 3) if len(samples) > 1 else 0.0,
+        "min_us": round(min(samples), 3),
+        "iqr_us": round(quartiles[2] - quartiles[0], 3),
+        "loops": loops,
+        "rounds": rounds
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Rows of (name, before, after, change) and names slower than tolerance"""
+    rows, regressions = [], []
+    for name, row in results.items():
+        before = baseline.get(name)
+        if before is None:
+            rows.append((name, None, row["median_us"], None))
+            continue
+        change = row["median_us"] / before["median_us"] - 1
+        rows.append((name, before["median_us"], row["median_us"], change))
+        # Only flag slowdowns bigger than the noise of both runs
+        noise = (row["iqr_us"] + before["iqr_us"]) / before["median_us"]
+        if change > max(tolerance - 1, noise):
+            regressions.append(name)
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filter", "-k", default="", help="Only run cases containing this text")
+    parser.add_argument("--rounds", type=int, default=15)
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed calls before measuring")
+    parser.add_argument("--min-round-time", type=float, default=0.05,
+                        help="Seconds each round runs for at least (default: 0.05)")
+    parser.add_argument("--save", metavar="FILE", help="Write results as a baseline")
+    parser.add_argument("--compare", metavar="FILE", help="Diff against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=1.15,
+                        help="Slowdown factor counted as a regression (default: 1.15)")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, factory in CASES.items():
+        if args.filter not in name:
+            continue
+        with factory() as func:
+            results[name] = measure(func, args.rounds, args.warmup, args.min_round_time)
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows, regressions = compare(results, baseline, args.tolerance)
+        print(f"{'case':<42}{'before us':>12}{'after us':>12}{'change':>9}")
+        for name, before, after, change in rows:
+            before_text = f"{before:.3f}" if before is not None else "-"
+            change_text = f"{change:+.1%}" if change is not None else "new"
+            flag = "  <-- slower" if name in regressions else ""
+            print(f"{name:<42}{before_text:>12}{after:>12.3f}{change_text:>9}{flag}")
+    else:
+        print(f"{'case':<42}{'median us':>12}{'iqr us':>10}{'min us':>12}{'loops':>9}")
+        for name, row in results.items():
+            print(f"{name:<42}{row['median_us']:>12.3f}{row['iqr_us']:>10.3f}"
+                  f"{row['min_us']:>12.3f}{row['loops']:>9}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    for name in regressions:
+        print(f"FAIL: {name} regressed beyond {args.tolerance}x")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    exit(main())
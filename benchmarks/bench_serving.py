@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Serving-mode throughput benchmark
+Compares the Flask dev server with the ASGI server on read/save traffic
+"""
+
+import argparse
+import http.client
+import json
+import os
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+from benchmarks.fixtures import make_itinerary
+
+
+def start_server(mode, port, data_dir, workers, env=None):
+    """Launch main.py in a subprocess and wait until it answers"""
+    process = subprocess.Popen(
+        [sys.executable, "main.py", "--mode", mode, "--port", str(port),
+         "--workers", str(workers), "--data-dir", data_dir],
+        cwd=PROJECT_ROOT,
+        env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        # Own process group, so the dev server's reloader child is stopped too
+        start_new_session=True
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/")
+            conn.getresponse().read()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError(f"{mode} server did not start on port {port}")
+
+
+def stop_server(process):
+    os.killpg(process.pid, signal.SIGTERM)
+    process.wait()
+
+
+def run_load(port, clients, duration, save_ratio):
+    """Drive GET /api/itinerary and POST /api/save from concurrent clients"""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+    save_every = round(1 / save_ratio) if save_ratio > 0 else 0
+
+    def client(index):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        count = 0
+        while time.perf_counter() < stop_at:
+            count += 1
+            started = time.perf_counter()
+            try:
+                conn.request("GET", "/api/itinerary")
+                response = conn.getresponse()
+                body = response.read()
+                ok = response.status == 200
+                if ok and save_every and count % save_every == 0:
+                    version = json.loads(body)["version"]
+                    conn.request("POST", "/api/save", body=body, headers={
+                        "Content-Type": "application/json",
+                        "If-Match": f'"{version}"'
+                    })
+                    response = conn.getresponse()
+                    response.read()
+                    # A 409 is the expected outcome of a lost race, not an error
+                    ok = response.status in (200, 409)
+            except OSError:
+                ok = False
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                errors[0] += not ok
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    quantile = lambda q: round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 2)
+    return {
+        "requests": len(latencies),
+        "throughput": round(len(latencies) / duration, 1),
+        "p50_ms": quantile(0.50),
+        "p95_ms": quantile(0.95),
+        "p99_ms": quantile(0.99),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 2) if latencies else None,
+        "errors": errors[0]
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--modes", nargs="+", default=["dev", "asgi"])
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=2, help="ASGI worker processes")
+    parser.add_argument("--save-ratio", type=float, default=0.1, help="Fraction of reads followed by a save")
+    parser.add_argument("--port", type=int, default=18080)
+    args = parser.parse_args(argv)
+
+    results = {}
+    for offset, mode in enumerate(args.modes):
+        data_dir = tempfile.mkdtemp(prefix=f"wandertrip-bench-{mode}-")
+        with open(os.path.join(data_dir, "itinerary_data.json"), "w") as f:
+            json.dump(make_itinerary(days=4), f, indent=2)
+        port = args.port + offset
+        process = start_server(mode, port, data_dir, args.workers)
+        try:
+            results[mode] = run_load(port, args.clients, args.duration, args.save_ratio)
+        finally:
+            stop_server(process)
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    print(json.dumps({
+        "clients": args.clients,
+        "duration_s": args.duration,
+        "save_ratio": args.save_ratio,
+        "results": results
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,121 @@
+"""
+Synthetic itinerary fixtures for WanderTrip benchmarks
+Deterministic documents shaped like the frontend itinerary JSON
+"""
+
+import random
+from datetime import datetime, timedelta
+
+
+_PLACES = [
+    "Museum", "Cathedral", "Market", "Old Town", "Harbour", "Botanical Garden",
+    "Castle", "Gallery", "Riverside Walk", "Food Hall", "Observation Deck",
+    "Palace", "Park", "Bridge", "Temple", "Opera House", "Library", "Square"
+]
+_ADJECTIVES = [
+    "Historic", "Royal", "Grand", "Hidden", "Famous", "Modern", "Ancient",
+    "Local", "National", "Central", "Iconic", "Vibrant"
+]
+_PHRASES = [
+    "Explore the highlights at a relaxed pace.",
+    "Enjoy local cuisine and the lively atmosphere.",
+    "Drive over and park nearby before the crowds arrive.",
+    "Take in panoramic views of the city skyline.",
+    "Browse local crafts and souvenirs.",
+    "Learn about the region's history and culture.",
+    "Stroll through the streets and stop for coffee."
+]
+_TIMES = {
+    "morning": ["09:00", "10:00", "10:30", "11:30"],
+    "afternoon": ["13:00", "14:00", "15:30", "16:30"],
+    "evening": ["18:30", "19:00", "20:00", "21:00"]
+}
+
+
+def make_pois(count, seed=0):
+    """Build a list of `count` POI dicts like the ones get_pois returns"""
+    rng = random.Random(seed)
+    return [
+        {"name": f"{rng.choice(_ADJECTIVES)} {rng.choice(_PLACES)} {i}", "type": "interesting_places"}
+        for i in range(count)
+    ]
+
+
+def make_itinerary(days=3, activities_per_period=2, extras=12, destination="Paris", seed=0):
+    """
+    Build a synthetic itinerary document
+
+    Args:
+        days (int): Number of days
+        activities_per_period (int): Activities in each morning/afternoon/evening
+        extras (int): Number of additional activities
+        destination (str): Destination name
+        seed (int): Random seed, so the same arguments give the same document
+
+    Returns:
+        dict: Itinerary in the frontend JSON format
+    """
+    rng = random.Random(seed)
+    start = datetime(2025, 11, 5) + timedelta(days=rng.randrange(60))
+
+    def activity_text():
+        return (
+            f"{rng.choice(_ADJECTIVES)} {rng.choice(_PLACES)}",
+            " ".join(rng.sample(_PHRASES, 2))
+        )
+
+    day_list = []
+    for day_index in range(days):
+        date = (start + timedelta(days=day_index)).strftime("%b %d, %Y")
+        periods = {}
+        for period, times in _TIMES.items():
+            activities = []
+            for i in range(activities_per_period):
+                name, description = activity_text()
+                activities.append({
+                    "time": times[i % len(times)],
+                    "activity": name,
+                    "description": description,
+                    "id": f"day{day_index + 1}_{period}_{i}"
+                })
+            periods[period] = activities
+        day_list.append({"dayNumber": day_index + 1, "date": date, "periods": periods})
+
+    additional = []
+    for i in range(extras):
+        name, description = activity_text()
+        additional.append({
+            "id": f"extra_activity_{i}",
+            "activity": name,
+            "description": description,
+            "duration": rng.choice(["1 hour", "1-2 hours", "2-3 hours", "Half day"]),
+            "type": "additional"
+        })
+
+    return {
+        "destination": destination,
+        "startDate": start.strftime("%b %d, %Y"),
+        "days": day_list,
+        "additionalActivities": additional,
+        "userInputs": {
+            "destination": destination,
+            "adults": rng.randint(1, 4),
+            "startDate": start.strftime("%Y-%m-%d"),
+            "endDate": (start + timedelta(days=days)).strftime("%Y-%m-%d")
+        },
+        "version": rng.randint(1, 20)
+    }
+
+
+def make_gazetteer(count, seed=0):
+    """Build a `count`-city name -> (lat, lon) table shaped like CITY_COORDINATES"""
+    rng = random.Random(seed)
+    syllables = ["an", "bel", "cor", "dun", "el", "fra", "gor", "hal", "ist", "jor",
+                 "kel", "lun", "mar", "nor", "os", "pra", "qui", "ros", "san", "tor"]
+    gazetteer = {}
+    while len(gazetteer) < count:
+        name = "".join(rng.choice(syllables) for _ in range(rng.randint(2, 4)))
+        if rng.random() < 0.3:
+            name += " " + rng.choice(["city", "bay", "springs", "heights"])
+        gazetteer[name] = (round(rng.uniform(-60, 70), 4), round(rng.uniform(-180, 180), 4))
+    return gazetteer
@@ -0,0 +1,279 @@
+"""
+Local stand-ins for OpenTripMap and Gemini
+HTTP servers with configurable latency and response size for load tests
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from backend.llm.compact import compact_itinerary
+from benchmarks.fixtures import make_itinerary, make_pois
+
+
+class _StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Load tests open many connections at once
+    request_queue_size = 1024
+
+    def __init__(self, handler, latency=0.0, port=0):
+        super().__init__(("127.0.0.1", port), handler)
+        self.latency = latency
+        self.requests = 0
+        self._count_lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def count(self):
+        with self._count_lock:
+            self.requests += 1
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name=type(self).__name__, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _JsonHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass  # keep benchmark output clean
+
+    def send_json(self, body, status=200):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def delay(self):
+        self.server.count()
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+
+class _OpenTripMapHandler(_JsonHandler):
+    """Answers /geoname, /radius and /xid/<id> like api.opentripmap.com/0.1/en/places"""
+
+    def do_GET(self):
+        self.delay()
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if url.path.endswith("/geoname"):
+            name = query.get("name", "")
+            # Stable pseudo-coordinates per city name
+            seed = sum(map(ord, name))
+            self.send_json({"name": name, "country": "XX", "lat": 40 + seed % 20 / 10,
+                            "lon": seed % 50 / 10, "population": 100000, "status": "OK"})
+        elif url.path.endswith("/radius"):
+            limit = int(query.get("limit", 10))
+            pois = make_pois(limit, seed=int(float(query.get("lat", 0)) * 1000))
+            self.send_json({"type": "FeatureCollection", "features": [
+                {"type": "Feature", "id": str(i),
+                 "geometry": {"type": "Point", "coordinates": [0, 0]},
+                 "properties": {"xid": f"N{i}", "name": poi["name"], "rate": 3, "kinds": poi["type"]}}
+                for i, poi in enumerate(pois)
+            ]})
+        elif "/xid/" in url.path:
+            xid = url.path.rsplit("/", 1)[-1]
+            self.send_json({"xid": xid, "name": f"Place {xid}", "kinds": "interesting_places",
+                            "wikipedia_extracts": {"text": "A notable place."}})
+        else:
+            self.send_json({"error": "Unknown endpoint"}, status=404)
+
+
+_GENERATE_PATH = re.compile(r"^/v1(?:beta)?/models/([^/:]+):(generateContent|countTokens)$")
+_CACHE_PATH = re.compile(r"^/v1(?:beta)?/cachedContents$")
+_CACHE_REFERENCE = re.compile(rb'"cachedContent":\s*"([^"]+)"')
+_TRIP_DAYS = re.compile(r"Create a (\d+)-day")
+_TRIP_POIS = re.compile(r"Suggested POIs include: (.*?)(?: \(plus \d+ more nearby\))?\.\n")
+
+
+class _GeminiHandler(_JsonHandler):
+    """Answers models/<model>:generateContent and cachedContents like the Gemini REST API"""
+
+    def do_POST(self):
+        self.server.count()
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        path = urlparse(self.path).path
+        if _CACHE_PATH.match(path):
+            self.create_cache(body)
+            return
+        match = _GENERATE_PATH.match(path)
+        if not match:
+            self.send_json({"error": {"code": 404, "message": "Unknown method"}}, status=404)
+            return
+        model = match.group(1)
+        if match.group(2) == "countTokens":
+            self.send_json({"totalTokens": length // 4})
+            return
+        cache = None
+        reference = _CACHE_REFERENCE.search(body)
+        if reference:
+            cache = self.server.caches.get(reference.group(1).decode())
+            if cache is None:
+                self.send_json({"error": {"code": 404, "message": "Cached content not found"}}, status=404)
+                return
+        latency = self.server.model_latency(model)
+        if not self.server.admit(model):
+            # Over capacity: fail like a quota error, after some of the latency
+            time.sleep(latency / 2)
+            self.send_json({"error": {"code": 429, "message": "Resource has been exhausted",
+                                      "status": "RESOURCE_EXHAUSTED"}}, status=429)
+            return
+        try:
+            time.sleep(latency)
+            self.send_generation(body, cache, model)
+        finally:
+            self.server.leave()
+
+    def send_generation(self, body, cache, model):
+        # Answer in whichever format the prompt (or its cached prefix) asked for
+        compact = b"compact JSON" in body or (cache is not None and cache["compact"])
+        text = self.server.generation_text(_prompt_text(body), compact, model)
+        cached_tokens = cache["tokens"] if cache else 0
+        length = len(body)
+        self.send_json({
+            "candidates": [{
+                "content": {"parts": [{"text": text}], "role": "model"},
+                "finishReason": "STOP",
+                "index": 0
+            }],
+            "usageMetadata": {
+                "promptTokenCount": length // 4 + cached_tokens,
+                "cachedContentTokenCount": cached_tokens,
+                "candidatesTokenCount": len(text) // 4,
+                "totalTokenCount": (length + len(text)) // 4 + cached_tokens
+            }
+        })
+
+    def create_cache(self, body):
+        request = json.loads(body or b"{}")
+        name = f"cachedContents/stub-{len(self.server.caches)}"
+        self.server.caches[name] = {"tokens": len(body) // 4, "compact": b"compact JSON" in body}
+        now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        expires = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() + 3600))
+        self.send_json({
+            "name": name,
+            "model": request.get("model", ""),
+            "displayName": request.get("displayName", ""),
+            "createTime": now,
+            "updateTime": now,
+            "expireTime": expires,
+            "usageMetadata": {"totalTokenCount": len(body) // 4}
+        })
+
+
+def _prompt_text(body):
+    """Prompt text of a generateContent request body"""
+    try:
+        request = json.loads(body)
+        return "".join(part.get("text", "") for content in request.get("contents", [])
+                       for part in content.get("parts", []))
+    except (ValueError, AttributeError):
+        return ""
+
+
+class OpenTripMapStub(_StubServer):
+    """
+    Stand-in for the OpenTripMap places API
+
+    Point the backend at it with OPENTRIPMAP_BASE_URL=<stub.url>/0.1/en/places.
+
+    Args:
+        latency (float): Seconds to wait before answering each request
+        port (int): Port to listen on (default: any free port)
+    """
+
+    def __init__(self, latency=0.0, port=0):
+        super().__init__(_OpenTripMapHandler, latency, port)
+
+    @property
+    def base_url(self):
+        return f"{self.url}/0.1/en/places"
+
+
+class GeminiStub(_StubServer):
+    """
+    Stand-in for the Gemini generateContent and cachedContents REST endpoints
+
+    Point the backend at it with GEMINI_API_ENDPOINT=<stub.url>.
+
+    Args:
+        latency (float): Seconds to wait before answering each request
+        days (int): Days in the returned itinerary, which sets response size
+        capacity (int): Concurrent generations served before answering 429
+            like an exhausted quota (default: unlimited)
+        port (int): Port to listen on (default: any free port)
+        fast_latency (float): Latency of 'lite' models (default: latency)
+        fast_flaw_rate (float): Share of 'lite' model answers that ignore
+            the suggested POIs, failing the backend's quality checks
+        seed (int): Seed for choosing the flawed answers
+    """
+
+    def __init__(self, latency=0.0, days=3, capacity=0, port=0, fast_latency=None, fast_flaw_rate=0.0, seed=0):
+        super().__init__(_GeminiHandler, latency, port)
+        self.days = days
+        self.capacity = capacity
+        self.fast_latency = latency if fast_latency is None else fast_latency
+        self.fast_flaw_rate = fast_flaw_rate
+        self.active = 0
+        self.rejected = 0
+        # Generations per model name
+        self.model_requests = {}
+        self._rng = random.Random(seed)
+        # Fenced like real model output so the markdown stripping is exercised
+        self.response_text = self._full_text(make_itinerary(days=days))
+        # Context caches created through cachedContents, by name
+        self.caches = {}
+
+    @staticmethod
+    def _full_text(itinerary):
+        return "```json\n" + json.dumps(itinerary, indent=2) + "\n```"
+
+    def model_latency(self, model):
+        return self.fast_latency if "lite" in model else self.latency
+
+    def generation_text(self, prompt, compact, model):
+        """
+        Answer for a prompt: as many days as it asks for, scheduling its POIs
+
+        A fast_flaw_rate share of 'lite' answers use made-up places instead.
+        """
+        days = _TRIP_DAYS.search(prompt)
+        pois = _TRIP_POIS.search(prompt)
+        itinerary = make_itinerary(days=max(1, int(days.group(1))) if days else self.days)
+        with self._count_lock:
+            flawed = "lite" in model and self._rng.random() < self.fast_flaw_rate
+        if pois and not flawed:
+            activities = [activity for day in itinerary["days"]
+                          for period in day["periods"].values() for activity in period]
+            for activity, name in zip(activities, pois.group(1).split(", ")):
+                activity["activity"] = f"Visit {name}"
+        return json.dumps(compact_itinerary(itinerary)) if compact else self._full_text(itinerary)
+
+    def admit(self, model=""):
+        """Take a generation slot; False when over capacity"""
+        with self._count_lock:
+            self.model_requests[model] = self.model_requests.get(model, 0) + 1
+            if self.capacity and self.active >= self.capacity:
+                self.rejected += 1
+                return False
+            self.active += 1
+            return True
+
+    def leave(self):
+        with self._count_lock:
+            self.active -= 1
@@ -49,23 +49,31 @@ document.addEventListener("DOMContentLoaded", function () {
       (tripReturnDate - tripStartDate) / (1000 * 60 * 60 * 24)
     );
 
-    // Call Flask API to generate itinerary
-    fetch("http://localhost:8080/api/generate", {
-      method: "POST",
-      headers: {
-        "Content-Type": "application/json",
-      },
-      body: JSON.stringify({
-        destination: searchData.destination,
-        days: days,
-        guests: {
-          adults: searchData.adults,
+    // Call Flask API to generate itinerary, replacing the plan stored now
+    fetch("http://localhost:8080/api/itinerary")
+      .then((response) => (response.ok ? response.headers.get("ETag") : null))
+      .catch(() => null)
+      .then((etag) => fetch("http://localhost:8080/api/generate", {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+          // Optimistic concurrency: a plan saved meanwhile is not overwritten
+          "If-Match": etag || '"0"',
         },
-        startDate: searchData.startDate,
-        endDate: searchData.returnDate,
-      }),
-    })
+        body: JSON.stringify({
+          destination: searchData.destination,
+          days: days,
+          guests: {
+            adults: searchData.adults,
+          },
+          startDate: searchData.startDate,
+          endDate: searchData.returnDate,
+        }),
+      }))
       .then((response) => {
+        if (response.status === 409) {
+          throw new Error("The current plan was changed by another save");
+        }
         if (!response.ok) {
           throw new Error(`HTTP error! status: ${response.status}`);
         }
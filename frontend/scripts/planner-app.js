@@ -694,13 +694,20 @@ async function saveItinerary() {
       method: "POST",
       headers: {
         "Content-Type": "application/json",
+        // Optimistic concurrency: only save over the version we loaded
+        "If-Match": `"${itineraryData.version || 0}"`,
       },
       body: JSON.stringify(itineraryData),
     });
 
     if (response.ok) {
+      const result = await response.json();
+      itineraryData.version = result.version;
       console.log("Itinerary saved successfully");
       showMessage("Changes saved!", "success");
+    } else if (response.status === 409) {
+      console.error("Itinerary was changed elsewhere");
+      showMessage("This trip was changed elsewhere. Reload to see the latest version.", "error");
     } else {
       console.error("Failed to save itinerary");
       showMessage("Failed to save changes", "error");
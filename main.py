@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
 """
 WanderTrip Main Entry Point
-Starts the Flask API server using the backend package
+Starts the API server using the backend package
+
+    python main.py                               # Flask dev server
+    python main.py --mode asgi --workers 4       # production ASGI server
 """
 
-from backend import create_app
+from backend.serve import main
 
 if __name__ == '__main__':
-    app = create_app()
-    app.run(debug=True, port=8080, host='127.0.0.1')
\ No newline at end of file
+    main()
@@ -27,10 +27,9 @@ def start_backend():
         return None
     
     try:
-        # Start backend server
+        # Start backend server (the backend package is run from the project root)
         backend_process = subprocess.Popen(
             [sys.executable, "main.py"],
-            cwd=backend_path,
             creationflags=subprocess.CREATE_NEW_CONSOLE if os.name == 'nt' else 0
         )
         print("✅ Backend server started")
@@ -3,7 +3,7 @@ echo Starting WanderTrip Application...
 echo.
 
 echo Starting Backend Server (Flask on port 8080)...
-start "Backend Server" cmd /k "cd /d backend && python main.py"
+start "Backend Server" cmd /k "python main.py"
 
 echo Waiting 3 seconds for backend to start...
 timeout /t 3 /nobreak >nul
@@ -18,7 +18,6 @@ if (-not (Test-Path "backend") -or -not (Test-Path "frontend")) {
 Write-Host "🚀 Starting Backend Server (Flask on port 8080)..." -ForegroundColor Green
 $backendJob = Start-Job -ScriptBlock {
     Set-Location $using:PWD
-    Set-Location backend
     python main.py
 }
 
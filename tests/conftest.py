@@ -0,0 +1,11 @@
+"""
+Shared fixtures for the WanderTrip backend tests
+Puts the project root on sys.path, like the benchmarks do
+"""
+
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
@@ -0,0 +1,65 @@
+"""
+Tests for regenerating one day of an itinerary
+What the quality check counts as repeating something already planned
+"""
+
+from backend.itinerary_service import _check_regenerated, build_day_prompt
+
+PERIODS = ("morning", "afternoon", "evening")
+POIS = [{"name": "Louvre"}, {"name": "Eiffel Tower"}, {"name": "Musée d'Orsay"}, {"name": "Sainte-Chapelle"}]
+
+
+def _day(number, morning, afternoon, evening):
+    return {
+        "dayNumber": number,
+        "date": f"Jun {number:02d}, 2025",
+        "periods": {
+            period: [{"time": time, "activity": name, "description": "", "id": f"day{number}_{period}_{i}"}
+                     for i, (time, name) in enumerate(activities)]
+            for period, activities in (("morning", morning), ("afternoon", afternoon), ("evening", evening))
+        }
+    }
+
+
+ITINERARY = {
+    "destination": "Paris",
+    "startDate": "Jun 01, 2025",
+    "days": [
+        _day(1, [("10:00", "Visit Louvre")], [("13:00", "Lunch at a local restaurant")],
+             [("19:30", "Seine river cruise")]),
+        _day(2, [("10:00", "Visit Eiffel Tower")], [("13:00", "Lunch at a local restaurant")],
+             [("19:30", "Dinner in Le Marais")]),
+    ],
+    "additionalActivities": [],
+    "userInputs": {"destination": "Paris", "adults": 2, "startDate": "2025-06-01", "endDate": "2025-06-03"}
+}
+
+
+def _regenerated(morning, afternoon, evening):
+    return {"destination": "Paris", "startDate": "Jun 02, 2025",
+            "days": [_day(2, morning, afternoon, evening)], "additionalActivities": []}
+
+
+def _problems(regenerated):
+    _, trip, planned_pois = build_day_prompt(ITINERARY, 1, PERIODS, POIS)
+    return _check_regenerated(PERIODS, planned_pois)(regenerated, trip)
+
+
+def test_meal_planned_on_another_day_is_not_a_repeat():
+    regenerated = _regenerated([("10:00", "Visit Musée d'Orsay")], [("13:00", "Lunch at a local restaurant")],
+                               [("19:30", "Evening at Sainte-Chapelle")])
+
+    assert _problems(regenerated) == []
+
+
+def test_poi_planned_on_another_day_is_a_repeat():
+    regenerated = _regenerated([("10:00", "Morning at the Louvre")], [("13:00", "Lunch at a local restaurant")],
+                               [("19:30", "Evening at Sainte-Chapelle")])
+
+    assert [kind for kind, _ in _problems(regenerated)] == ["repeats"]
+
+
+def test_empty_period_is_reported():
+    regenerated = _regenerated([("10:00", "Visit Musée d'Orsay")], [], [("19:30", "Evening at Sainte-Chapelle")])
+
+    assert [kind for kind, _ in _problems(regenerated)] == ["empty_period"]
@@ -0,0 +1,53 @@
+"""
+Tests for POST /api/generate
+A generation must not overwrite a plan that was saved while it ran
+"""
+
+import pytest
+
+from backend import main
+
+TRIP = {"destination": "Lyon", "startDate": "2026-05-01", "endDate": "2026-05-03", "guests": {"adults": 2}}
+
+
+def _itinerary(destination):
+    return {"destination": destination, "startDate": "May 01, 2026", "days": [], "additionalActivities": []}
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    app = main.create_app(str(tmp_path))
+    monkeypatch.setattr(main, "create_itinerary", lambda *args: _itinerary("Lyon"))
+    return app.test_client()
+
+
+def test_generate_needs_if_match(client):
+    response = client.post("/api/generate", json=TRIP)
+
+    assert response.status_code == 428
+
+
+def test_generate_replaces_the_named_version(client):
+    first = client.post("/api/generate", json=TRIP, headers={"If-Match": '"0"'})
+    second = client.post("/api/generate", json=TRIP, headers={"If-Match": first.headers["ETag"]})
+
+    assert (first.status_code, second.status_code) == (200, 200)
+    assert second.get_json()["version"] == 2
+
+
+def test_generate_keeps_a_plan_saved_while_it_ran(client, monkeypatch, tmp_path):
+    client.post("/api/generate", json=TRIP, headers={"If-Match": '"0"'})
+    # Another worker serving the same data
+    other = main.create_app(str(tmp_path)).test_client()
+
+    def generate_while_someone_saves(*args):
+        saved = other.post("/api/save", json=_itinerary("Edited"), headers={"If-Match": '"1"'})
+        assert saved.status_code == 200
+        return _itinerary("Lyon")
+
+    monkeypatch.setattr(main, "create_itinerary", generate_while_someone_saves)
+    response = client.post("/api/generate", json=TRIP, headers={"If-Match": '"1"'})
+
+    assert response.status_code == 409
+    assert response.get_json()["currentVersion"] == 2
+    assert client.get("/api/itinerary").get_json()["destination"] == "Edited"
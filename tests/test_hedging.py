@@ -0,0 +1,74 @@
+"""
+Tests for hedged LLM calls
+How a losing sync call that cannot be cancelled is charged to the hedge budget
+"""
+
+import threading
+import time
+
+from backend.llm.base import GenerationConfig, GenerationRequest, LLMResponse
+from backend.llm.hedging import Hedger
+
+
+class GatedProvider:
+    """Provider whose first call blocks until released; later calls answer at once"""
+
+    name = "gated"
+
+    def __init__(self):
+        self.config = GenerationConfig(model="model-a")
+        self.release = threading.Event()
+        self.done = threading.Event()
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate(self, request):
+        with self._lock:
+            self.calls += 1
+            first = self.calls == 1
+        if first:
+            self.release.wait(5)
+            self.done.set()
+        return LLMResponse(text="{}", model=self.config.model, provider=self.name,
+                           usage={"inputTokens": 10, "outputTokens": 20})
+
+
+def _warm_hedger():
+    """Hedger that already knows the latency and has credit for two hedges"""
+    hedger = Hedger(budget=1.0, min_samples=1)
+    hedger.observe("model-a", 0.01)
+    hedger._earn()
+    return hedger
+
+
+def test_losing_sync_call_holds_budget_until_it_finishes():
+    hedger = _warm_hedger()
+    provider = GatedProvider()
+
+    response = hedger.generate(provider, GenerationRequest(prompt="plan"), lambda response: True)
+
+    assert response.text == "{}" and provider.calls == 2
+    # Credit is left, but the primary is still running as an unpaid extra call
+    assert hedger._losers == 1
+    assert hedger._credit >= 1
+    assert not hedger._spend("model-a")
+
+    provider.release.set()
+    provider.done.wait(5)
+    for _ in range(100):
+        if hedger._losers == 0:
+            break
+        time.sleep(0.01)
+    assert hedger._losers == 0
+    assert hedger._spend("model-a")
+
+
+def test_unhedged_call_holds_no_budget():
+    hedger = Hedger(budget=1.0, min_samples=1)
+    provider = GatedProvider()
+    provider.release.set()
+
+    hedger.generate(provider, GenerationRequest(prompt="plan"), lambda response: True)
+
+    assert provider.calls == 1
+    assert hedger._losers == 0
@@ -0,0 +1,79 @@
+"""
+Tests for precomputed itinerary templates
+Which trips a stored template may answer, against a template store in a temporary directory
+"""
+
+from dataclasses import replace
+from datetime import datetime
+
+import pytest
+
+from backend import itinerary_templates
+from backend.config import get_settings
+from backend.itinerary_templates import TEMPLATE_GUESTS, TemplateStore, find_template
+
+ITINERARY = {
+    "destination": "Paris",
+    "startDate": "Jan 01, 2025",
+    "days": [
+        {"dayNumber": number, "date": f"Jan {number:02d}, 2025",
+         "periods": {"morning": [{"time": "10:00", "activity": "Louvre", "description": "",
+                                  "id": f"day{number}_morning_0"}],
+                     "afternoon": [], "evening": []}}
+        for number in (1, 2, 3)
+    ],
+    "additionalActivities": []
+}
+
+
+def _start_in(month):
+    """A start date in the given month of next year, so it is never in the past"""
+    return f"{datetime.now().year + 1}-{month:02d}-10"
+
+
+def _end_after(start, days=3):
+    return start[:-2] + f"{int(start[-2:]) + days:02d}"
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    settings = replace(get_settings(), itinerary_templates=True, template_cities=("paris",),
+                       template_lengths=(3,), template_max_age=3600.0)
+    monkeypatch.setattr(itinerary_templates, "get_settings", lambda: settings)
+    templates = TemplateStore(str(tmp_path))
+    monkeypatch.setattr(itinerary_templates, "get_template_store", lambda: templates)
+    # Built today, for TEMPLATE_GUESTS travelers
+    templates.put("paris", 3, ITINERARY)
+    return templates
+
+
+def test_matching_trip_is_served_from_the_template(store):
+    start = _start_in(datetime.now().month)
+
+    itinerary = find_template("Paris", start, _end_after(start), TEMPLATE_GUESTS)
+
+    assert itinerary is not None
+    assert [day["dayNumber"] for day in itinerary["days"]] == [1, 2, 3]
+    assert itinerary["startDate"] == datetime.strptime(start, "%Y-%m-%d").strftime("%b %d, %Y")
+    assert itinerary_templates.TEMPLATE_KEY not in itinerary
+
+
+def test_larger_party_is_not_served_a_two_guest_template(store):
+    start = _start_in(datetime.now().month)
+
+    assert find_template("Paris", start, _end_after(start), 6) is None
+
+
+def test_off_season_trip_is_not_served_this_months_template(store):
+    other_month = datetime.now().month % 12 + 1
+    start = _start_in(other_month)
+
+    assert find_template("Paris", start, _end_after(start), TEMPLATE_GUESTS) is None
+
+
+def test_template_built_for_that_month_is_served(store):
+    other_month = datetime.now().month % 12 + 1
+    store.put("paris", 3, ITINERARY, month=other_month)
+    start = _start_in(other_month)
+
+    assert find_template("Paris", start, _end_after(start), TEMPLATE_GUESTS) is not None
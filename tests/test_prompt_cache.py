@@ -0,0 +1,252 @@
+"""
+Tests for prompt-prefix caching
+Registry hits, expiry and back-off, and the Gemini provider's use of a cached prefix, against fake backends
+"""
+
+from importlib import import_module
+
+import pytest
+
+from backend.llm.base import GenerationConfig, GenerationRequest
+from backend.llm.gemini import SYSTEM_PREFIX, GeminiProvider
+from backend.llm.prompt_cache import (
+    CachedPrefix, InMemoryPromptCache, NoopPromptCache, PromptCache, RETRY_AFTER_SECONDS
+)
+
+# backend.llm exports a prompt_cache() function under the module's name
+prompt_cache = import_module("backend.llm.prompt_cache")
+gemini = import_module("backend.llm.gemini")
+
+PREFIX = "Return only compact JSON. " * 10
+
+
+class FakeClock:
+    """Stands in for the time module; advanced by hand"""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(prompt_cache, "time", fake)
+    monkeypatch.setattr(gemini, "time", fake)
+    return fake
+
+
+class FlakyPromptCache(PromptCache):
+    """Backend whose registrations fail while `failing` is set"""
+
+    name = "flaky"
+
+    def __init__(self, ttl=3600.0, min_tokens=0):
+        super().__init__(ttl, min_tokens)
+        self.failing = True
+        self.attempts = 0
+
+    def _register(self, model, prefix, tokens, digest):
+        self.attempts += 1
+        if self.failing:
+            raise RuntimeError("cache backend unavailable")
+        return CachedPrefix(name=f"flaky/{digest}", model=model, tokens=tokens,
+                            expires_at=prompt_cache.time.time() + self.ttl)
+
+
+def test_in_memory_cache_registers_once_then_hits(clock):
+    cache = InMemoryPromptCache(ttl=600)
+
+    first = cache.get("model-a", PREFIX)
+    second = cache.get("model-a", PREFIX)
+
+    assert first is not None and second is first
+    assert cache.registrations == 1
+    assert first.name.startswith("local/")
+
+
+def test_in_memory_cache_keys_on_model_and_prefix(clock):
+    cache = InMemoryPromptCache()
+
+    cache.get("model-a", PREFIX)
+    cache.get("model-b", PREFIX)
+    cache.get("model-a", PREFIX + "more")
+
+    assert cache.registrations == 3
+
+
+def test_in_memory_cache_registers_again_near_expiry(clock):
+    cache = InMemoryPromptCache(ttl=600)
+    first = cache.get("model-a", PREFIX)
+
+    # Within the one-minute safety margin the entry counts as expired
+    clock.now += 600 - 30
+    second = cache.get("model-a", PREFIX)
+
+    assert second is not first
+    assert cache.registrations == 2
+    assert second.expires_at == clock.now + 600
+
+
+def test_small_prefixes_are_not_cached(clock):
+    cache = InMemoryPromptCache(min_tokens=10_000)
+
+    assert cache.get("model-a", PREFIX) is None
+    assert cache.registrations == 0
+
+
+def test_failed_registration_backs_off(clock):
+    cache = FlakyPromptCache()
+
+    assert cache.get("model-a", PREFIX) is None
+    assert cache.get("model-a", PREFIX) is None
+    assert cache.attempts == 1
+
+    cache.failing = False
+    clock.now += RETRY_AFTER_SECONDS - 1
+    assert cache.get("model-a", PREFIX) is None
+    assert cache.attempts == 1
+
+    clock.now += 2
+    entry = cache.get("model-a", PREFIX)
+    assert entry is not None and entry.name.startswith("flaky/")
+    assert cache.attempts == 2
+
+
+def test_noop_cache_never_caches():
+    cache = NoopPromptCache()
+
+    assert cache.get("model-a", PREFIX) is None
+    assert cache.get("model-a", PREFIX) is None
+
+
+class FakeModel:
+    """GenerativeModel stand-in recording what it was asked"""
+
+    created = []
+
+    def __init__(self, model_name, cached_content=None):
+        self.model_name = model_name
+        self.cached_content = cached_content
+        self.calls = []
+        FakeModel.created.append(self)
+
+    @classmethod
+    def from_cached_content(cls, cached_content):
+        return cls(cached_content.model, cached_content=cached_content)
+
+    def generate_content(self, contents, generation_config=None):
+        self.calls.append(contents)
+        return FakeResponse('{"d": []}')
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+        self.usage_metadata = None
+
+
+class FakeGenai:
+    GenerativeModel = FakeModel
+
+
+class FakeCachedContent:
+    """What the SDK's CachedContent.create returns"""
+
+    def __init__(self, name, model):
+        self.name = name
+        self.model = model
+
+
+class FakeContextCache(PromptCache):
+    """Gemini context caches held in memory; registrations fail while `failing` is set"""
+
+    name = "fake-gemini"
+
+    def __init__(self, ttl=3600.0, min_tokens=0):
+        super().__init__(ttl, min_tokens)
+        self.failing = False
+        self.contents = []
+
+    def _register(self, model, prefix, tokens, digest):
+        if self.failing:
+            raise RuntimeError("400 Cached content is too small")
+        self.contents.append(prefix)
+        name = f"cachedContents/{len(self.contents)}"
+        return CachedPrefix(name=name, model=model, tokens=tokens,
+                            expires_at=prompt_cache.time.time() + self.ttl,
+                            handle=FakeCachedContent(name, model))
+
+
+@pytest.fixture
+def fake_sdk(monkeypatch):
+    FakeModel.created = []
+    monkeypatch.setattr(gemini, "_genai", FakeGenai)
+    monkeypatch.setattr(gemini, "get_cassette", lambda: None)
+    return FakeGenai
+
+
+def _request():
+    return GenerationRequest(prompt="Create a 3-day itinerary for Paris.", prefix=PREFIX)
+
+
+def test_gemini_sends_only_the_suffix_to_a_cached_prefix(fake_sdk, clock):
+    cache = FakeContextCache()
+    provider = GeminiProvider(GenerationConfig(model="gemini-test"), cache)
+
+    provider.generate(_request())
+    provider.generate(_request())
+
+    assert cache.contents == [SYSTEM_PREFIX + PREFIX]
+    (model,) = FakeModel.created
+    assert model.cached_content.name == "cachedContents/1"
+    assert model.calls == [_request().prompt, _request().prompt]
+
+
+def test_gemini_falls_back_to_the_full_prompt(fake_sdk, clock):
+    cache = FakeContextCache()
+    cache.failing = True
+    provider = GeminiProvider(GenerationConfig(model="gemini-test"), cache)
+
+    response = provider.generate(_request())
+
+    (model,) = FakeModel.created
+    assert model.cached_content is None
+    assert model.calls == [SYSTEM_PREFIX + _request().full_prompt]
+    assert response.model == "gemini-test"
+
+
+def test_gemini_sends_prefixes_below_the_minimum_in_full(fake_sdk, clock):
+    cache = FakeContextCache(min_tokens=1024)
+    provider = GeminiProvider(GenerationConfig(model="gemini-test"), cache)
+
+    provider.generate(_request())
+
+    assert cache.contents == []
+    (model,) = FakeModel.created
+    assert model.cached_content is None
+    assert model.calls == [SYSTEM_PREFIX + _request().full_prompt]
+
+
+def test_gemini_without_prefix_skips_the_cache(fake_sdk, clock):
+    cache = FakeContextCache()
+    provider = GeminiProvider(GenerationConfig(model="gemini-test"), cache)
+
+    provider.generate(GenerationRequest(prompt="Plan a day."))
+
+    assert cache.contents == []
+    assert FakeModel.created[0].calls == [SYSTEM_PREFIX + "Plan a day."]
+
+
+def test_gemini_drops_handles_of_expired_caches(fake_sdk, clock):
+    cache = FakeContextCache(ttl=600)
+    provider = GeminiProvider(GenerationConfig(model="gemini-test"), cache)
+
+    for _ in range(5):
+        provider.generate(_request())
+        clock.now += 600
+    # Re-registered every time, but only the live cache keeps a handle
+    assert len(cache.contents) == 5
+    assert list(provider._cached_models) == ["cachedContents/5"]
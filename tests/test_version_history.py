@@ -0,0 +1,59 @@
+"""
+Tests for the content-addressed version history
+Round trips of saved itineraries, including user data that looks like an object reference
+"""
+
+import pytest
+
+from backend.storage.version_history import VersionHistory
+
+
+def _itinerary(activity):
+    return {
+        "destination": "Paris",
+        "days": [{"dayNumber": 1, "periods": {"morning": [activity], "afternoon": [], "evening": []}}],
+        "additionalActivities": [{"id": "extra_activity_0", "activity": "Shopping", "meta": {"$ref": "x"}}],
+        "$schema": "wandertrip"
+    }
+
+
+@pytest.fixture
+def history(tmp_path):
+    return VersionHistory(str(tmp_path / "history"))
+
+
+def _save(history, data, version=1):
+    root_hash, _ = history.put_tree(data)
+    history.append("current", version, root_hash)
+
+
+@pytest.mark.parametrize("activity", [
+    {"$ref": "../../../outside"},
+    {"$ref": "0" * 64},
+    {"$$ref": "escaped already", "$": "dollar"},
+    {"id": "day1_morning_0", "activity": "Louvre", "links": [{"$ref": "#/poi/1"}]},
+])
+def test_saved_data_that_looks_like_a_ref_round_trips(history, tmp_path, activity):
+    (tmp_path / "outside.json").write_text('{"secret": true}')
+    data = _itinerary(activity)
+
+    _save(history, data)
+
+    assert history.get_version("current", 1) == dict(data, version=1)
+
+
+def test_unchanged_activities_are_stored_once(history):
+    data = _itinerary({"$ref": "../../../outside"})
+    _save(history, data, 1)
+
+    root_hash, stats = history.put_tree(dict(data, destination="Lyon"))
+
+    # Only the root changed
+    assert stats["newObjects"] == 1
+
+
+def test_malformed_object_hashes_are_rejected(history):
+    history.append("current", 1, "../../../outside")
+
+    with pytest.raises(ValueError):
+        history.get_version("current", 1)